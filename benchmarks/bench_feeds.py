@@ -0,0 +1,300 @@
+"""フィード生成のホットパス（解析・RSS書き出し）のベンチマーク。
+
+ネットワークを使わず tests/fixtures/*.html と、記事を複製して水増ししたページで
+ステージごと・パーサーバックエンドごとの実行時間とピークメモリを測ります。
+
+    python -m benchmarks.bench_feeds --save benchmarks/results.json
+    python -m benchmarks.bench_feeds --compare benchmarks/baseline.json
+    python -m benchmarks.bench_feeds --workers 1,2,4 --batch 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import xml.dom.minidom
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypedDict
+
+import bs4
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+from src.rss_maker import generate_rss
+from src.rss_maker.parse_pool import make_parse_pool, parse_pages
+from src.rss_maker.rss_writer import write_rss
+from src.rss_maker.sites import SiteAdapter, get_site_adapter
+from src.rss_maker.streaming import read_until_container
+
+ROOT = Path(__file__).parent.parent
+FIXTURES = ROOT / "tests" / "fixtures"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# フィクスチャと、それを解析するサイトアダプタ・ページURL
+FIXTURE_SITES: Dict[str, Tuple[str, str]] = {
+    "audee": ("audee_program_page.html", "https://audee.jp/program/show/40889"),
+    "jfn_pods": ("jfn_pods_voice_page.html", "https://jfn-pods.com/program/40889/voice"),
+    "bitfan_updates": ("ij-matome_program_page.html", "https://ij-matome.bitfan.id/updates"),
+}
+
+
+class Measurement(TypedDict):
+    seconds: float
+    median_seconds: float
+    peak_kib: float
+
+
+class BenchmarkReport(TypedDict):
+    meta: Dict[str, object]
+    results: Dict[str, Measurement]
+
+
+def scale_page(html: str, adapter: SiteAdapter, items: int) -> str:
+    """記事要素を複製し、リンクの異なる記事が `items` 件以上あるページを作ります。"""
+    soup = BeautifulSoup(html, "html.parser")
+    scope: Tag = soup
+    if "container" in adapter:
+        container = soup.select_one(adapter["container"])
+        assert isinstance(container, Tag)
+        scope = container
+    templates = scope.select(adapter["item"])
+    if not templates or items <= len(templates):
+        return html
+
+    for index in range(items - len(templates)):
+        template = templates[index % len(templates)]
+        clone = copy.copy(template)
+        link = clone.select_one(adapter["link"]) if "link" in adapter else clone
+        assert isinstance(link, Tag)
+        link["href"] = f"{link.get('href')}-bench{index}"
+        templates[-1].insert_after(clone)
+        templates[-1] = clone
+    return str(soup)
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Measurement:
+    """`repeat` 回の実行時間（最小・中央値）と、別途1回実行したときのピークメモリを測ります。"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    # tracemalloc は実行を遅くするため、時間の計測とは分ける
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "peak_kib": peak / 1024,
+    }
+
+
+def _minidom_pipeline(feed: generate_rss.FeedContent) -> str:
+    """以前の feedgenerator → minidom 整形 → 空白行除去による出力"""
+    xml_str = generate_rss.generate_rss_feed(feed["channel"], feed["articles"])
+    pretty_xml = xml.dom.minidom.parseString(xml_str).toprettyxml(indent="  ")
+    return "\n".join(line for line in pretty_xml.split("\n") if line.strip())
+
+
+def _stream_write(feed: generate_rss.FeedContent) -> str:
+    buffer = StringIO()
+    write_rss(feed["channel"], feed["articles"], buffer)
+    return buffer.getvalue()
+
+
+def _chunks(text: str, size: int = 16 * 1024) -> List[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def _measure_parse_pool(
+    adapter: SiteAdapter, html: str, url: str, workers: int, batch: int, repeat: int
+) -> Measurement:
+    """起動済みのプロセスプールで、同じページ `batch` 件をまとめて解析する時間を測ります。"""
+    jobs = [(adapter, html, url)] * batch
+    with make_parse_pool(workers, adapters=[adapter]) as pool:
+        # ワーカーの起動を計測に含めない
+        parse_pages(jobs[:workers], pool=pool, chunksize=1)
+        return measure(lambda: parse_pages(jobs, pool=pool, workers=workers), repeat)
+
+
+def run_benchmarks(
+    sites: Sequence[str],
+    item_counts: Sequence[int],
+    backends: Sequence[str],
+    repeat: int,
+    workers: Sequence[int] = (),
+    batch: int = 16,
+) -> BenchmarkReport:
+    results: Dict[str, Measurement] = {}
+    original_backend = generate_rss.get_parser_backend()
+    try:
+        for site in sites:
+            adapter = get_site_adapter(site)
+            fixture, url = FIXTURE_SITES[site]
+            base_html = (FIXTURES / fixture).read_text(encoding="utf-8")
+            for items in item_counts:
+                html = scale_page(base_html, adapter, items) if items else base_html
+                size = f"x{items}" if items else "fixture"
+
+                for backend in backends:
+                    generate_rss.set_parser_backend(backend)
+                    for partial in (False, True):
+                        mode = "partial" if partial else "full"
+                        results[f"parse/{site}/{size}/{backend}/{mode}"] = measure(
+                            lambda: generate_rss.extract_page(
+                                adapter, html, url, partial=partial
+                            ),
+                            repeat,
+                        )
+
+                generate_rss.set_parser_backend("html.parser")
+                for count in workers:
+                    results[f"parse_pool/{site}/{size}/w{count}"] = _measure_parse_pool(
+                        adapter, html, url, count, batch, repeat
+                    )
+                feed = generate_rss.prepare_feed(adapter, html, url)
+                results[f"serialize/{site}/{size}/stream"] = measure(
+                    lambda: _stream_write(feed), repeat
+                )
+                results[f"serialize/{site}/{size}/feedgenerator_minidom"] = measure(
+                    lambda: _minidom_pipeline(feed), repeat
+                )
+                if "stream_container" in adapter:
+                    chunks = _chunks(html)
+                    container = adapter["stream_container"]
+                    results[f"scan/{site}/{size}"] = measure(
+                        lambda: read_until_container(iter(chunks), container), repeat
+                    )
+    finally:
+        generate_rss.set_parser_backend(original_backend)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "beautifulsoup4": bs4.__version__,
+            "backends": list(backends),
+            "repeat": repeat,
+            "workers": list(workers),
+            "batch": batch,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: BenchmarkReport, baseline: BenchmarkReport, threshold: float
+) -> List[str]:
+    """基準値より `threshold` 倍を超えて遅い・メモリを使う計測項目を返します。"""
+    regressions: List[str] = []
+    for key, measured in sorted(current["results"].items()):
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        for metric in ("seconds", "peak_kib"):
+            if base[metric] > 0 and measured[metric] > base[metric] * threshold:
+                ratio = measured[metric] / base[metric]
+                regressions.append(
+                    f"{key} {metric}: {base[metric]:.4g} -> {measured[metric]:.4g}"
+                    f" (x{ratio:.2f})"
+                )
+    return regressions
+
+
+def _format_table(report: BenchmarkReport, baseline: Optional[BenchmarkReport]) -> str:
+    lines = [f"{'benchmark':<58} {'seconds':>10} {'peak KiB':>10} {'vs base':>8}"]
+    for key, measured in sorted(report["results"].items()):
+        ratio = ""
+        base = baseline["results"].get(key) if baseline else None
+        if base and base["seconds"] > 0:
+            ratio = f"x{measured['seconds'] / base['seconds']:.2f}"
+        lines.append(
+            f"{key:<58} {measured['seconds']:>10.4f} {measured['peak_kib']:>10.0f}"
+            f" {ratio:>8}"
+        )
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sites", default=",".join(FIXTURE_SITES), help="対象サイト（カンマ区切り）"
+    )
+    parser.add_argument(
+        "--items",
+        type=_int_list,
+        default=[0, 2000],
+        help="水増し後の記事数（カンマ区切り、0はフィクスチャそのまま）",
+    )
+    parser.add_argument(
+        "--backends",
+        default=",".join(generate_rss.available_parser_backends()),
+        help="パーサーバックエンド（カンマ区切り）",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="各計測の繰り返し回数")
+    parser.add_argument(
+        "--workers",
+        type=_int_list,
+        default=[],
+        help="プロセスプールでまとめて解析するときのワーカー数（カンマ区切り）",
+    )
+    parser.add_argument(
+        "--batch", type=int, default=16, help="プロセスプールでまとめて解析するページ数"
+    )
+    parser.add_argument("--save", type=Path, help="計測結果のJSONを保存するパス")
+    parser.add_argument("--compare", type=Path, help="比較する基準値のJSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="基準値の何倍を超えたら劣化とみなすか",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        [site for site in args.sites.split(",") if site],
+        args.items,
+        [backend for backend in args.backends.split(",") if backend],
+        args.repeat,
+        args.workers,
+        args.batch,
+    )
+    baseline: Optional[BenchmarkReport] = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+
+    print(_format_table(report, baseline))
+    if args.save:
+        args.save.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n基準値から劣化した計測項目があります（x{args.threshold} 超）:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,560 @@
+from __future__ import annotations
+
+import os
+import time
+import traceback
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import (
+    Collection,
+    Dict,
+    List,
+    NotRequired,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+)
+
+from . import generate_rss
+from .crawl import crawl_pages
+from .enrich import DetailCache, enrich_articles
+from .feed_formats import write_feed_files
+from .fetch import Fetcher, HostLimiter
+from .fingerprint import page_fingerprint
+from .http_cache import HttpCache
+from .incremental import (
+    DEFAULT_HISTORY_LIMIT,
+    is_unchanged,
+    load_published_feed,
+    merge_feed,
+)
+from .item_store import ItemStore
+from .manifest import FeedManifest
+from .metrics import FeedMetrics, MetricsRecorder
+from .parse_pool import make_feed_parse_pool
+from .sites import SiteAdapter, get_site_adapter
+
+
+class FeedSpec(TypedDict):
+    name: str
+    site: str
+    url: str
+    output_path: str
+    # ページ送りをたどる最大ページ数（省略時は1ページ目のみ）と、集める最大記事数
+    max_pages: NotRequired[int]
+    max_items: NotRequired[int]
+    # 記事の詳細ページから説明・公開日時・音声ファイルを補うか
+    enrich: NotRequired[bool]
+    # 常駐時に取得する間隔（秒）。更新の有無に応じて min_interval〜max_interval で伸縮する
+    interval: NotRequired[float]
+    min_interval: NotRequired[float]
+    max_interval: NotRequired[float]
+    # 設定ファイルで無効にしたフィード（--only で名前を指定したときだけ生成する）
+    enabled: NotRequired[bool]
+    # RSS（output_path）と同時に書き出す形式と出力先（atom / json / podcast）
+    outputs: NotRequired[Dict[str, str]]
+
+
+class FeedResult(TypedDict):
+    name: str
+    ok: bool
+    not_modified: NotRequired[bool]
+    unchanged: NotRequired[bool]
+    new_items: NotRequired[int]
+    error: NotRequired[str]
+    traceback: NotRequired[str]
+
+
+def feed_outputs(spec: FeedSpec) -> Dict[str, str]:
+    """フィードの出力形式と出力先を返します（RSS は output_path）。"""
+    outputs = {"rss": spec["output_path"]}
+    outputs.update(spec.get("outputs", {}))
+    return outputs
+
+
+def _outputs_exist(spec: FeedSpec) -> bool:
+    return all(os.path.exists(path) for path in feed_outputs(spec).values())
+
+
+def _seed_item_store(spec: FeedSpec, item_store: ItemStore) -> None:
+    """アイテムストアに無いフィードは、公開済みのRSSから記事を取り込みます。"""
+    if item_store.has_feed(spec["name"]):
+        return
+    path = spec["output_path"]
+    published = load_published_feed(path)
+    if published is not None:
+        # 公開済みの記事は、少なくともファイルの更新時刻には見つかっていた
+        item_store.upsert(
+            spec["name"],
+            {"channel": published["channel"], "articles": list(published["articles"])},
+            seen_at=os.path.getmtime(path),
+        )
+
+
+def _known_urls(spec: FeedSpec, item_store: Optional[ItemStore]) -> Collection[str]:
+    """公開済みの記事の識別子を、アイテムストア（無ければ公開済みのRSS）から返します。"""
+    if item_store is not None:
+        _seed_item_store(spec, item_store)
+        return item_store.known_urls(spec["name"])
+    published = load_published_feed(spec["output_path"])
+    return published["keys"] if published is not None else ()
+
+
+def _failure(name: str, error: BaseException) -> FeedResult:
+    return {
+        "name": name,
+        "ok": False,
+        "error": str(error) or type(error).__name__,
+        "traceback": "".join(traceback.format_exception(error)),
+    }
+
+
+def _fetch(
+    spec: FeedSpec,
+    adapter: SiteAdapter,
+    limiter: HostLimiter,
+    fetcher: Fetcher,
+    cache: Optional[HttpCache],
+    streaming: bool,
+    metrics: FeedMetrics,
+) -> Optional[str]:
+    url = spec["url"]
+    container = adapter.get("stream_container") if streaming else None
+    with limiter.limit(url), metrics.stage("fetch"):
+        if cache is None:
+            html = generate_rss.get_html(
+                url, fetcher=fetcher, container=container, metrics=metrics
+            )
+        else:
+            # 出力ファイルが無い場合は 304 を受けても復元できないため無条件で取得する
+            if not _outputs_exist(spec):
+                cache.forget(url)
+            html = generate_rss.get_html_if_modified(
+                url, cache, fetcher=fetcher, container=container, metrics=metrics
+            )
+    if html is None:
+        metrics.increment("http_cache_hits")
+    else:
+        metrics.increment("pages_fetched")
+    return html
+
+
+# 解析結果と、ワーカー側で計った解析秒数
+_TimedPage = Tuple[generate_rss.PageData, float]
+
+
+def _timed_extract(
+    adapter: SiteAdapter, html: str, url: str, partial: bool
+) -> _TimedPage:
+    """ワーカー側で解析し、キュー待ちを含まない解析時間を併せて返します。"""
+    start = time.perf_counter()
+    page = generate_rss.extract_page(adapter, html, url, partial=partial)
+    return page, time.perf_counter() - start
+
+
+def _wants_more_pages(spec: FeedSpec, page: generate_rss.PageData) -> bool:
+    return spec.get("max_pages", 1) > 1 and "next_url" in page
+
+
+def _needs_followup(spec: FeedSpec, page: generate_rss.PageData) -> bool:
+    """1ページ目の解析後に、ページ送りか詳細ページの取得が必要かを判定します。"""
+    return spec.get("enrich", False) or _wants_more_pages(spec, page)
+
+
+def _crawl(
+    spec: FeedSpec,
+    adapter: SiteAdapter,
+    first_page: generate_rss.PageData,
+    known: Collection[str],
+    limiter: HostLimiter,
+    fetcher: Fetcher,
+    parse_pool: Executor,
+    streaming: bool,
+    metrics: FeedMetrics,
+) -> List[generate_rss.Article]:
+    container = adapter.get("stream_container") if streaming else None
+
+    def fetch_page(url: str) -> generate_rss.PageData:
+        # 2ページ目以降は1ページ目が更新されたときだけ読むため、条件付きにはしない
+        with limiter.limit(url):
+            html = generate_rss.get_html(
+                url, fetcher=fetcher, container=container, metrics=metrics
+            )
+        metrics.increment("pages_fetched")
+        return parse_pool.submit(
+            generate_rss.extract_page, adapter, html, url, partial=streaming
+        ).result()
+
+    return crawl_pages(
+        first_page,
+        fetch_page,
+        max_pages=spec["max_pages"],
+        max_items=spec.get("max_items"),
+        known_urls=known,
+        page_param=adapter.get("page_param"),
+        on_error=lambda url, error: metrics.increment("page_failures"),
+    )
+
+
+# 追加で集めた記事と、取得できなかったページが無かったかどうか
+_Followup = Tuple[generate_rss.PageData, bool]
+
+
+def _followup(
+    spec: FeedSpec,
+    adapter: SiteAdapter,
+    first_page: generate_rss.PageData,
+    limiter: HostLimiter,
+    fetcher: Fetcher,
+    parse_pool: Executor,
+    streaming: bool,
+    incremental: bool,
+    detail_cache: Optional[DetailCache],
+    item_store: Optional[ItemStore],
+    metrics: FeedMetrics,
+) -> _Followup:
+    """ページ送りをたどって記事を集め、必要なら詳細ページで記事を補います。"""
+    failures = metrics.counter("page_failures") + metrics.counter("detail_failures")
+    known: Collection[str] = ()
+    if incremental:
+        known = _known_urls(spec, item_store)
+
+    articles = first_page["articles"]
+    if _wants_more_pages(spec, first_page):
+        with metrics.stage("crawl"):
+            articles = _crawl(
+                spec,
+                adapter,
+                first_page,
+                known,
+                limiter,
+                fetcher,
+                parse_pool,
+                streaming,
+                metrics,
+            )
+    if spec.get("enrich", False):
+        # 詳細キャッシュには補えた記事だけが入るため、失敗した記事は公開済みでも読み直す。
+        # キャッシュが無い場合は補えたかどうか分からないため、公開済みの記事は読まない
+        skip_urls = known if detail_cache is None else ()
+        with metrics.stage("enrich"):
+            articles = enrich_articles(
+                adapter,
+                articles,
+                fetcher,
+                cache=detail_cache,
+                limiter=limiter,
+                skip_urls=skip_urls,
+                metrics=metrics,
+            )
+    complete = (
+        metrics.counter("page_failures") + metrics.counter("detail_failures") == failures
+    )
+    return {"channel": first_page["channel"], "articles": articles}, complete
+
+
+def _write_feed(
+    spec: FeedSpec,
+    content: generate_rss.FeedContent,
+    incremental: bool,
+    history_limit: int,
+    manifest: Optional[FeedManifest],
+    item_store: Optional[ItemStore],
+    metrics: FeedMetrics,
+) -> FeedResult:
+    result: FeedResult = {"name": spec["name"], "ok": True}
+    metrics.increment("items", len(content["articles"]))
+    new_count, unchanged = 0, False
+    if item_store is not None:
+        with metrics.stage("merge"):
+            _seed_item_store(spec, item_store)
+            stored = item_store.upsert(spec["name"], content)
+            if incremental:
+                content = item_store.feed_content(spec["name"], history_limit) or content
+        unchanged = not (
+            stored["new_items"] or stored["updated_items"] or stored["channel_changed"]
+        )
+        new_count = stored["new_items"]
+    elif incremental:
+        with metrics.stage("merge"):
+            published = load_published_feed(spec["output_path"])
+            content, new_count = merge_feed(content, published, history_limit)
+        unchanged = is_unchanged(content, published, new_count)
+    if incremental:
+        result["new_items"] = new_count
+        metrics.increment("new_items", new_count)
+        # 後から追加した出力形式は、記事に変更が無くても書き出す
+        if unchanged and _outputs_exist(spec):
+            result["unchanged"] = True
+            return result
+    with metrics.stage("write"):
+        # 全形式を1回の抽出結果からまとめて書き出す
+        written = write_feed_files(
+            feed_outputs(spec), content["channel"], content["articles"], manifest
+        )
+        if not written:
+            result["unchanged"] = True
+    return result
+
+
+def _outcome(result: FeedResult) -> str:
+    if not result["ok"]:
+        return "error"
+    if result.get("not_modified"):
+        return "not_modified"
+    if result.get("unchanged"):
+        return "unchanged"
+    return "written"
+
+
+def build_feeds(
+    feeds: Sequence[FeedSpec],
+    *,
+    max_workers: int = 8,
+    max_per_host: int = 2,
+    max_page_bytes: Optional[int] = None,
+    parse_workers: Optional[int] = None,
+    cache: Optional[HttpCache] = None,
+    fetcher: Optional[Fetcher] = None,
+    parser_backend: Optional[str] = None,
+    streaming: bool = False,
+    incremental: bool = False,
+    history_limit: int = DEFAULT_HISTORY_LIMIT,
+    manifest: Optional[FeedManifest] = None,
+    detail_cache: Optional[DetailCache] = None,
+    metrics: Optional[MetricsRecorder] = None,
+    limiter: Optional[HostLimiter] = None,
+    parse_pool: Optional[Executor] = None,
+    item_store: Optional[ItemStore] = None,
+) -> List[FeedResult]:
+    """複数フィードを並行して生成し、フィードごとの成否を入力順で返します。
+
+    取得はスレッドプール（全体で `max_workers`、ホストごとに `max_per_host` まで）、
+    HTMLの解析はプロセスプールで実行し、RSSは呼び出し元でファイルへ直接書き出します。
+    `parse_workers=0` の場合は解析を呼び出し元のプロセスで行います。
+    `cache` を渡すと条件付きリクエストを行い、304のフィードは解析と書き込みを省略します。
+    200でも記事一覧の範囲のフィンガープリントが前回の生成時と同じなら、同様に省略します。
+    `fetcher` を省略した場合は、このビルド内で共有する Fetcher を作成します。
+    その Fetcher は `max_page_bytes` を超えるページの読み込みを打ち切ります。
+    `parser_backend` を指定すると、解析に使うHTMLパーサーを切り替えます。
+    `streaming=True` の場合は記事コンテナが閉じた時点で本文の読み込みを打ち切り、
+    記事コンテナとメタ情報だけを部分的に解析します。
+    `incremental=True` の場合は公開済みのフィードに新しい記事だけを追加し、
+    `history_limit` 件まで過去の記事を残します。新しい記事が無ければ書き込みません。
+    `manifest` を渡すと、内容のハッシュ値が前回と同じフィードは書き込みを省略します。
+    `max_pages` を指定したフィードはページ送りをたどって過去の記事も集めます。
+    差分更新時は公開済みの記事に到達した時点で打ち切ります。途中のページを取得できなかった
+    場合は、次回のビルドで読み直せるよう `cache` の検証子を破棄します。
+    `enrich` を指定したフィードは記事の詳細ページを並行して読み、結果を `detail_cache` に
+    保存します。`detail_cache` にある記事の詳細ページは読まず、取得できなかった記事は
+    次回のビルドで読み直します（その場合は `cache` の検証子も破棄します）。`detail_cache` が無い場合、差分更新時は公開済みの記事の
+    詳細ページを読みません。
+    `metrics` を渡すと、フィードごとのステージ別所要時間・取得バイト数・記事数・
+    キャッシュヒット数・HTTPステータスを記録します。
+    `item_store` を渡すと抽出した記事をフィードごとに1回のトランザクションで保存し、
+    差分更新では公開済みのRSSの代わりに保存済みの記事からフィードを組み立てます。
+    `limiter` と `parse_pool` を渡すと、ビルドをまたいで同じものを使います（常駐時など）。
+    `parse_pool` を渡した場合、`parse_workers` と `parser_backend` はワーカーに反映されません。
+    """
+    if parser_backend is not None:
+        generate_rss.set_parser_backend(parser_backend)
+    backend = generate_rss.get_parser_backend()
+    recorder = metrics or MetricsRecorder()
+
+    results: Dict[int, FeedResult] = {}
+    adapters: Dict[int, SiteAdapter] = {}
+    for index, spec in enumerate(feeds):
+        try:
+            adapters[index] = get_site_adapter(spec["site"])
+        except ValueError as e:
+            results[index] = _failure(spec["name"], e)
+    runnable = list(adapters)
+
+    if runnable:
+        host_limiter = limiter or HostLimiter(max_per_host)
+        owns_fetcher = fetcher is None
+        shared_fetcher = fetcher or Fetcher(
+            pool_maxsize=max_per_host, max_bytes=max_page_bytes
+        )
+        with (
+            ThreadPoolExecutor(max_workers=max_workers) as fetch_pool,
+            (
+                nullcontext(parse_pool)
+                if parse_pool is not None
+                else make_feed_parse_pool(
+                    parse_workers,
+                    len(runnable),
+                    backend,
+                    [adapters[index] for index in runnable],
+                )
+            ) as pool,
+        ):
+            fetch_futures = {
+                fetch_pool.submit(
+                    _fetch,
+                    feeds[index],
+                    adapters[index],
+                    host_limiter,
+                    shared_fetcher,
+                    cache,
+                    streaming,
+                    recorder.feed(feeds[index]["name"]),
+                ): index
+                for index in runnable
+            }
+
+            def fail(index: int, error: Exception) -> None:
+                spec = feeds[index]
+                # 検証子を残すと次回304で失敗したまま放置されるため破棄する
+                if cache is not None:
+                    cache.forget(spec["url"])
+                results[index] = _failure(spec["name"], error)
+
+            parse_futures: Dict[Future[_TimedPage], int] = {}
+            fingerprints: Dict[int, str] = {}
+            for future in as_completed(fetch_futures):
+                index = fetch_futures[future]
+                spec = feeds[index]
+                try:
+                    html = future.result()
+                except Exception as e:
+                    fail(index, e)
+                    continue
+                if html is not None and cache is not None:
+                    feed_metrics = recorder.feed(spec["name"])
+                    with feed_metrics.stage("fingerprint"):
+                        fingerprint = page_fingerprint(adapters[index], html, spec)
+                    if fingerprint is not None and fingerprint == cache.fingerprint(
+                        spec["url"]
+                    ):
+                        # 記事一覧の範囲が前回と同じなら、解析も生成も行わない
+                        feed_metrics.increment("fingerprint_hits")
+                        html = None
+                    elif fingerprint is not None:
+                        fingerprints[index] = fingerprint
+                if html is None:
+                    results[index] = {
+                        "name": spec["name"],
+                        "ok": True,
+                        "not_modified": True,
+                    }
+                    continue
+                # アダプタは関数を持たない辞書なので、そのままワーカーへ渡せる
+                future_page = pool.submit(
+                    _timed_extract, adapters[index], html, spec["url"], streaming
+                )
+                parse_futures[future_page] = index
+
+            def finish(
+                index: int, page: generate_rss.PageData, complete: bool = True
+            ) -> None:
+                spec = feeds[index]
+                try:
+                    content = generate_rss.feed_from_page(
+                        adapters[index], page, spec["url"]
+                    )
+                    results[index] = _write_feed(
+                        spec,
+                        content,
+                        incremental,
+                        history_limit,
+                        manifest,
+                        item_store,
+                        recorder.feed(spec["name"]),
+                    )
+                except Exception as e:
+                    fail(index, e)
+                    return
+                if cache is None:
+                    return
+                if complete:
+                    cache.remember_fingerprint(spec["url"], fingerprints.get(index))
+                else:
+                    # 検証子を残すと次回304になり、読めなかったページを読み直さないため破棄する
+                    cache.forget(spec["url"])
+
+            followup_futures: Dict[Future[_Followup], int] = {}
+            for future in as_completed(parse_futures):
+                index = parse_futures[future]
+                spec = feeds[index]
+                try:
+                    page, seconds = future.result()
+                except Exception as e:
+                    fail(index, e)
+                    continue
+                recorder.feed(spec["name"]).add_duration("parse", seconds)
+                if not _needs_followup(spec, page):
+                    finish(index, page)
+                    continue
+                followup_future = fetch_pool.submit(
+                    _followup,
+                    spec,
+                    adapters[index],
+                    page,
+                    host_limiter,
+                    shared_fetcher,
+                    pool,
+                    streaming,
+                    incremental,
+                    detail_cache,
+                    item_store,
+                    recorder.feed(spec["name"]),
+                )
+                followup_futures[followup_future] = index
+
+            for future in as_completed(followup_futures):
+                index = followup_futures[future]
+                try:
+                    page, complete = future.result()
+                except Exception as e:
+                    fail(index, e)
+                    continue
+                finish(index, page, complete)
+
+        if owns_fetcher:
+            shared_fetcher.close()
+        if cache is not None:
+            cache.save()
+        if manifest is not None:
+            manifest.save()
+        if detail_cache is not None:
+            detail_cache.save()
+
+    for index, result in results.items():
+        recorder.feed(feeds[index]["name"]).finish(result["ok"], _outcome(result))
+    return [results[index] for index in range(len(feeds))]
+
+
+def regenerate_feeds(
+    feeds: Sequence[FeedSpec],
+    item_store: ItemStore,
+    *,
+    history_limit: int = DEFAULT_HISTORY_LIMIT,
+    manifest: Optional[FeedManifest] = None,
+) -> List[FeedResult]:
+    """アイテムストアに保存済みの記事から、全形式のフィードを書き出し直します。
+
+    HTMLは取得しないため、出力形式のテンプレートを変えたときなどにネットワークなしで
+    使えます。内容が前回と同じでも書き出し、`manifest` のハッシュ値を更新します。
+    """
+    results: List[FeedResult] = []
+    for spec in feeds:
+        try:
+            content = item_store.feed_content(spec["name"], history_limit)
+            if content is None:
+                raise ValueError(f"アイテムストアに記事がありません: {spec['name']}")
+            write_feed_files(
+                feed_outputs(spec),
+                content["channel"],
+                content["articles"],
+                manifest,
+                force=True,
+            )
+        except Exception as e:
+            results.append(_failure(spec["name"], e))
+            continue
+        results.append({"name": spec["name"], "ok": True})
+    if manifest is not None:
+        manifest.save()
+    return results
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import base64
+import io
+import json
+import os
+import threading
+from typing import Dict, List, Literal, Mapping, NotRequired, Optional, TypedDict
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .atomic import atomic_write
+from .fetch import _make_session
+
+CassetteMode = Literal["record", "replay"]
+
+# 本文は展開済みで保存するため、転送時の符号化に関するヘッダーは残さない
+_DROPPED_HEADERS = frozenset({"content-encoding", "transfer-encoding", "content-length"})
+
+
+class RecordedResponse(TypedDict):
+    status: int
+    reason: str
+    headers: Dict[str, str]
+    # UTF-8として読める本文はそのまま、それ以外はbase64で保存する
+    body: NotRequired[str]
+    body_base64: NotRequired[str]
+
+
+class Interaction(TypedDict):
+    method: str
+    url: str
+    response: RecordedResponse
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """再生モードで、記録されていないリクエストが送られた場合の例外。"""
+
+
+def _encode_body(body: bytes, recorded: RecordedResponse) -> None:
+    try:
+        recorded["body"] = body.decode("utf-8")
+    except UnicodeDecodeError:
+        recorded["body_base64"] = base64.b64encode(body).decode("ascii")
+
+
+def _decode_body(recorded: RecordedResponse) -> bytes:
+    if "body_base64" in recorded:
+        return base64.b64decode(recorded["body_base64"])
+    return recorded.get("body", "").encode("utf-8")
+
+
+def _matches_validators(
+    request_headers: Mapping[str, str], response_headers: Mapping[str, str]
+) -> bool:
+    headers = CaseInsensitiveDict(response_headers)
+    etag = headers.get("ETag")
+    last_modified = headers.get("Last-Modified")
+    if etag and request_headers.get("If-None-Match") == etag:
+        return True
+    return bool(
+        last_modified and request_headers.get("If-Modified-Since") == last_modified
+    )
+
+
+class CassetteAdapter(BaseAdapter):
+    """HTTPのやり取りをカセットファイルへ記録し、ネットワーク無しで再生するアダプタ。
+
+    `mode="record"` では実際に通信してレスポンスを記録し、`mode="replay"` では
+    記録済みのレスポンスを返します。再生時、リクエストの If-None-Match /
+    If-Modified-Since が記録したレスポンスの検証子と一致すれば 304 を返します。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: CassetteMode = "replay",
+        transport: Optional[BaseAdapter] = None,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.mode = mode
+        self._transport = transport or HTTPAdapter(max_retries=0)
+        self._lock = threading.Lock()
+        self._interactions: List[Interaction] = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._interactions = json.load(f)["interactions"]
+        elif mode == "replay":
+            raise FileNotFoundError(f"カセットファイルが見つかりませんでした: {path}")
+
+    def _find(self, method: str, url: str) -> Optional[RecordedResponse]:
+        with self._lock:
+            # 同じURLを記録し直した場合は新しい方を使う
+            for interaction in reversed(self._interactions):
+                if interaction["method"] == method and interaction["url"] == url:
+                    return interaction["response"]
+        return None
+
+    def send(  # type: ignore[override]
+        self, request: requests.PreparedRequest, stream: bool = False, **kwargs: object
+    ) -> requests.Response:
+        method = request.method or "GET"
+        url = request.url or ""
+        if self.mode == "record":
+            return self._record(request, **kwargs)
+
+        recorded = self._find(method, url)
+        if recorded is None:
+            raise CassetteMissError(
+                f"カセットに記録されていないリクエストです: {method} {url}",
+                request=request,
+            )
+        if _matches_validators(request.headers, recorded["headers"]):
+            return self._build_response(
+                request, {"status": 304, "reason": "Not Modified", "headers": {}}, b""
+            )
+        body = b"" if method == "HEAD" else _decode_body(recorded)
+        return self._build_response(request, recorded, body)
+
+    def _record(
+        self, request: requests.PreparedRequest, **kwargs: object
+    ) -> requests.Response:
+        kwargs["stream"] = False
+        response = self._transport.send(request, **kwargs)  # type: ignore[arg-type]
+        # 条件付きリクエストへの304は、本文を含むレスポンスを上書きしないよう記録しない
+        if response.status_code == 304:
+            return response
+        recorded: RecordedResponse = {
+            "status": response.status_code,
+            "reason": response.reason or "",
+            "headers": {
+                key: value
+                for key, value in response.headers.items()
+                if key.lower() not in _DROPPED_HEADERS
+            },
+        }
+        _encode_body(response.content, recorded)
+        with self._lock:
+            self._interactions.append(
+                {
+                    "method": request.method or "GET",
+                    "url": request.url or "",
+                    "response": recorded,
+                }
+            )
+        return response
+
+    def _build_response(
+        self,
+        request: requests.PreparedRequest,
+        recorded: RecordedResponse,
+        body: bytes,
+    ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.reason = recorded["reason"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response.headers["Content-Length"] = str(len(body))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url or ""
+        response.request = request
+        response.connection = self
+        return response
+
+    def save(self) -> None:
+        """記録したやり取りをカセットファイルへ書き出します。"""
+        with self._lock:
+            data = json.dumps(
+                {"interactions": self._interactions}, ensure_ascii=False, indent=2
+            )
+        with atomic_write(self.path) as f:
+            f.write(data)
+
+    def close(self) -> None:
+        if self.mode == "record":
+            self.save()
+        self._transport.close()
+
+
+def cassette_session(
+    path: str,
+    mode: CassetteMode = "replay",
+    *,
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
+) -> requests.Session:
+    """カセットを通して通信するセッションを返します。`Fetcher(session=...)` に渡して使います。
+
+    記録モードではセッションを close した時点でカセットファイルを保存します。
+    """
+    session = _make_session(pool_connections, pool_maxsize)
+    transport = session.get_adapter("https://")
+    adapter = CassetteAdapter(path, mode, transport=transport)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,322 @@
+"""rss-maker コマンド。設定ファイルに書いたフィードをまとめて生成します。
+
+    rss-maker --config feeds.toml
+    rss-maker --only Bitfan --dry-run
+    rss-maker --due --jobs 4
+    rss-maker --daemon
+    rss-maker --serve --port 8080
+    rss-maker --regenerate
+
+起動を速くするため、bs4・feedgenerator・requests は実際にフィードを生成するときに
+初めて読み込みます（--help・--dry-run・取得時刻前の --due では読み込みません）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import signal
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from .config import DEFAULT_CONFIG_PATH, FeedConfig, Settings, load_config, select_feeds
+from .schedule import ScheduleState, due_feeds, feed_state, record_result
+
+if TYPE_CHECKING:
+    from .build import FeedResult, FeedSpec
+    from .metrics import MetricsRecorder
+
+# 環境変数で指定した場合は設定ファイルの metrics_textfile より優先する
+METRICS_TEXTFILE_ENV = "RSS_MAKER_METRICS_TEXTFILE"
+
+
+def _names(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def _jobs(value: str) -> int:
+    jobs = int(value)
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"--jobs は1以上を指定してください: {value}")
+    return jobs
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="rss-maker", description="設定ファイルに書いたRSSフィードを生成します。"
+    )
+    parser.add_argument(
+        "--config", default=DEFAULT_CONFIG_PATH, help="フィード設定（TOML / YAML）のパス"
+    )
+    parser.add_argument(
+        "--only",
+        type=_names,
+        action="append",
+        default=[],
+        help="生成するフィード名（カンマ区切り・複数指定可）。無効にしたフィードも指定できる",
+    )
+    parser.add_argument(
+        "--due", action="store_true", help="取得時刻を過ぎたフィードだけを生成する"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="生成するフィードを表示するだけで取得しない"
+    )
+    parser.add_argument("--jobs", type=_jobs, help="並行して取得・解析する数")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--daemon", action="store_true", help="常駐してフィードごとの間隔で取得し続ける"
+    )
+    mode.add_argument("--serve", action="store_true", help="生成したフィードをHTTPで配信する")
+    mode.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="取得せずに、アイテムストアに保存済みの記事からフィードを書き出し直す",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="--serve の待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=8080, help="--serve の待ち受けポート")
+    return parser
+
+
+def report(results: Sequence[FeedResult]) -> bool:
+    """ビルド結果を表示し、エラーがあったかを返します。"""
+    has_error = False
+    for result in results:
+        if result.get("not_modified"):
+            print(f"⏩ {result['name']} は更新がないため生成をスキップしました。")
+        elif result.get("unchanged"):
+            print(f"⏩ {result['name']} は内容に変更がないため書き込みをスキップしました。")
+        elif result["ok"]:
+            print(f"✅ {result['name']} RSSフィードの作成が完了しました。")
+        else:
+            has_error = True
+            print(
+                f"{result['name']} RSS作成中にエラーが発生しました: {result.get('error')}"
+            )
+            print(result.get("traceback", ""), end="")
+    return has_error
+
+
+def _write_metrics(settings: Settings, metrics: MetricsRecorder) -> None:
+    if settings["metrics_log"]:
+        directory = os.path.dirname(settings["metrics_log"])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(settings["metrics_log"], "a", encoding="utf-8") as log:
+            metrics.write_json_lines(log)
+    textfile = os.environ.get(METRICS_TEXTFILE_ENV) or settings["metrics_textfile"]
+    if textfile:
+        metrics.write_prometheus_textfile(textfile)
+
+
+def _register_sites(config: FeedConfig) -> None:
+    from .sites import get_site_adapter, register_site_adapter
+
+    for adapter in config["sites"]:
+        register_site_adapter(adapter)
+    for spec in config["feeds"]:
+        get_site_adapter(spec["site"])
+
+
+def _build_options(settings: Settings) -> Dict[str, Any]:
+    """build_feeds・Scheduler に共通して渡すキャッシュなどの引数を作ります。"""
+    from .enrich import DetailCache
+    from .http_cache import HttpCache
+    from .item_store import ItemStore
+    from .manifest import FeedManifest
+
+    return {
+        "cache": HttpCache(settings["http_cache"]) if settings["http_cache"] else None,
+        "manifest": FeedManifest(settings["manifest"]) if settings["manifest"] else None,
+        "detail_cache": (
+            DetailCache(settings["detail_cache"]) if settings["detail_cache"] else None
+        ),
+        "item_store": (
+            ItemStore(settings["item_store"]) if settings["item_store"] else None
+        ),
+        "streaming": settings["streaming"],
+        "incremental": settings["incremental"],
+        "history_limit": settings["history_limit"],
+    }
+
+
+def _workers(jobs: Optional[int]) -> Dict[str, Any]:
+    if jobs is None:
+        return {}
+    return {"max_workers": jobs, "parse_workers": min(jobs, os.cpu_count() or 1)}
+
+
+def _print_plan(feeds: Sequence[FeedSpec], state: ScheduleState, now: float) -> None:
+    for spec in feeds:
+        next_run = feed_state(state, spec, now)["next_run"]
+        when = (
+            "取得時刻を過ぎています"
+            if next_run <= now
+            else datetime.datetime.fromtimestamp(next_run).isoformat(timespec="seconds")
+        )
+        print(f"{spec['name']} ({spec['site']})")
+        print(f"  URL: {spec['url']}")
+        print(f"  出力先: {spec['output_path']}")
+        print(f"  次回の取得: {when}")
+
+
+def run_once(
+    config: FeedConfig, feeds: Sequence[FeedSpec], state: ScheduleState, jobs: Optional[int]
+) -> int:
+    """フィードを1回生成し、取得間隔の状態を更新します。"""
+    from .build import build_feeds
+    from .metrics import MetricsRecorder
+
+    settings = config["settings"]
+    for spec in feeds:
+        print(f"{spec['name']}のRSSフィードを作成します。")
+        print(f"URL: {spec['url']}")
+        print(f"出力先: {spec['output_path']}")
+
+    metrics = MetricsRecorder()
+    now = time.time()
+    # 取得は並行、解析はプロセスプールで実行する
+    results = build_feeds(
+        feeds,
+        max_per_host=settings["max_per_host"],
+        max_page_bytes=settings["max_page_bytes"] or None,
+        metrics=metrics,
+        **_workers(jobs),
+        **_build_options(settings),
+    )
+    has_error = report(results)
+    for spec, result in zip(feeds, results):
+        record_result(state, spec, result, now)
+    state.save()
+    _write_metrics(settings, metrics)
+    return 1 if has_error else 0
+
+
+def run_daemon(
+    config: FeedConfig, feeds: Sequence[FeedSpec], state: ScheduleState, jobs: Optional[int]
+) -> int:
+    """フィードごとの間隔で取得し続けます（SIGINT / SIGTERM で終了）。"""
+    from .scheduler import Scheduler
+
+    settings = config["settings"]
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    def on_results(results: List[FeedResult], metrics: MetricsRecorder) -> None:
+        report(results)
+        _write_metrics(settings, metrics)
+
+    scheduler = Scheduler(
+        feeds,
+        state=state,
+        max_per_host=settings["max_per_host"],
+        max_page_bytes=settings["max_page_bytes"] or None,
+        on_results=on_results,
+        **_workers(jobs),
+        **_build_options(settings),
+    )
+    scheduler.run_forever(stop)
+    return 0
+
+
+def run_server(config: FeedConfig, feeds: Sequence[FeedSpec], host: str, port: int) -> int:
+    """生成済みのフィードをHTTPで配信し、期限切れのものはバックグラウンドで生成し直します。"""
+    from .build import build_feeds
+    from .feed_server import FeedServer
+    from .fetch import Fetcher
+    from .metrics import MetricsRecorder
+
+    settings = config["settings"]
+    options = _build_options(settings)
+    fetcher = Fetcher(max_bytes=settings["max_page_bytes"] or None)
+
+    def build(selected: Sequence[FeedSpec]) -> List[FeedResult]:
+        metrics = MetricsRecorder()
+        # 1フィードずつ生成し直すため、解析用のプロセスは起動しない
+        results = build_feeds(
+            selected,
+            parse_workers=0,
+            max_per_host=settings["max_per_host"],
+            fetcher=fetcher,
+            metrics=metrics,
+            **options,
+        )
+        report(results)
+        _write_metrics(settings, metrics)
+        return results
+
+    server = FeedServer(feeds, build=build, host=host, port=port)
+    print(f"{server.base_url} でRSSフィードを配信しています（Ctrl+C で終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fetcher.close()
+    return 0
+
+
+def run_regenerate(config: FeedConfig, feeds: Sequence[FeedSpec]) -> int:
+    """アイテムストアに保存済みの記事から、HTMLを取得せずにフィードを書き出し直します。"""
+    from .build import regenerate_feeds
+    from .item_store import ItemStore
+    from .manifest import FeedManifest
+
+    settings = config["settings"]
+    if not settings["item_store"]:
+        print("--regenerate には設定の item_store が必要です。", file=sys.stderr)
+        return 2
+    manifest = FeedManifest(settings["manifest"]) if settings["manifest"] else None
+    store = ItemStore(settings["item_store"])
+    try:
+        results = regenerate_feeds(
+            feeds, store, history_limit=settings["history_limit"], manifest=manifest
+        )
+    finally:
+        store.close()
+    return 1 if report(results) else 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = _parser()
+    args = parser.parse_args(argv)
+    try:
+        config = load_config(args.config)
+        feeds = select_feeds(
+            config["feeds"], [name for names in args.only for name in names]
+        )
+    except (OSError, ValueError) as e:
+        print(f"設定ファイルを読み込めませんでした: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        _register_sites(config)
+    except ValueError as e:
+        print(f"設定ファイルを読み込めませんでした: {e}", file=sys.stderr)
+        return 2
+
+    state = ScheduleState(config["settings"]["schedule_state"])
+    if args.daemon:
+        return run_daemon(config, feeds, state, args.jobs)
+    if args.serve:
+        return run_server(config, feeds, args.host, args.port)
+    if args.regenerate:
+        return run_regenerate(config, feeds)
+
+    now = time.time()
+    if args.due:
+        feeds = due_feeds(feeds, state, now)
+    if args.dry_run:
+        _print_plan(feeds, state, now)
+        return 0
+    if not feeds:
+        print("生成するフィードはありません。")
+        return 0
+    return run_once(config, feeds, state, args.jobs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
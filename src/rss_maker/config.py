@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import os
+import tomllib
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Sequence, Tuple, TypedDict
+
+if TYPE_CHECKING:
+    from .build import FeedSpec
+
+DEFAULT_CONFIG_PATH = "feeds.toml"
+
+
+class Settings(TypedDict):
+    # ETag/Last-Modified を保存する条件付きリクエスト用キャッシュ
+    http_cache: Optional[str]
+    # 出力済みフィードの内容ハッシュ（同じ内容なら書き込みを省略する）
+    manifest: Optional[str]
+    # 記事の詳細ページから補った情報（一度取得した記事は再取得しない）
+    detail_cache: Optional[str]
+    # フィードごとのステージ別所要時間などを1行1件のJSONで追記するログ
+    metrics_log: Optional[str]
+    # Prometheus の textfile collector 用の出力先
+    metrics_textfile: Optional[str]
+    # フィードごとの取得間隔と次回の取得時刻（--due・常駐時に使う）
+    schedule_state: Optional[str]
+    # 抽出した記事を保存するSQLiteのデータベース（--regenerate で取得せずに書き出し直す）
+    item_store: Optional[str]
+    # 差分更新でフィードに残す記事数
+    history_limit: int
+    streaming: bool
+    incremental: bool
+    max_per_host: int
+    # 1ページの本文の上限バイト数（0で無制限）
+    max_page_bytes: int
+
+
+class FeedConfig(TypedDict):
+    settings: Settings
+    feeds: List[FeedSpec]
+    # [[sites]] に書かれたサイトアダプタ（登録は実際に使うときに行う）
+    sites: List[Dict[str, object]]
+
+
+DEFAULT_SETTINGS: Settings = {
+    "http_cache": ".cache/rss-maker/http_cache.json",
+    "manifest": ".cache/rss-maker/feed_manifest.json",
+    "detail_cache": ".cache/rss-maker/detail_cache.json",
+    "metrics_log": ".cache/rss-maker/metrics.jsonl",
+    "metrics_textfile": None,
+    "schedule_state": ".cache/rss-maker/schedule.json",
+    "item_store": ".cache/rss-maker/items.sqlite3",
+    "history_limit": 200,
+    "streaming": True,
+    "incremental": True,
+    "max_per_host": 2,
+    "max_page_bytes": 10 * 1024 * 1024,
+}
+
+_PATH_SETTINGS = (
+    "http_cache",
+    "manifest",
+    "detail_cache",
+    "metrics_log",
+    "metrics_textfile",
+    "schedule_state",
+    "item_store",
+)
+
+# フィードに書ける項目と、その型
+_FEED_REQUIRED: Tuple[str, ...] = ("name", "site", "url", "output_path")
+_FEED_OPTIONAL: Dict[str, Tuple[type, ...]] = {
+    "max_pages": (int,),
+    "max_items": (int,),
+    "enrich": (bool,),
+    "interval": (int, float),
+    "min_interval": (int, float),
+    "max_interval": (int, float),
+    "enabled": (bool,),
+    "outputs": (dict,),
+}
+# outputs に書ける形式（feed_formats.FEED_FORMATS の rss 以外）。
+# feed_formats は feedgenerator を読み込むため、設定の読み込みでは参照しない
+_OUTPUT_FORMATS = ("atom", "json", "podcast")
+
+
+def _load_mapping(path: str) -> Mapping[str, object]:
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml  # type: ignore[import-untyped]
+        except ImportError as e:
+            raise ValueError(
+                f"YAMLの設定ファイルを読むには PyYAML をインストールしてください: {path}"
+            ) from e
+        with open(path, encoding="utf-8") as f:
+            loaded = yaml.safe_load(f) or {}
+        if not isinstance(loaded, dict):
+            raise ValueError(f"設定ファイルの形式が正しくありません: {path}")
+        return loaded
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def _is_type(value: object, types: Tuple[type, ...]) -> bool:
+    # bool は int のサブクラスのため、数値の項目に true/false を書いた場合は誤りとする
+    if isinstance(value, bool) and bool not in types:
+        return False
+    return isinstance(value, types)
+
+
+def _parse_settings(raw: object) -> Settings:
+    if not isinstance(raw, dict):
+        raise ValueError("[settings] はテーブルで指定してください")
+    settings: Settings = dict(DEFAULT_SETTINGS)  # type: ignore[assignment]
+    for key, value in raw.items():
+        if key not in DEFAULT_SETTINGS:
+            raise ValueError(f"不明な設定項目です: {key}")
+        if key in _PATH_SETTINGS:
+            valid = value is None or isinstance(value, str)
+        else:
+            valid = _is_type(value, (type(DEFAULT_SETTINGS[key]),))
+        if not valid:
+            raise ValueError(f"設定項目の型が正しくありません: {key}")
+        settings[key] = value
+    return settings
+
+
+def _parse_feed(raw: object, index: int) -> FeedSpec:
+    if not isinstance(raw, dict):
+        raise ValueError(f"{index + 1}番目のフィードはテーブルで指定してください")
+    name = raw.get("name", f"{index + 1}番目のフィード")
+    missing = [key for key in _FEED_REQUIRED if not isinstance(raw.get(key), str)]
+    if missing:
+        raise ValueError(f"フィードの必須項目がありません: {name}: {', '.join(missing)}")
+    for key, value in raw.items():
+        if key in _FEED_REQUIRED:
+            continue
+        types = _FEED_OPTIONAL.get(key)
+        if types is None:
+            raise ValueError(f"不明なフィードの項目です: {name}: {key}")
+        if not _is_type(value, types):
+            raise ValueError(f"フィードの項目の型が正しくありません: {name}: {key}")
+    _check_outputs(name, raw.get("outputs", {}))
+    return dict(raw)  # type: ignore[return-value]
+
+
+def _check_outputs(name: str, outputs: Dict[str, object]) -> None:
+    for fmt, path in outputs.items():
+        if fmt not in _OUTPUT_FORMATS:
+            raise ValueError(
+                f"未対応の出力形式です: {name}: {fmt}"
+                f"（{' / '.join(_OUTPUT_FORMATS)} を指定できます）"
+            )
+        if not isinstance(path, str):
+            raise ValueError(f"出力先はパスの文字列で指定してください: {name}: {fmt}")
+
+
+def load_config(path: str = DEFAULT_CONFIG_PATH) -> FeedConfig:
+    """TOML（拡張子が .yaml / .yml ならYAML）のフィード設定を読み込みます。
+
+    パスの設定は実行時のカレントディレクトリからの相対パスです。
+    """
+    if not os.path.exists(path):
+        raise ValueError(f"設定ファイルが見つかりませんでした: {path}")
+    data = _load_mapping(path)
+
+    feeds_raw = data.get("feeds", [])
+    sites_raw = data.get("sites", [])
+    if not isinstance(feeds_raw, list) or not isinstance(sites_raw, list):
+        raise ValueError("[[feeds]] と [[sites]] はテーブルの配列で指定してください")
+    unknown = sorted(set(data) - {"settings", "feeds", "sites"})
+    if unknown:
+        raise ValueError(f"不明な設定項目です: {', '.join(unknown)}")
+
+    feeds = [_parse_feed(raw, index) for index, raw in enumerate(feeds_raw)]
+    names = [spec["name"] for spec in feeds]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"フィード名が重複しています: {', '.join(duplicates)}")
+    if not all(isinstance(site, dict) for site in sites_raw):
+        raise ValueError("[[sites]] はテーブルの配列で指定してください")
+
+    return {
+        "settings": _parse_settings(data.get("settings", {})),
+        "feeds": feeds,
+        "sites": list(sites_raw),
+    }
+
+
+def select_feeds(feeds: Sequence[FeedSpec], only: Sequence[str] = ()) -> List[FeedSpec]:
+    """生成するフィードを選びます。
+
+    `only` を省略した場合は `enabled = false` 以外のすべて、指定した場合は
+    （無効にしたフィードも含めて）その名前のフィードだけを返します。
+    """
+    if not only:
+        return [spec for spec in feeds if spec.get("enabled", True)]
+    by_name = {spec["name"]: spec for spec in feeds}
+    unknown = [name for name in only if name not in by_name]
+    if unknown:
+        raise ValueError(f"設定ファイルに無いフィードです: {', '.join(unknown)}")
+    return [spec for spec in feeds if spec["name"] in only]
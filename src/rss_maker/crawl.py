@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Collection, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .generate_rss import ArticleLike, PageData
+
+# 1回にまとめて先読みする一覧ページ数の既定値
+DEFAULT_PARALLEL_PAGES = 4
+
+
+def following_page_urls(url: str, page_param: str, count: int) -> List[str]:
+    """ページ番号のクエリパラメータを1ずつ増やした後続ページのURLを返します。
+
+    ページ番号が読み取れない場合は空リストを返します。
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    numbers = [value for key, value in query if key == page_param]
+    if len(numbers) != 1 or not numbers[0].isdigit():
+        return []
+    current = int(numbers[0])
+    urls: List[str] = []
+    for offset in range(1, count + 1):
+        replaced = [
+            (key, str(current + offset) if key == page_param else value)
+            for key, value in query
+        ]
+        urls.append(urlunsplit(parts._replace(query=urlencode(replaced))))
+    return urls
+
+
+class _Collector:
+    """ページをまたいで記事を重複なく集め、打ち切り条件を判定します。"""
+
+    def __init__(self, max_items: Optional[int], known_urls: Collection[str]) -> None:
+        self.articles: List[ArticleLike] = []
+        self._seen: Set[str] = set()
+        self._max_items = max_items
+        self._known = known_urls
+
+    def add_page(self, page: PageData) -> bool:
+        """ページの記事を追加し、続きのページを読むべきなら True を返します。"""
+        for article in page["articles"]:
+            # 公開済みの記事に到達したら、それ以降は既に配信済み
+            if article["url"] in self._known:
+                return False
+            if article["url"] in self._seen:
+                continue
+            self._seen.add(article["url"])
+            self.articles.append(article)
+            if self._max_items is not None and len(self.articles) >= self._max_items:
+                return False
+        return True
+
+
+def crawl_pages(
+    first_page: PageData,
+    fetch_page: Callable[[str], PageData],
+    *,
+    max_pages: int,
+    max_items: Optional[int] = None,
+    known_urls: Collection[str] = (),
+    page_param: Optional[str] = None,
+    parallel: int = DEFAULT_PARALLEL_PAGES,
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+) -> List[ArticleLike]:
+    """ページ送りのリンクをたどり、最大 `max_pages` ページ分の記事を集めます。
+
+    `known_urls`（公開済みフィードの記事）に含まれる記事に到達した時点、または
+    `max_items` 件集めた時点で打ち切るため、定常状態では1ページ目しか読みません。
+    `page_param` を指定すると後続ページのURLを予測し、`parallel` ページずつ並列に
+    取得します。予測が実際の「次へ」リンクと食い違った場合は、以降の先読み結果を捨てて
+    リンクに従います。
+    2ページ目以降の取得・解析に失敗した場合は、そのページで打ち切って集めた記事を返し、
+    `on_error` にURLと例外を渡します。
+    """
+    collector = _Collector(max_items, known_urls)
+    if not collector.add_page(first_page):
+        return collector.articles
+
+    next_url = first_page.get("next_url")
+    pages = 1
+    with ThreadPoolExecutor(max_workers=max(parallel, 1)) as pool:
+        while next_url and pages < max_pages:
+            batch_size = min(parallel, max_pages - pages)
+            batch = [next_url]
+            if page_param:
+                batch += following_page_urls(next_url, page_param, batch_size - 1)
+            futures: List[Future[PageData]] = [
+                pool.submit(fetch_page, url) for url in batch
+            ]
+
+            for position, future in enumerate(futures):
+                try:
+                    page = future.result()
+                except Exception as e:
+                    # 古いページの一時的な失敗で、取得済みの新しい記事まで捨てない
+                    if on_error is not None:
+                        on_error(batch[position], e)
+                    next_url = None
+                    break
+                pages += 1
+                if not collector.add_page(page):
+                    next_url = None
+                    break
+                next_url = page.get("next_url")
+                # 先読みしたURLが「次へ」リンクと食い違ったら、以降の先読み結果は捨てる
+                if position + 1 < len(batch) and next_url != batch[position + 1]:
+                    break
+            for future in futures:
+                future.cancel()
+    return collector.articles
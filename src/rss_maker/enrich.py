@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection, Dict, List, Optional
+
+from . import generate_rss
+from .atomic import atomic_write
+from .fetch import Fetcher, HostLimiter
+from .generate_rss import ArticleDetail, ArticleLike, Enclosure
+from .metrics import FeedMetrics
+from .model import FeedItem
+from .sites import SiteAdapter
+
+# 詳細ページ・音声ファイルへの同時リクエスト数の既定値
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_PER_HOST = 2
+
+
+class DetailCache:
+    """記事URLごとに、詳細ページから補った情報をディスクへ保存します。
+
+    詳細ページと音声ファイルは公開後ほとんど変わらないため、一度取得した記事は
+    以降のビルドでリクエストしません。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, ArticleDetail] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                self._entries = loaded  # type: ignore[assignment]
+
+    def get(self, url: str) -> Optional[ArticleDetail]:
+        with self._lock:
+            return self._entries.get(url)
+
+    def set(self, url: str, detail: ArticleDetail) -> None:
+        with self._lock:
+            self._entries[url] = detail
+
+    def save(self) -> None:
+        """キャッシュをディスクへ書き出します。"""
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False, indent=2, sort_keys=True)
+        with atomic_write(self.path) as f:
+            f.write(data)
+
+
+def probe_media(fetcher: Fetcher, enclosure: Enclosure) -> Enclosure:
+    """HEADリクエストで音声ファイルの実際の長さとMIME typeを取得します。
+
+    取得できなかった項目は推定値のまま残します。
+    """
+    response = fetcher.head(enclosure["url"])
+    try:
+        if response.status_code >= 400:
+            return enclosure
+        length = response.headers.get("Content-Length")
+        mime_type = response.headers.get("Content-Type")
+    finally:
+        response.close()
+
+    probed: Enclosure = dict(enclosure)  # type: ignore[assignment]
+    if length and length.isdigit():
+        probed["length"] = length
+    if mime_type:
+        probed["type"] = mime_type.split(";")[0].strip()
+    return probed
+
+
+def fetch_detail(
+    adapter: SiteAdapter, url: str, fetcher: Fetcher, limiter: HostLimiter
+) -> ArticleDetail:
+    """記事の詳細ページを取得して抽出し、音声ファイルがあればHEADで長さを確認します。"""
+    with limiter.limit(url):
+        html = generate_rss.get_html(url, fetcher=fetcher)
+    detail = generate_rss.extract_detail(adapter, html, url)
+    if "enclosure" in detail:
+        with limiter.limit(detail["enclosure"]["url"]):
+            detail["enclosure"] = probe_media(fetcher, detail["enclosure"])
+    return detail
+
+
+def enrich_articles(
+    adapter: SiteAdapter,
+    articles: List[ArticleLike],
+    fetcher: Fetcher,
+    *,
+    cache: Optional[DetailCache] = None,
+    limiter: Optional[HostLimiter] = None,
+    skip_urls: Collection[str] = (),
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    metrics: Optional[FeedMetrics] = None,
+) -> List[ArticleLike]:
+    """各記事の詳細ページを並行して読み、説明・公開日時・音声ファイルを補います。
+
+    同時リクエスト数は全体で `max_workers`、ホストごとに `limiter` の上限までです。
+    `cache` にある記事と `skip_urls`（公開済みの記事など）はリクエストしません。
+    取得・抽出に失敗した記事はそのまま返し、`cache` にも入れないため次回のビルドで再試行します。
+    `metrics` を渡すと、キャッシュヒット数・取得数・失敗数を記録します。
+    """
+    host_limiter = limiter or HostLimiter(DEFAULT_MAX_PER_HOST)
+
+    def enrich(article: ArticleLike) -> ArticleLike:
+        url = article["url"]
+        if url in skip_urls:
+            return article
+        detail = cache.get(url) if cache is not None else None
+        if detail is None:
+            try:
+                detail = fetch_detail(adapter, url, fetcher, host_limiter)
+            except Exception:
+                # 1件の詳細ページが壊れていても、フィード全体は失敗させない
+                if metrics is not None:
+                    metrics.increment("detail_failures")
+                return article
+            if metrics is not None:
+                metrics.increment("detail_fetches")
+            if cache is not None:
+                cache.set(url, detail)
+        elif metrics is not None:
+            metrics.increment("detail_cache_hits")
+        # 一覧ページから取れた値を優先し、足りない項目だけを補う
+        merged: Dict[str, object] = dict(detail)
+        merged.update(article)
+        return FeedItem.from_article(merged)
+
+    if not articles:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(articles)))) as pool:
+        return list(pool.map(enrich, articles))
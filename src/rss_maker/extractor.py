@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import copy
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin
+
+import soupsieve
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+from soupsieve.css_match import CSSMatch
+
+from .sites import DEFAULT_DETAIL_RULES, SiteAdapter
+
+# コンパイル済みのCSSセレクタと、値を取り出す属性名
+AttrPattern = Tuple[soupsieve.SoupSieve, str]
+# 記事要素と、記事内のセレクタごとに最初に一致した要素
+ItemFields = Tuple[Tag, List[Optional[Tag]]]
+
+
+def attr_to_str(val: object) -> Optional[str]:
+    """BeautifulSoupの属性値（str or list[str]など）を安全にstrへ正規化する。"""
+    if isinstance(val, list):
+        return "".join(str(x) for x in val)
+    if isinstance(val, str):
+        return val
+    return None
+
+
+def _compile(selectors: Sequence[str]) -> List[soupsieve.SoupSieve]:
+    return [soupsieve.compile(selector) for selector in selectors]
+
+
+def _compile_attrs(rules: Sequence[Dict[str, str]]) -> List[AttrPattern]:
+    return [(soupsieve.compile(rule["selector"]), rule["attr"]) for rule in rules]
+
+
+def select_value(
+    scope: Tag, patterns: Sequence[soupsieve.SoupSieve]
+) -> Optional[str]:
+    """最初に見つかった要素の content / datetime 属性（無ければテキスト）を返します。"""
+    for pattern in patterns:
+        tag = pattern.select_one(scope)
+        if isinstance(tag, Tag):
+            for attr in ("content", "datetime"):
+                if tag.has_attr(attr):
+                    return attr_to_str(tag.get(attr))
+            return tag.get_text()
+    return None
+
+
+def _tag_names(pattern: soupsieve.SoupSieve) -> Optional[frozenset[str]]:
+    """セレクタが一致しうる要素名を返します。どの要素にも一致しうる場合は None です。"""
+    names = set()
+    for selector in pattern.selectors:
+        if selector.tag is None or selector.tag.name == "*":
+            return None
+        names.add(selector.tag.name.lower())
+    return frozenset(names)
+
+
+def _matcher(pattern: soupsieve.SoupSieve, scope: Tag) -> Callable[[Tag], bool]:
+    # SoupSieve.match は呼び出しごとに文書のルートまでたどり直すため、走査全体で1つの照合器を使う
+    match = CSSMatch(pattern.selectors, scope, pattern.namespaces, pattern.flags).match
+    names = _tag_names(pattern)
+    if names is None:
+        return match
+    # 要素名が違えば一致しないため、セレクタ全体の照合を省く
+    return lambda node: node.name.lower() in names and match(node)
+
+
+def _scan_items(
+    scope: Tag, item: soupsieve.SoupSieve, fields: Sequence[soupsieve.SoupSieve]
+) -> List[ItemFields]:
+    """`scope` を1回だけ走査し、記事要素と、各セレクタに最初に一致したその子孫を返します。
+
+    記事要素ごとに `select_one` するのと同じ結果になります（入れ子の記事にも振り分けます）。
+    記事の外の要素にはフィールドのセレクタを照合せず、一致した項目はその記事では照合をやめます。
+    """
+    is_item = _matcher(item, scope)
+    field_matchers = [_matcher(pattern, scope) for pattern in fields]
+    items: List[ItemFields] = []
+    # 走査中の要素と、それを含む記事（入れ子の場合は複数）
+    stack: List[Tuple[Tag, Tuple[ItemFields, ...]]] = [
+        (child, ()) for child in reversed(scope.contents) if isinstance(child, Tag)
+    ]
+    while stack:
+        node, active = stack.pop()
+        for index, match in enumerate(field_matchers):
+            pending = [found for _, found in active if found[index] is None]
+            if pending and match(node):
+                for found in pending:
+                    found[index] = node
+        if is_item(node):
+            entry: ItemFields = (node, [None] * len(fields))
+            items.append(entry)
+            active = (*active, entry)
+        stack.extend(
+            (child, active) for child in reversed(node.contents) if isinstance(child, Tag)
+        )
+    return items
+
+
+def _select_items(
+    scope: Tag, item: soupsieve.SoupSieve, fields: Sequence[soupsieve.SoupSieve]
+) -> List[ItemFields]:
+    # :scope を含むセレクタは起点の要素で結果が変わるため、記事ごとに照合する
+    return [
+        (tag, [pattern.select_one(tag) for pattern in fields])
+        for tag in item.select(scope)
+    ]
+
+
+class SiteExtractor:
+    """サイトアダプタのセレクタを一度だけコンパイルして、ページから情報を取り出します。
+
+    記事要素とそのリンク・タイトル・サムネイルは、記事コンテナを1回だけ走査して集めます。
+    記事ごとにセレクタを解析・照合し直さないため、記事数が多いページほど速くなります。
+    """
+
+    def __init__(self, adapter: SiteAdapter) -> None:
+        self.adapter = adapter
+        self.channel_title = _compile(adapter["channel_title"])
+        self.channel_description = _compile(adapter["channel_description"])
+        self.container = (
+            soupsieve.compile(adapter["container"]) if "container" in adapter else None
+        )
+        self.item = soupsieve.compile(adapter["item"])
+        self.link = soupsieve.compile(adapter["link"]) if "link" in adapter else None
+        self.titles = _compile(adapter["title"])
+        self.title_remove = _compile(adapter.get("title_remove", []))
+        self.thumbnails = _compile_attrs(adapter["thumbnail"])  # type: ignore[arg-type]
+        self.next_page = (
+            soupsieve.compile(adapter["next_page"]) if "next_page" in adapter else None
+        )
+        rules = adapter.get("detail", DEFAULT_DETAIL_RULES)
+        self.detail_description = _compile(rules.get("description", []))
+        self.detail_pubdate = _compile(rules.get("pubdate", []))
+        self.detail_enclosure = _compile_attrs(rules.get("enclosure", []))  # type: ignore[arg-type]
+
+        # 記事内で照合するセレクタ（リンク・タイトル・サムネイルの順）
+        self._fields = [
+            *([self.link] if self.link is not None else []),
+            *self.titles,
+            *(pattern for pattern, _ in self.thumbnails),
+        ]
+        self._collect = (
+            _select_items
+            if any(":scope" in pattern.pattern for pattern in self._fields)
+            else _scan_items
+        )
+
+    def channel_info(self, soup: BeautifulSoup) -> Tuple[str, str]:
+        """チャンネルのタイトルと説明（見つからなければ空文字列）を返します。"""
+        title = (select_value(soup, self.channel_title) or "").strip()
+        description = (select_value(soup, self.channel_description) or "").strip()
+        return title, description
+
+    def next_page_url(self, soup: BeautifulSoup, base_url: str) -> Optional[str]:
+        if self.next_page is None:
+            return None
+        link_tag = self.next_page.select_one(soup)
+        if not isinstance(link_tag, Tag):
+            return None
+        href = attr_to_str(link_tag.get("href"))
+        return urljoin(self.adapter.get("base_url") or base_url, href) if href else None
+
+    def _item_title(self, item: Tag, title_tag: Optional[Tag]) -> str:
+        title = ""
+        if title_tag is not None:
+            # NEW等のラベルを除去する（ツリーを破壊的に変更する）
+            for remove in self.title_remove:
+                for label in remove.select(title_tag):
+                    label.decompose()
+            title = title_tag.get_text(strip=True)
+        if not title and self.adapter.get("title_fallback_to_item_text", False):
+            # フォールバック：記事要素全体のテキスト
+            title = item.get_text(strip=True)
+        return title
+
+    def articles(
+        self, soup: BeautifulSoup, base_url: str = ""
+    ) -> List[Tuple[str, str, Optional[str]]]:
+        """記事の（タイトル, 絶対URL, サムネイルの絶対URL）を文書順に返します。
+
+        同じURLの記事は最初の1件だけを残し、`required` の項目が無い記事は捨てます。
+        """
+        adapter = self.adapter
+        base = adapter.get("base_url") or base_url
+        scope: Tag = soup
+        if self.container is not None:
+            container = self.container.select_one(soup)
+            if not isinstance(container, Tag):
+                return []
+            scope = container
+
+        link_slots = 1 if self.link is not None else 0
+        title_slots = link_slots + len(self.titles)
+        required = adapter.get("required", [])
+        results: List[Tuple[str, str, Optional[str]]] = []
+        seen: set[str] = set()
+        for item, found in self._collect(scope, self.item, self._fields):
+            link_tag = found[0] if link_slots else item
+            if link_tag is None:
+                continue
+            href = attr_to_str(link_tag.get("href"))
+            if not href:
+                continue
+            url = urljoin(base, href)
+            if url in seen:
+                continue
+            seen.add(url)
+
+            title_tag = next(
+                (tag for tag in found[link_slots:title_slots] if tag is not None), None
+            )
+            title = self._item_title(item, title_tag)
+            thumb_src = next(
+                (
+                    attr_to_str(tag.get(attr))
+                    for tag, (_, attr) in zip(found[title_slots:], self.thumbnails)
+                    # タイトルのラベルとして取り除いた要素は使わない
+                    if tag is not None and not tag.decomposed
+                ),
+                None,
+            )
+            if ("title" in required and not title) or (
+                "thumbnail" in required and not thumb_src
+            ):
+                continue
+            results.append((title, url, urljoin(base, thumb_src) if thumb_src else None))
+        return results
+
+    def detail(
+        self, soup: BeautifulSoup, url: str
+    ) -> Tuple[str, Optional[str], Optional[str]]:
+        """詳細ページの（説明, 公開日時の文字列, 音声ファイルの絶対URL）を返します。"""
+        description = (select_value(soup, self.detail_description) or "").strip()
+        raw_date = select_value(soup, self.detail_pubdate)
+        for pattern, attr in self.detail_enclosure:
+            media_tag = pattern.select_one(soup)
+            if not isinstance(media_tag, Tag):
+                continue
+            src = attr_to_str(media_tag.get(attr))
+            if src:
+                return description, raw_date, urljoin(url, src)
+        return description, raw_date, None
+
+
+_EXTRACTORS: Dict[str, Tuple[SiteAdapter, SiteExtractor]] = {}
+_EXTRACTORS_LOCK = threading.Lock()
+
+
+def get_extractor(adapter: SiteAdapter) -> SiteExtractor:
+    """サイトアダプタの抽出器を返します。同じ内容のアダプタには同じ抽出器を使い回します。
+
+    解析用のプロセスにはアダプタの複製が渡されるため、名前と内容で照合します。
+    """
+    with _EXTRACTORS_LOCK:
+        cached = _EXTRACTORS.get(adapter["name"])
+        if cached is not None and cached[0] == adapter:
+            return cached[1]
+    extractor = SiteExtractor(adapter)
+    with _EXTRACTORS_LOCK:
+        # 登録後にアダプタを書き換えられても古い抽出器を使わないよう、複製と照合する
+        _EXTRACTORS[adapter["name"]] = (copy.deepcopy(adapter), extractor)
+    return extractor
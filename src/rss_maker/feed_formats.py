@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import datetime
+import json
+from contextlib import ExitStack
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, TextIO, TypedDict
+
+from feedgenerator.django.utils.encoding import (  # type: ignore[reportMissingTypeStubs]
+    iri_to_uri,
+)
+
+from .atomic import atomic_write
+from .manifest import FeedManifest, content_hash
+from .model import FeedChannel, FeedItem
+from .rss_writer import latest_pubdate, rfc2822_date, write_rss, xml_element
+
+# 対象サイトはいずれも日本語の番組
+FEED_LANGUAGE = "ja"
+JSON_FEED_VERSION = "https://jsonfeed.org/version/1.1"
+_ITUNES_NAMESPACE = "http://www.itunes.com/dtds/podcast-1.0.dtd"
+_INDENT = "  "
+
+FeedWriter = Callable[..., None]
+
+
+class FeedFormat(TypedDict):
+    # write(channel_info, articles, out) で書き出す関数
+    write: FeedWriter
+    # 配信時の Content-Type
+    content_type: str
+
+
+def _build_date(
+    items: Sequence[FeedItem], last_build_date: Optional[datetime.datetime]
+) -> datetime.datetime:
+    return (
+        last_build_date
+        or latest_pubdate(items)
+        or datetime.datetime.now(tz=datetime.timezone.utc)
+    )
+
+
+def _audio_enclosure(item: FeedItem) -> List[tuple[str, str]]:
+    # ポッドキャストでは、サムネイルは enclosure ではなく itunes:image で出力する
+    if item.enclosure is None:
+        return []
+    return [
+        ("url", iri_to_uri(item.enclosure.url)),
+        ("length", item.enclosure.length),
+        ("type", item.enclosure.type),
+    ]
+
+
+def write_podcast_rss(
+    channel_info: Mapping[str, object],
+    articles: Sequence[Mapping[str, object]],
+    out: TextIO,
+    *,
+    last_build_date: Optional[datetime.datetime] = None,
+) -> None:
+    """iTunesの名前空間付きのポッドキャスト用RSS 2.0を書き出します。
+
+    音声ファイル（詳細ページから補った enclosure）がある記事だけ enclosure を出力し、
+    サムネイルは itunes:image にします。番組の画像は最新の記事のサムネイルを使います。
+    """
+    channel = FeedChannel.from_info(channel_info)
+    items = [FeedItem.from_article(article) for article in articles]
+    out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    out.write(f'<rss version="2.0" xmlns:itunes="{_ITUNES_NAMESPACE}">\n')
+    out.write(f"{_INDENT}<channel>\n")
+    out.write(xml_element(2, "title", channel.title))
+    out.write(xml_element(2, "link", iri_to_uri(channel.link)))
+    out.write(xml_element(2, "description", channel.description))
+    out.write(xml_element(2, "language", FEED_LANGUAGE))
+    out.write(
+        xml_element(2, "lastBuildDate", rfc2822_date(_build_date(items, last_build_date)))
+    )
+    out.write(xml_element(2, "itunes:author", channel.title))
+    out.write(xml_element(2, "itunes:summary", channel.description))
+    out.write(xml_element(2, "itunes:explicit", "false"))
+    image = next((item.thumbnail for item in items if item.thumbnail), None)
+    if image:
+        out.write(xml_element(2, "itunes:image", attrs=[("href", iri_to_uri(image))]))
+
+    for item in items:
+        parts = [
+            f"{_INDENT * 2}<item>\n",
+            xml_element(3, "title", item.title),
+            xml_element(3, "link", iri_to_uri(item.url)),
+            xml_element(3, "guid", iri_to_uri(item.url), [("isPermaLink", "true")]),
+            xml_element(3, "description", item.description or ""),
+        ]
+        if item.published is not None:
+            parts.append(xml_element(3, "pubDate", rfc2822_date(item.published)))
+        enclosure = _audio_enclosure(item)
+        if enclosure:
+            parts.append(xml_element(3, "enclosure", attrs=enclosure))
+        if item.thumbnail:
+            parts.append(
+                xml_element(3, "itunes:image", attrs=[("href", iri_to_uri(item.thumbnail))])
+            )
+        parts.append(f"{_INDENT * 2}</item>\n")
+        out.write("".join(parts))
+
+    out.write(f"{_INDENT}</channel>\n")
+    out.write("</rss>\n")
+
+
+def _atom_links(item: FeedItem) -> List[str]:
+    links = [xml_element(2, "link", attrs=[("href", iri_to_uri(item.url))])]
+    media = item.enclosure
+    if media is not None:
+        attrs = [
+            ("rel", "enclosure"),
+            ("href", iri_to_uri(media.url)),
+            ("type", media.type),
+        ]
+        if media.length != "0":
+            attrs.append(("length", media.length))
+        links.append(xml_element(2, "link", attrs=attrs))
+    return links
+
+
+def write_atom(
+    channel_info: Mapping[str, object],
+    articles: Sequence[Mapping[str, object]],
+    out: TextIO,
+    *,
+    last_build_date: Optional[datetime.datetime] = None,
+) -> None:
+    """Atom 1.0 のフィードを書き出します。
+
+    記事の id と公開日時の無い記事の updated には、記事のURLとフィードの更新日時を使います。
+    """
+    channel = FeedChannel.from_info(channel_info)
+    items = [FeedItem.from_article(article) for article in articles]
+    updated = _build_date(items, last_build_date).isoformat()
+    out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    out.write(f'<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="{FEED_LANGUAGE}">\n')
+    out.write(xml_element(1, "title", channel.title))
+    out.write(xml_element(1, "subtitle", channel.description))
+    out.write(xml_element(1, "link", attrs=[("href", iri_to_uri(channel.link))]))
+    out.write(xml_element(1, "id", iri_to_uri(channel.link)))
+    out.write(xml_element(1, "updated", updated))
+    # Atom では author が必須のため、番組名を使う
+    out.write(f"{_INDENT}<author>\n")
+    out.write(xml_element(2, "name", channel.title))
+    out.write(f"{_INDENT}</author>\n")
+
+    for item in items:
+        published = item.published
+        parts = [
+            f"{_INDENT}<entry>\n",
+            xml_element(2, "title", item.title),
+            *_atom_links(item),
+            xml_element(2, "id", iri_to_uri(item.url)),
+            xml_element(2, "updated", published.isoformat() if published else updated),
+        ]
+        if published is not None:
+            parts.append(xml_element(2, "published", published.isoformat()))
+        if item.description:
+            parts.append(xml_element(2, "summary", item.description))
+        parts.append(f"{_INDENT}</entry>\n")
+        out.write("".join(parts))
+
+    out.write("</feed>\n")
+
+
+def _json_item(item: FeedItem) -> Dict[str, object]:
+    entry: Dict[str, object] = {
+        "id": item.url,
+        "url": item.url,
+        "title": item.title,
+        "content_text": item.description or "",
+    }
+    if item.pubdate:
+        entry["date_published"] = item.pubdate
+    if item.thumbnail:
+        entry["image"] = item.thumbnail
+    if item.enclosure is not None:
+        attachment: Dict[str, object] = {
+            "url": item.enclosure.url,
+            "mime_type": item.enclosure.type,
+        }
+        if item.enclosure.length.isdigit() and int(item.enclosure.length) > 0:
+            attachment["size_in_bytes"] = int(item.enclosure.length)
+        entry["attachments"] = [attachment]
+    return entry
+
+
+def write_json_feed(
+    channel_info: Mapping[str, object],
+    articles: Sequence[Mapping[str, object]],
+    out: TextIO,
+    *,
+    last_build_date: Optional[datetime.datetime] = None,
+) -> None:
+    """JSON Feed 1.1 を書き出します（JSON Feed には更新日時の項目がありません）。"""
+    channel = FeedChannel.from_info(channel_info)
+    feed = {
+        "version": JSON_FEED_VERSION,
+        "title": channel.title,
+        "home_page_url": channel.link,
+        "description": channel.description,
+        "language": FEED_LANGUAGE,
+        "items": [_json_item(FeedItem.from_article(article)) for article in articles],
+    }
+    json.dump(feed, out, ensure_ascii=False, indent=2)
+    out.write("\n")
+
+
+FEED_FORMATS: Dict[str, FeedFormat] = {
+    "rss": {"write": write_rss, "content_type": "application/rss+xml; charset=utf-8"},
+    "podcast": {
+        "write": write_podcast_rss,
+        "content_type": "application/rss+xml; charset=utf-8",
+    },
+    "atom": {"write": write_atom, "content_type": "application/atom+xml; charset=utf-8"},
+    "json": {
+        "write": write_json_feed,
+        "content_type": "application/feed+json; charset=utf-8",
+    },
+}
+
+
+def write_feed_files(
+    outputs: Mapping[str, str],
+    channel_info: Mapping[str, object],
+    articles: Sequence[Mapping[str, object]],
+    manifest: Optional[FeedManifest] = None,
+    *,
+    force: bool = False,
+) -> List[str]:
+    """1回の抽出結果を、形式ごとの出力先（{"rss": path, "atom": path, ...}）へまとめて書き出します。
+
+    記事の検証とハッシュ値の計算は全形式で1回だけ行います。各形式は一時ファイルへ
+    書き出し、すべて書き終えてから置き換えるため、途中で失敗した場合はどれも更新しません。
+    `manifest` を渡した場合は内容が前回と同じ出力先を書き込まず、書き込んだパスを返します。
+    `force=True` の場合は内容が同じでもすべて書き出します。
+    """
+    unknown = [name for name in outputs if name not in FEED_FORMATS]
+    if unknown:
+        raise ValueError(f"未対応の出力形式です: {', '.join(unknown)}")
+    channel = FeedChannel.from_info(channel_info)
+    items = [FeedItem.from_article(article) for article in articles]
+    digest = content_hash(channel, items)
+    pending = {
+        name: path
+        for name, path in outputs.items()
+        if force or manifest is None or not manifest.is_current(path, digest)
+    }
+    # 同じ更新日時にそろえる
+    build_date = _build_date(items, None)
+    with ExitStack() as stack:
+        for name, path in pending.items():
+            out = stack.enter_context(atomic_write(path))
+            FEED_FORMATS[name]["write"](channel, items, out, last_build_date=build_date)
+    if manifest is not None:
+        for path in pending.values():
+            manifest.set(path, digest)
+    return list(pending.values())
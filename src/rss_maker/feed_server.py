@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import email.utils
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Set, TypedDict
+from urllib.parse import urlsplit
+
+from .build import FeedResult, FeedSpec, build_feeds, feed_outputs
+from .feed_formats import FEED_FORMATS
+
+# フィードの `interval` が無い場合に、生成し直すまでの秒数
+DEFAULT_TTL = 15 * 60
+DEFAULT_MAX_ENTRIES = 32
+# まだ生成されていないフィードへのリクエストに返す Retry-After（秒）
+_RETRY_AFTER = 30
+
+BuildFunction = Callable[[Sequence[FeedSpec]], List[FeedResult]]
+
+
+class FeedRoute(TypedDict):
+    spec: FeedSpec
+    # 配信するファイルと、その形式の Content-Type
+    path: str
+    content_type: str
+
+
+class CachedFeed(TypedDict):
+    body: bytes
+    # 事前に圧縮した本文（リクエストごとには圧縮しない）
+    gzip_body: bytes
+    etag: str
+    gzip_etag: str
+    last_modified: str
+    # ファイルの更新時刻（Unix時間）
+    mtime: float
+
+
+def load_feed(path: str) -> CachedFeed:
+    """生成済みのRSSファイルを読み込み、圧縮した本文と強いETagを用意します。"""
+    with open(path, "rb") as f:
+        body = f.read()
+    mtime = os.path.getmtime(path)
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return {
+        "body": body,
+        # mtime=0 で圧縮結果を内容だけで決まるようにする
+        "gzip_body": gzip.compress(body, mtime=0),
+        # 強いETagは表現ごとに異なる必要があるため、圧縮版には接尾辞を付ける
+        "etag": f'"{digest}"',
+        "gzip_etag": f'"{digest}-gzip"',
+        "last_modified": email.utils.formatdate(mtime, usegmt=True),
+        "mtime": mtime,
+    }
+
+
+class FeedCache:
+    """フィードの本文を最大 `max_entries` 件までメモリに保持するLRUキャッシュ。"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        if max_entries < 1:
+            raise ValueError(f"max_entries は1以上を指定してください: {max_entries}")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedFeed] = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedFeed]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedFeed) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _accepts_gzip(header: Optional[str]) -> bool:
+    for part in (header or "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        return True
+    return False
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match は弱い比較で判定する
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FeedServer._HTTPServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: object) -> None:
+        if self.server.owner.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        self.server.owner._respond(self, send_body=True)
+
+    def do_HEAD(self) -> None:
+        self.server.owner._respond(self, send_body=False)
+
+
+class FeedServer:
+    """生成済みのRSSをメモリ上のLRUキャッシュから配信するHTTPサーバー。
+
+    各フィードは出力ファイル名のパス（例: `/jfn_pods_voice_rss.xml`）で配信します。
+    `outputs` で指定した Atom などの形式も、それぞれの出力ファイル名で配信します。
+    強いETag・Last-Modified による304、gzipで事前圧縮した本文の配信に対応します。
+    フィードの `interval`（無ければ `ttl`）秒を過ぎると、古い内容を返しつつ
+    バックグラウンドで `build` を呼んで生成し直します（stale-while-revalidate）。
+    フィードリーダーのリクエストが直接サイトの取得を引き起こすことはありません。
+    """
+
+    class _HTTPServer(ThreadingHTTPServer):
+        daemon_threads = True
+        owner: FeedServer
+
+    def __init__(
+        self,
+        feeds: Sequence[FeedSpec],
+        *,
+        build: BuildFunction = build_feeds,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+        verbose: bool = False,
+    ) -> None:
+        self.routes: Dict[str, FeedRoute] = {}
+        for spec in feeds:
+            for fmt, path in feed_outputs(spec).items():
+                route = "/" + os.path.basename(path)
+                if route in self.routes:
+                    raise ValueError(
+                        f"配信するパスが重複しています: {route}"
+                        f"（{self.routes[route]['path']} と {path}）"
+                    )
+                self.routes[route] = {
+                    "spec": spec,
+                    "path": path,
+                    "content_type": FEED_FORMATS[fmt]["content_type"],
+                }
+        self.build = build
+        self.ttl = ttl
+        self.cache = FeedCache(max_entries)
+        self.verbose = verbose
+        self._clock = clock
+        self._lock = threading.Lock()
+        # 最後に生成（または生成を試行）した時刻。キャッシュから追い出されても保持する
+        self._checked_at: Dict[str, float] = {}
+        self._pending: Set[str] = set()
+        self._futures: List[Future[None]] = []
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="revalidate")
+        self._httpd = self._HTTPServer((host, port), _Handler)
+        self._httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def _ttl(self, spec: FeedSpec) -> float:
+        return spec.get("interval", self.ttl)
+
+    def _entry(self, spec: FeedSpec, path: str) -> Optional[CachedFeed]:
+        entry = self.cache.get(path)
+        if entry is None and os.path.exists(path):
+            entry = load_feed(path)
+            self.cache.put(path, entry)
+            with self._lock:
+                self._checked_at.setdefault(spec["name"], entry["mtime"])
+        return entry
+
+    def _age(self, spec: FeedSpec, now: float) -> float:
+        with self._lock:
+            checked_at = self._checked_at.get(spec["name"])
+        return float("inf") if checked_at is None else now - checked_at
+
+    def revalidate(self, spec: FeedSpec) -> None:
+        """バックグラウンドでフィードを生成し直します。生成中のフィードは重ねて生成しません。"""
+        with self._lock:
+            if spec["name"] in self._pending:
+                return
+            self._pending.add(spec["name"])
+            self._futures = [future for future in self._futures if not future.done()]
+            self._futures.append(self._executor.submit(self._regenerate, spec))
+
+    def _regenerate(self, spec: FeedSpec) -> None:
+        try:
+            self.build([spec])
+            # 全形式を同時に書き出すため、まとめて読み込み直す
+            for path in feed_outputs(spec).values():
+                if os.path.exists(path):
+                    self.cache.put(path, load_feed(path))
+        finally:
+            # 失敗・未更新の場合も次の期限まで生成し直さない
+            with self._lock:
+                self._checked_at[spec["name"]] = self._clock()
+                self._pending.discard(spec["name"])
+
+    def wait_idle(self, timeout: Optional[float] = None) -> None:
+        """バックグラウンドの生成がすべて終わるまで待ちます。"""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+
+    def _respond(self, handler: _Handler, *, send_body: bool) -> None:
+        route = self.routes.get(urlsplit(handler.path).path)
+        if route is None:
+            self._send_plain(handler, 404, send_body)
+            return
+
+        spec = route["spec"]
+        entry = self._entry(spec, route["path"])
+        age = self._age(spec, self._clock())
+        ttl = self._ttl(spec)
+        # 生成に失敗して出力が無い場合も、次の期限までは生成し直さない
+        if age >= ttl:
+            self.revalidate(spec)
+        if entry is None:
+            self._send_plain(handler, 503, send_body, retry_after=_RETRY_AFTER)
+            return
+
+        use_gzip = _accepts_gzip(handler.headers.get("Accept-Encoding"))
+        etag = entry["gzip_etag"] if use_gzip else entry["etag"]
+        max_age = max(0, int(ttl - age))
+        # 表現ごとのETagなので、このレスポンスで返す表現のETagとだけ比べる
+        if _etag_matches(handler.headers.get("If-None-Match"), etag):
+            handler.send_response(304)
+            self._send_cache_headers(handler, etag, entry, max_age)
+            handler.end_headers()
+            return
+
+        body = entry["gzip_body"] if use_gzip else entry["body"]
+        handler.send_response(200)
+        handler.send_header("Content-Type", route["content_type"])
+        if use_gzip:
+            handler.send_header("Content-Encoding", "gzip")
+        handler.send_header("Content-Length", str(len(body)))
+        self._send_cache_headers(handler, etag, entry, max_age)
+        handler.end_headers()
+        if send_body:
+            handler.wfile.write(body)
+
+    def _send_cache_headers(
+        self, handler: _Handler, etag: str, entry: CachedFeed, max_age: int
+    ) -> None:
+        handler.send_header("ETag", etag)
+        handler.send_header("Last-Modified", entry["last_modified"])
+        handler.send_header("Cache-Control", f"public, max-age={max_age}")
+        handler.send_header("Vary", "Accept-Encoding")
+
+    def _send_plain(
+        self,
+        handler: _Handler,
+        status: int,
+        send_body: bool,
+        retry_after: Optional[int] = None,
+    ) -> None:
+        body = f"{status}\n".encode("ascii")
+        handler.send_response(status)
+        if retry_after is not None:
+            handler.send_header("Retry-After", str(retry_after))
+        handler.send_header("Content-Type", "text/plain; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if send_body:
+            handler.wfile.write(body)
+
+    def serve_forever(self) -> None:
+        """呼び出し元のスレッドで配信します（KeyboardInterrupt で終了）。"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.close()
+
+    def start(self) -> FeedServer:
+        """バックグラウンドのスレッドで配信を始めます。"""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="feed-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.close()
+
+    def close(self) -> None:
+        self._httpd.server_close()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> FeedServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import codecs
+import email.message
+import email.utils
+import importlib.util
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 接続タイムアウト5秒、読み取りタイムアウト20秒
+DEFAULT_TIMEOUT: Tuple[float, float] = (5, 20)
+# 一時的な障害とみなして再試行するステータスコード
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# 本文をストリーミングで読むときのチャンクサイズ
+CHUNK_SIZE = 16 * 1024
+# <meta charset> を探す先頭のバイト数（HTML仕様のプリスキャンと同じ）
+_PRESCAN_BYTES = 1024
+_META_CHARSET = re.compile(
+    rb"""<meta\b[^>]*?charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE
+)
+# Shift_JIS と宣言されたページは、ブラウザと同じく Windows の拡張文字を含めて読む
+_CODEC_ALIASES = {"shift_jis": "cp932"}
+
+
+class ResponseTooLargeError(requests.RequestException):
+    """レスポンスの本文が上限のバイト数を超えた場合の例外。"""
+
+
+def _accept_encoding() -> str:
+    """urllib3が展開できる圧縮形式だけをAccept-Encodingに並べる。"""
+    encodings = ["gzip", "deflate"]
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+        encodings.append("br")
+    return ", ".join(encodings)
+
+
+def _make_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+    session = requests.Session()
+    # 再試行は Fetcher 側で Retry-After を考慮して行うため、urllib3には任せない
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = _accept_encoding()
+    return session
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After（秒数 or HTTP-date）を待機秒数に変換する。"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _codec(label: str) -> Optional[str]:
+    try:
+        name = codecs.lookup(label.strip()).name
+    except LookupError:
+        return None
+    return _CODEC_ALIASES.get(name, name)
+
+
+def _declared_charset(content_type: Optional[str]) -> Optional[str]:
+    """Content-Typeヘッダーの charset を返します。
+
+    requests と違い、charset が無い text/html を ISO-8859-1 とはみなしません。
+    """
+    if not content_type:
+        return None
+    message = email.message.Message()
+    message["Content-Type"] = content_type
+    charset = message.get_param("charset")
+    return _codec(charset) if isinstance(charset, str) else None
+
+
+def detect_charset(head: bytes, content_type: Optional[str] = None) -> str:
+    """本文の先頭とContent-Typeヘッダーから文字コードを判定します。
+
+    BOM、ヘッダーの charset、先頭の <meta charset>（http-equiv を含む）の順に見て、
+    いずれも無ければ UTF-8 とします。
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    declared = _declared_charset(content_type)
+    if declared is not None:
+        return declared
+    meta = _META_CHARSET.search(head, 0, _PRESCAN_BYTES)
+    codec = _codec(meta[1].decode("ascii")) if meta is not None else None
+    # ASCIIとして読めた宣言が UTF-16 を名乗ることはないため、HTML仕様に従い UTF-8 とする
+    if codec is None or codec.startswith("utf-16"):
+        return "utf-8"
+    return codec
+
+
+def _too_large(response: requests.Response, max_bytes: int) -> ResponseTooLargeError:
+    return ResponseTooLargeError(
+        f"レスポンスが上限の {max_bytes} バイトを超えています: {response.url}",
+        response=response,
+    )
+
+
+def iter_text(
+    response: requests.Response,
+    max_bytes: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
+    """レスポンスボディをチャンク単位で読み、文字コードを判定しながらデコードして返します。
+
+    文字コードは先頭のチャンクから `detect_charset` で判定します。読んだバイト列は
+    デコードしたら手放すため、本文全体をバイト列のまま保持しません。`max_bytes` を
+    超える本文は、Content-Lengthで分かれば読み始める前に、分からなければ超えた時点で
+    ResponseTooLargeError を送出します。
+    """
+    length = response.headers.get("Content-Length")
+    if max_bytes is not None and length and length.isdigit() and int(length) > max_bytes:
+        raise _too_large(response, max_bytes)
+    decoder: Optional[codecs.IncrementalDecoder] = None
+    head = b""
+    received = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        received += len(chunk)
+        if max_bytes is not None and received > max_bytes:
+            raise _too_large(response, max_bytes)
+        if decoder is None:
+            # <meta charset> を探せるだけの先頭が揃うまでデコードを待つ
+            head += chunk
+            if len(head) < _PRESCAN_BYTES:
+                continue
+            charset = detect_charset(head, response.headers.get("Content-Type"))
+            decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+            chunk, head = head, b""
+        yield decoder.decode(chunk)
+    if decoder is None:
+        charset = detect_charset(head, response.headers.get("Content-Type"))
+        decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+    yield decoder.decode(head, final=True)
+
+
+def _host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class HostLimiter:
+    """ホストごとの同時リクエスト数を制限します。
+
+    `min_interval` を指定すると、同じホストへのリクエストの開始を最低その秒数ずつ空けます。
+    `jitter`（0〜1）はその間隔をランダムに伸縮させる割合で、常駐時に複数フィードの
+    リクエストが同じ周期で揃わないようにします。
+    """
+
+    def __init__(
+        self,
+        max_per_host: int,
+        *,
+        min_interval: float = 0.0,
+        jitter: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if max_per_host < 1:
+            raise ValueError(f"max_per_host は1以上を指定してください: {max_per_host}")
+        if not 0 <= jitter <= 1:
+            raise ValueError(f"jitter は0から1の範囲で指定してください: {jitter}")
+        self._max_per_host = max_per_host
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = _host_of(url)
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self._max_per_host)
+                self._semaphores[host] = semaphore
+            return semaphore
+
+    def _wait_turn(self, url: str) -> None:
+        if self.min_interval <= 0:
+            return
+        host = _host_of(url)
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_start.get(host, now))
+            # 開始時刻を予約してからロックを離し、同時に待つリクエストの順番を決める
+            spread = random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._next_start[host] = start + self.min_interval * spread
+        if start > now:
+            self._sleep(start - now)
+
+    @contextmanager
+    def limit(self, url: str) -> Iterator[None]:
+        with self._semaphore(url):
+            self._wait_turn(url)
+            yield
+
+
+class Fetcher:
+    """ホストごとに接続をプールするセッションを共有し、一時的な失敗を再試行します。
+
+    タイムアウト・接続エラー・429/5xxは指数バックオフ（フルジッター）で再試行し、
+    Retry-Afterヘッダーがあればその待機時間を優先します。
+    `max_bytes` を指定すると、HTMLの本文は常にストリーミングで読み、そのバイト数を
+    超えるページは読み込みを打ち切ります（`generate_rss.get_html` を参照）。
+    """
+
+    def __init__(
+        self,
+        *,
+        session: Optional[requests.Session] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        max_bytes: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f"max_bytes は1以上を指定してください: {max_bytes}")
+        self.session = session or _make_session(pool_connections, pool_maxsize)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_bytes = max_bytes
+        self._sleep = sleep
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        delay = _parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, self.backoff_base * (2**attempt))
+        return min(delay, self.backoff_max)
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """URLをGETします。再試行を使い切った場合は最後のレスポンスか例外を返します。"""
+        kwargs: dict[str, object] = {"stream": True} if stream else {}
+        return self._send(self.session.get, url, headers, kwargs)
+
+    def head(
+        self, url: str, headers: Optional[Mapping[str, str]] = None
+    ) -> requests.Response:
+        """URLをHEADします（リダイレクトをたどります）。再試行の扱いは get と同じです。"""
+        return self._send(self.session.head, url, headers, {"allow_redirects": True})
+
+    def _send(
+        self,
+        send: Callable[..., requests.Response],
+        url: str,
+        headers: Optional[Mapping[str, str]],
+        kwargs: Mapping[str, object],
+    ) -> requests.Response:
+        attempt = 0
+        while True:
+            try:
+                response = send(
+                    url, timeout=self.timeout, headers=dict(headers or {}), **kwargs
+                )
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if attempt >= self.max_retries:
+                    raise
+                self._sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                response.close()
+                self._sleep(delay)
+                attempt += 1
+                continue
+            return response
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> Fetcher:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .sites import SiteAdapter
+from .streaming import matches_container
+
+# 記事と関係なく毎回変わりやすい部分（スクリプト・CSRFトークンの input・広告枠・コメント）
+_NOISE = re.compile(
+    r"<script\b.*?</script\s*>|<style\b.*?</style\s*>|<noscript\b.*?</noscript\s*>"
+    r"|<ins\b.*?</ins\s*>|<!--.*?-->|<input\b[^>]*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_START_TAG = re.compile(r"<([a-zA-Z][\w:-]*)([^>]*)>")
+_ATTR = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+_META_TAG = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+_TITLE_TAG = re.compile(r"<title\b[^>]*>.*?</title\s*>", re.IGNORECASE | re.DOTALL)
+# meta[property='og:title'] のような、属性の値で meta 要素を選ぶセレクタ
+_META_SELECTOR = re.compile(r"""meta\[(name|property)=['"]?([^'"\]]+)['"]?\]""")
+
+_TagFilter = Callable[[str, str], bool]
+
+
+def _attrs(text: str) -> Dict[str, str]:
+    return {
+        match[1].lower(): match[2] or match[3] or match[4] or ""
+        for match in _ATTR.finditer(text)
+    }
+
+
+def _end_of_element(html: str, name: str, start: int) -> int:
+    """`start` から始まる要素の中身を読み、対応する閉じタグの直後の位置を返します。"""
+    tags = re.compile(rf"<(/?){re.escape(name)}\b[^>]*?(/?)>", re.IGNORECASE)
+    depth = 1
+    for match in tags.finditer(html, start):
+        if match[1]:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        elif not match[2]:
+            depth += 1
+    # 閉じタグが無い（途中で読み込みを打ち切った）場合は最後まで
+    return len(html)
+
+
+def _element_spans(html: str, wanted: _TagFilter) -> Iterator[Tuple[int, int]]:
+    pos = 0
+    while True:
+        for match in _START_TAG.finditer(html, pos):
+            name = match[1].lower()
+            if wanted(name, match[2]):
+                break
+        else:
+            return
+        pos = _end_of_element(html, name, match.end())
+        yield match.start(), pos
+
+
+def _channel_tags(adapter: SiteAdapter, html: str) -> Optional[List[str]]:
+    """チャンネル情報を取り出す meta / title 要素を返します。
+
+    それ以外のセレクタを使うアダプタは、解析せずに範囲を決められないため None を返します。
+    """
+    wanted = set()
+    parts: List[str] = []
+    for selector in adapter["channel_title"] + adapter["channel_description"]:
+        meta = _META_SELECTOR.fullmatch(selector)
+        if meta is not None:
+            wanted.add((meta[1], meta[2]))
+        elif selector == "title":
+            title = _TITLE_TAG.search(html)
+            parts.append(title[0] if title else "")
+        else:
+            return None
+    for tag in _META_TAG.finditer(html):
+        attrs = _attrs(tag[0][5:])
+        if any(attrs.get(attr) == value for attr, value in wanted):
+            parts.append(tag[0])
+    return parts
+
+
+def _region_spans(adapter: SiteAdapter, html: str) -> List[Tuple[int, int]]:
+    spans: List[Tuple[int, int]] = []
+    container = adapter.get("stream_container")
+    if container is not None:
+
+        def is_container(name: str, attr_text: str) -> bool:
+            # 属性を読む前に、値が含まれないタグを除外する
+            return container["value"] in attr_text and matches_container(
+                container, name, _attrs(attr_text)
+            )
+
+        span = next(_element_spans(html, is_container), None)
+        if span is not None:
+            spans.append(span)
+    tags = frozenset(adapter.get("partial_tags", []))
+    if tags:
+        spans.extend(_element_spans(html, lambda name, attr_text: name in tags))
+    return spans
+
+
+def page_fingerprint(
+    adapter: SiteAdapter, html: str, feed: Optional[Mapping[str, object]] = None
+) -> Optional[str]:
+    """記事一覧の範囲とチャンネル情報のタグだけから、ページのフィンガープリントを計算します。
+
+    HTMLは解析せず正規表現で範囲を切り出し、範囲内のスクリプト・フォームの input・
+    広告枠・コメントは除きます。アダプタの定義と `feed`（フィードの設定）も含めるため、
+    抽出ルールや設定を変えると値が変わります。範囲を決められない（`stream_container` も
+    `partial_tags` も無い、範囲が見つからないなど）場合は None を返します。
+    """
+    channel = _channel_tags(adapter, html)
+    spans = _region_spans(adapter, html)
+    if channel is None or not spans:
+        return None
+    digest = hashlib.sha256(
+        json.dumps([adapter, feed], ensure_ascii=False, sort_keys=True).encode("utf-8")
+    )
+    for part in channel + [html[start:end] for start, end in spans]:
+        digest.update(b"\0")
+        digest.update(_NOISE.sub("", part).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,266 @@
+"""tests/fixtures を配信するローカルHTTPサーバー。
+
+実サイトの代わりに、遅延・ステータスコード・帯域制限を設定してフィクスチャを返します。
+ネットワークを使わずに、並行取得の経路（タイムアウト・304・遅い本文・接続の再利用）を
+端から端まで試せます。
+
+    python -m src.rss_maker.fixture_server --latency 0.2 --throttle 65536
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[2] / "tests" / "fixtures"
+# 帯域制限時に1回で書き出すバイト数
+_THROTTLE_CHUNK = 4096
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FixtureServer._HTTPServer
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.owner._connection_opened()
+
+    def log_message(self, format: str, *args: object) -> None:
+        if self.server.owner.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        self.server.owner._respond(self, send_body=True)
+
+    def do_HEAD(self) -> None:
+        self.server.owner._respond(self, send_body=False)
+
+
+class FixtureServer:
+    """フィクスチャのディレクトリを配信するスレッド型HTTPサーバー。
+
+    `routes` でリクエストパスを配信するファイル名に対応づけます（未指定のパスは
+    ディレクトリ内の同名ファイル）。`faults` に並べたステータスコードは、そのパスへの
+    リクエストに先頭から1つずつ返し、使い切った後は通常どおり配信します。
+    `latency` はレスポンスを返すまでの遅延秒数、`throttle` は本文の送信速度（バイト/秒）です。
+    ETag・Last-Modified を付け、条件付きリクエストには304を返します。
+
+    `with FixtureServer() as server:` の間、バックグラウンドのスレッドで配信します。
+    """
+
+    class _HTTPServer(ThreadingHTTPServer):
+        daemon_threads = True
+        owner: FixtureServer
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str] = DEFAULT_ROOT,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        routes: Optional[Mapping[str, str]] = None,
+        latency: float = 0.0,
+        throttle: Optional[int] = None,
+        faults: Optional[Mapping[str, Sequence[int]]] = None,
+        verbose: bool = False,
+    ) -> None:
+        self.root = Path(root)
+        self.routes: Dict[str, str] = dict(routes or {})
+        self.latency = latency
+        self.throttle = throttle
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._faults: Dict[str, Deque[int]] = {
+            path: deque(statuses) for path, statuses in (faults or {}).items()
+        }
+        self._requests: List[Tuple[str, str]] = []
+        self._connections = 0
+        self._httpd = self._HTTPServer((host, port), _Handler)
+        self._httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def url(self, path: str) -> str:
+        """サーバー上のパスの絶対URLを返します。"""
+        return self.base_url + "/" + path.lstrip("/")
+
+    @property
+    def requests(self) -> List[Tuple[str, str]]:
+        """受け付けたリクエストの（メソッド, パス）の一覧"""
+        with self._lock:
+            return list(self._requests)
+
+    @property
+    def connections(self) -> int:
+        """受け付けたTCP接続の数（キープアライブで再利用されれば増えません）"""
+        with self._lock:
+            return self._connections
+
+    def add_fault(self, path: str, *statuses: int) -> None:
+        with self._lock:
+            self._faults.setdefault(path, deque()).extend(statuses)
+
+    def _connection_opened(self) -> None:
+        with self._lock:
+            self._connections += 1
+
+    def _next_fault(self, path: str) -> Optional[int]:
+        with self._lock:
+            statuses = self._faults.get(path)
+            return statuses.popleft() if statuses else None
+
+    def _resolve(self, path: str) -> Optional[Path]:
+        name = self.routes.get(path, path.lstrip("/"))
+        file_path = (self.root / name).resolve()
+        if not file_path.is_file() or self.root.resolve() not in file_path.parents:
+            return None
+        return file_path
+
+    def _respond(self, handler: _Handler, *, send_body: bool) -> None:
+        path = urlsplit(handler.path).path
+        with self._lock:
+            self._requests.append((handler.command, path))
+        if self.latency:
+            time.sleep(self.latency)
+
+        fault = self._next_fault(path)
+        if fault is not None:
+            self._send_status(handler, fault)
+            return
+        file_path = self._resolve(path)
+        if file_path is None:
+            self._send_status(handler, 404)
+            return
+
+        body = file_path.read_bytes()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        last_modified = handler.date_time_string(int(file_path.stat().st_mtime))
+        if handler.headers.get("If-None-Match") == etag or (
+            "If-None-Match" not in handler.headers
+            and handler.headers.get("If-Modified-Since") == last_modified
+        ):
+            handler.send_response(304)
+            handler.send_header("ETag", etag)
+            handler.end_headers()
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", _content_type(file_path))
+        handler.send_header("Content-Length", str(len(body)))
+        handler.send_header("ETag", etag)
+        handler.send_header("Last-Modified", last_modified)
+        handler.end_headers()
+        if send_body:
+            self._write_body(handler, body)
+
+    def _send_status(self, handler: _Handler, status: int) -> None:
+        body = f"{status}\n".encode("ascii")
+        handler.send_response(status)
+        if status in (429, 503):
+            handler.send_header("Retry-After", "0")
+        handler.send_header("Content-Type", "text/plain; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if handler.command != "HEAD":
+            handler.wfile.write(body)
+
+    def _write_body(self, handler: _Handler, body: bytes) -> None:
+        if not self.throttle:
+            handler.wfile.write(body)
+            return
+        chunk_size = min(_THROTTLE_CHUNK, self.throttle)
+        try:
+            for start in range(0, len(body), chunk_size):
+                handler.wfile.write(body[start : start + chunk_size])
+                handler.wfile.flush()
+                time.sleep(chunk_size / self.throttle)
+        except ConnectionError:
+            # クライアントが途中で読み込みを打ち切った（ストリーミング取得など）
+            handler.close_connection = True
+
+    def start(self) -> FixtureServer:
+        """バックグラウンドのスレッドで配信を始めます。"""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fixture-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> FixtureServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+def _content_type(path: Path) -> str:
+    if path.suffix in (".html", ".htm"):
+        return "text/html; charset=utf-8"
+    if path.suffix == ".xml":
+        return "application/rss+xml; charset=utf-8"
+    return "application/octet-stream"
+
+
+def _fault(value: str) -> Tuple[str, List[int]]:
+    path, _, statuses = value.partition("=")
+    return path, [int(status) for status in statuses.split(",") if status]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=DEFAULT_ROOT, help="配信するディレクトリ")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="応答までの遅延秒数")
+    parser.add_argument("--throttle", type=int, help="本文の送信速度（バイト/秒）")
+    parser.add_argument(
+        "--fault",
+        type=_fault,
+        action="append",
+        default=[],
+        help="パスに返すステータスコード（例: /audee_program_page.html=503,503）",
+    )
+    parser.add_argument("--verbose", action="store_true", help="アクセスログを出力する")
+    args = parser.parse_args(argv)
+
+    server = FixtureServer(
+        args.root,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        throttle=args.throttle,
+        faults=dict(args.fault),
+        verbose=args.verbose,
+    )
+    print(f"{args.root} を {server.base_url} で配信しています（Ctrl+C で終了）")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,61 @@
 from __future__ import annotations
 
-import mimetypes
-import xml.dom.minidom
-from typing import List, Mapping, NotRequired, Optional, Required, Sequence, TypedDict
-from urllib.parse import urljoin
+import datetime
+import importlib.util
+import os
+import re
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    NotRequired,
+    Optional,
+    Required,
+    Sequence,
+    TypedDict,
+    Union,
+)
 
 import feedgenerator  # type: ignore[reportMissingTypeStubs]
 import requests
-from bs4 import BeautifulSoup
-from bs4.element import Tag
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .extractor import get_extractor
+from .feed_formats import write_feed_files
+from .fetch import Fetcher, iter_text
+from .http_cache import HttpCache
+from .manifest import FeedManifest
+from .metrics import FeedMetrics
+from .model import FeedItem
+from .rss_writer import MEDIA_NAMESPACE
+from .rss_writer import guess_mime_type as _guess_mime_type
+from .sites import (
+    AUDEE,
+    BITFAN_UPDATES,
+    JFN_PODS,
+    SiteAdapter,
+    get_site_adapter,
+)
+from .streaming import ContainerSpec, partial_strainer, read_until_container
+
+# BeautifulSoupのツリービルダー名と、その利用に必要なモジュール
+_PARSER_BACKEND_MODULES: dict[str, Optional[str]] = {
+    "html.parser": None,
+    "lxml": "lxml",
+    "html5lib": "html5lib",
+}
+PARSER_BACKENDS = tuple(_PARSER_BACKEND_MODULES)
+_parser_backend = os.environ.get("RSS_MAKER_PARSER", "html.parser")
+
+# 詳細ページの日付表記（2024-05-01 / 2024.05.01 / 2024年5月1日 など）
+_DATE_PATTERN = re.compile(r"(\d{4})\s*[./\-年]\s*(\d{1,2})\s*[./\-月]\s*(\d{1,2})")
+# 対象サイトはいずれも日本向けのため、タイムゾーンの無い日時は日本時間とみなす
+_LOCAL_TIMEZONE = datetime.timezone(datetime.timedelta(hours=9))
+
+# 記事一覧を囲む要素。部分解析とレスポンスの早期打ち切りに使う
+AUDEE_CONTAINER: ContainerSpec = AUDEE["stream_container"]
+BITFAN_UPDATES_CONTAINER: ContainerSpec = BITFAN_UPDATES["stream_container"]
 
 
 class ChannelInfoBase(TypedDict):
@@ -20,33 +67,127 @@ class ChannelInfo(ChannelInfoBase):
     link: str
 
 
+class Enclosure(TypedDict):
+    url: str
+    length: str
+    type: str
+
+
 class Article(TypedDict):
     title: Required[str]
     url: Required[str]
     thumbnail: Required[Optional[str]]
     description: NotRequired[str]
+    # 公開日時（ISO 8601）
+    pubdate: NotRequired[str]
+    # 音声などの実ファイル。あればサムネイルの代わりに enclosure として出力する
+    enclosure: NotRequired[Enclosure]
 
 
-def _attr_to_str(val: object) -> Optional[str]:
-    """BeautifulSoupの属性値（str or list[str]など）を安全にstrへ正規化する。"""
-    if isinstance(val, list):
-        return "".join(str(x) for x in val)
-    if isinstance(val, str):
-        return val
-    return None
+# 抽出した記事は FeedItem。Article と同じキーで読めるため、どちらも受け付ける
+ArticleLike = Union[Article, FeedItem]
 
 
-def get_html(url: str) -> str:
-    """指定されたURLからHTMLコンテンツを取得します。"""
-    response = requests.get(url, timeout=(5, 20))
-    response.raise_for_status()  # エラーがあれば例外を発生させる
-    return response.text
+class ArticleDetail(TypedDict, total=False):
+    """記事の詳細ページから補う項目。"""
+
+    description: str
+    pubdate: str
+    enclosure: Enclosure
+
 
+class PageData(TypedDict):
+    channel: ChannelInfoBase
+    articles: List[ArticleLike]
+    # 次の一覧ページ（アダプタに next_page がある場合のみ）
+    next_url: NotRequired[str]
 
-def _guess_mime_type(url: str) -> str:
-    """URLからRSS enclosure用のMIME typeを推定する。"""
-    mime_type, _ = mimetypes.guess_type(url)
-    return mime_type or "application/octet-stream"
+
+class FeedContent(TypedDict):
+    channel: ChannelInfo
+    articles: List[ArticleLike]
+
+
+def _read_html(
+    response: requests.Response,
+    container: Optional[ContainerSpec],
+    max_bytes: Optional[int] = None,
+    metrics: Optional[FeedMetrics] = None,
+) -> str:
+    try:
+        if container is None and max_bytes is None:
+            return response.text
+        try:
+            chunks = iter_text(response, max_bytes)
+            if container is None:
+                return "".join(chunks)
+            return read_until_container(chunks, container)
+        finally:
+            # 途中で読み込みを打ち切った場合でも接続を解放する
+            response.close()
+    finally:
+        if metrics is not None:
+            # gzip・br を解く前に、接続から実際に受け取ったバイト数を数える
+            metrics.increment("bytes_fetched", response.raw.tell())
+
+
+def get_html(
+    url: str,
+    fetcher: Optional[Fetcher] = None,
+    container: Optional[ContainerSpec] = None,
+    metrics: Optional[FeedMetrics] = None,
+) -> str:
+    """指定されたURLからHTMLコンテンツを取得します。
+
+    `fetcher` を渡すと、共有セッション（接続プール・圧縮・再試行付き）を使います。
+    `container` を渡すと本文をストリーミングで読み、その要素が閉じた時点で打ち切ります。
+    `fetcher` に `max_bytes` があれば常にストリーミングで読み、超えた時点で打ち切ります。
+    ストリーミングでは文字コードを本文の先頭から判定して逐次デコードします。
+    `metrics` を渡すと、HTTPステータスと、接続から受け取った圧縮を解く前のバイト数を
+    `bytes_fetched` に記録します。
+    """
+    max_bytes = fetcher.max_bytes if fetcher is not None else None
+    stream = container is not None or max_bytes is not None
+    if fetcher is None:
+        if stream:
+            response = requests.get(url, timeout=(5, 20), stream=True)
+        else:
+            response = requests.get(url, timeout=(5, 20))
+    else:
+        response = fetcher.get(url, stream=stream)
+    if metrics is not None:
+        metrics.set_http_status(response.status_code)
+    response.raise_for_status()  # エラーがあれば例外を発生させる
+    return _read_html(response, container, max_bytes, metrics)
+
+
+def get_html_if_modified(
+    url: str,
+    cache: HttpCache,
+    fetcher: Optional[Fetcher] = None,
+    container: Optional[ContainerSpec] = None,
+    metrics: Optional[FeedMetrics] = None,
+) -> Optional[str]:
+    """条件付きリクエストでHTMLを取得します。304 Not Modified の場合は None を返します。"""
+    headers = cache.conditional_headers(url)
+    max_bytes = fetcher.max_bytes if fetcher is not None else None
+    stream = container is not None or max_bytes is not None
+    if fetcher is None:
+        if stream:
+            response = requests.get(url, timeout=(5, 20), headers=headers, stream=True)
+        else:
+            response = requests.get(url, timeout=(5, 20), headers=headers)
+    else:
+        response = fetcher.get(url, headers=headers, stream=stream)
+    if metrics is not None:
+        metrics.set_http_status(response.status_code)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    html = _read_html(response, container, max_bytes, metrics)
+    # 本文を読み切る前に失敗した場合、新しい検証子で次回304にならないよう最後に保存する
+    cache.remember(url, response.headers)
+    return html
 
 
 def _is_missing_text(value: str, fallback: str) -> bool:
@@ -54,60 +195,200 @@ def _is_missing_text(value: str, fallback: str) -> bool:
     return not normalized or normalized == fallback or normalized == "None"
 
 
-def parse_channel_info_from_audee_page(html: str) -> ChannelInfoBase:
-    """AuDeeの番組ページHTMLからチャンネル情報を抽出します。"""
-    soup = BeautifulSoup(html, "html.parser")
+def available_parser_backends() -> List[str]:
+    """インストール済みで利用可能なHTMLパーサーバックエンドを返します。"""
+    return [
+        name
+        for name, module in _PARSER_BACKEND_MODULES.items()
+        if module is None or importlib.util.find_spec(module) is not None
+    ]
+
+
+def get_parser_backend() -> str:
+    return _parser_backend
+
 
-    title_tag = soup.select_one("meta[property='og:title']")
-    description_tag = soup.select_one("meta[name='description']")
+def set_parser_backend(name: str) -> None:
+    """HTMLの解析に使うバックエンド（html.parser / lxml / html5lib）を切り替えます。"""
+    global _parser_backend
+    if name not in _PARSER_BACKEND_MODULES:
+        raise ValueError(f"未対応のパーサーバックエンドです: {name}")
+    if name not in available_parser_backends():
+        raise ValueError(f"パーサーバックエンドがインストールされていません: {name}")
+    _parser_backend = name
 
-    title_val = title_tag.get("content") if title_tag else "タイトル不明"
-    desc_val = description_tag.get("content") if description_tag else "概要不明"
 
-    # beautifulsoupの型定義により、contentがリストを返す可能性があるため、文字列に変換
-    title = "".join(title_val) if isinstance(title_val, list) else str(title_val)
-    description = "".join(desc_val) if isinstance(desc_val, list) else str(desc_val)
+def _make_soup(html: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    # html5lib は parse_only に対応していないため、常に全体を解析する
+    if parse_only is None or _parser_backend == "html5lib":
+        return BeautifulSoup(html, _parser_backend)
+    return BeautifulSoup(html, _parser_backend, parse_only=parse_only)
 
+
+def extract_channel_info(adapter: SiteAdapter, soup: BeautifulSoup) -> ChannelInfoBase:
+    """サイトアダプタのセレクタに従ってチャンネル情報を抽出します。"""
+    title, description = get_extractor(adapter).channel_info(soup)
     return {
-        "title": title,
-        "description": description.strip(),
+        "title": title or adapter.get("title_fallback", "タイトル不明"),
+        "description": description or adapter.get("description_fallback", ""),
     }
 
 
-def parse_articles_from_audee_page(html: str) -> List[Article]:
-    """AuDeeの番組ページHTMLから記事リストを抽出します。"""
-    soup = BeautifulSoup(html, "html.parser")
-    articles: List[Article] = []
-    # 「コンテンツ一覧」の中の「すべて」タブのセクションに限定して検索
-    content_section = soup.select_one("#content_tab_all")
-    if not content_section:
-        return []
-
-    # CSSセレクタで記事要素をすべて取得
-    for item in content_section.select(".box-article-item"):
-        link_tag = item.select_one("a")
-        img_tag = item.select_one("a img.lazy")
-        title_tag = item.select_one("a p.txt-article")
-
-        if not (
-            isinstance(link_tag, Tag)
-            and isinstance(img_tag, Tag)
-            and isinstance(title_tag, Tag)
-        ):
-            continue
-
-        href = _attr_to_str(link_tag.get("href"))
-        thumb_val = _attr_to_str(img_tag.get("data-original"))
-        title_text = title_tag.get_text(strip=True)
-        if not (href and title_text):
-            continue
-        url = href
-        if not url.startswith("http"):
-            url = f"https://audee.jp{url}"
-
-        art: Article = {"title": title_text, "url": url, "thumbnail": thumb_val}
-        articles.append(art)
-    return articles
+def extract_articles(
+    adapter: SiteAdapter, soup: BeautifulSoup, base_url: str = ""
+) -> List[FeedItem]:
+    """サイトアダプタのセレクタに従って記事リストを抽出します。
+
+    リンクとサムネイルは `base_url`（アダプタに `base_url` があればそちら）で絶対URLにし、
+    同じURLの記事は最初の1件だけを残します。
+    """
+    return [
+        FeedItem(title, url, thumbnail)
+        for title, url, thumbnail in get_extractor(adapter).articles(soup, base_url)
+    ]
+
+
+def parse_pubdate(value: str) -> Optional[str]:
+    """ISO 8601 や「2024年5月1日」「2024.05.01」形式の日時をISO 8601に正規化します。
+
+    タイムゾーンの無い日時は日本時間とみなします。読み取れない場合は None を返します。
+    """
+    value = value.strip()
+    try:
+        date = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        match = _DATE_PATTERN.search(value)
+        if not match:
+            return None
+        try:
+            date = datetime.datetime(*(int(part) for part in match.groups()))
+        except ValueError:
+            return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=_LOCAL_TIMEZONE)
+    return date.isoformat()
+
+
+def extract_detail(site: SiteAdapter | str, html: str, url: str) -> ArticleDetail:
+    """記事の詳細ページHTMLから説明・公開日時・音声ファイルのURLを抽出します。
+
+    音声ファイルの長さはまだ分からないため "0"、MIME typeはURLから推定した値になります。
+    """
+    adapter = _resolve_adapter(site)
+    soup = _make_soup(html)
+    description, raw_date, media_url = get_extractor(adapter).detail(soup, url)
+    detail: ArticleDetail = {}
+    if description:
+        detail["description"] = description
+    pubdate = parse_pubdate(raw_date) if raw_date else None
+    if pubdate:
+        detail["pubdate"] = pubdate
+    if media_url:
+        detail["enclosure"] = {
+            "url": media_url,
+            "length": "0",
+            "type": _guess_mime_type(media_url),
+        }
+    return detail
+
+
+def _resolve_adapter(site: SiteAdapter | str) -> SiteAdapter:
+    return get_site_adapter(site) if isinstance(site, str) else site
+
+
+def _site_strainer(adapter: SiteAdapter) -> Optional[SoupStrainer]:
+    if "stream_container" in adapter:
+        return partial_strainer(adapter["stream_container"])
+    if "partial_tags" in adapter:
+        return partial_strainer(None, ("meta", "title", *adapter["partial_tags"]))
+    # 記事の範囲を絞れないサイトは全体を解析する
+    return None
+
+
+def extract_page(
+    site: SiteAdapter | str, html: str, base_url: str = "", *, partial: bool = False
+) -> PageData:
+    """ページHTMLを1回だけ解析し、チャンネル情報と記事リストを抽出します。
+
+    `partial=True` の場合は meta/title と記事コンテナ（または `partial_tags`）だけを
+    ツリーに取り込みます。
+    """
+    adapter = _resolve_adapter(site)
+    soup = _make_soup(html, _site_strainer(adapter) if partial else None)
+    # 記事抽出はツリーを書き換えるため、チャンネル情報を先に取り出す
+    channel = extract_channel_info(adapter, soup)
+    next_url = get_extractor(adapter).next_page_url(soup, base_url)
+    page: PageData = {
+        "channel": channel,
+        "articles": extract_articles(adapter, soup, base_url),
+    }
+    if next_url:
+        page["next_url"] = next_url
+    return page
+
+
+def feed_from_page(site: SiteAdapter | str, page: PageData, url: str) -> FeedContent:
+    """抽出済みのページからRSSフィードの内容を組み立て、アダプタの指定に従って検証します。"""
+    adapter = _resolve_adapter(site)
+    base_info = page["channel"]
+    channel_info: ChannelInfo = {
+        "title": base_info["title"],
+        "description": base_info["description"],
+        "link": url,
+    }
+
+    validate = adapter.get("validate", [])
+    label = adapter["label"]
+    title_fallback = adapter.get("title_fallback", "タイトル不明")
+    if "channel_title" in validate and _is_missing_text(
+        channel_info["title"], title_fallback
+    ):
+        raise ValueError(f"{label}のタイトルを抽出できませんでした: {url}")
+    desc_fallback = adapter.get("description_fallback", "")
+    if "channel_description" in validate and _is_missing_text(
+        channel_info["description"], desc_fallback
+    ):
+        raise ValueError(f"{label}の概要を抽出できませんでした: {url}")
+    if "articles" in validate and not page["articles"]:
+        raise ValueError(f"{label}の記事を抽出できませんでした: {url}")
+    return {"channel": channel_info, "articles": page["articles"]}
+
+
+def prepare_feed(
+    site: SiteAdapter | str, html: str, url: str, *, partial: bool = False
+) -> FeedContent:
+    """ページHTMLからRSSフィードの内容を組み立て、アダプタの指定に従って検証します。"""
+    adapter = _resolve_adapter(site)
+    return feed_from_page(adapter, extract_page(adapter, html, url, partial=partial), url)
+
+
+def create_rss_file(
+    site: SiteAdapter | str,
+    url: str,
+    output_path: str,
+    manifest: Optional[FeedManifest] = None,
+) -> None:
+    """サイトアダプタに従ってページからRSSフィードを作成し、ファイルに保存します。"""
+    html = get_html(url)
+    write_rss_file(output_path, prepare_feed(site, html, url), manifest)
+
+
+class _MediaRssFeed(feedgenerator.Rss201rev2Feed):
+    """rss_writer と同じく、音声ファイルのある記事に Media RSS の要素を加えます。"""
+
+    def rss_attributes(self) -> Dict[str, str]:
+        attrs: Dict[str, str] = super().rss_attributes()  # type: ignore[reportUnknownMemberType]
+        if any("media_content" in item for item in self.items):
+            attrs["xmlns:media"] = MEDIA_NAMESPACE
+        return attrs
+
+    def add_item_elements(self, handler: Any, item: Dict[str, Any]) -> None:
+        super().add_item_elements(handler, item)  # type: ignore[reportUnknownMemberType]
+        if "media_content" not in item:
+            return
+        handler.addQuickElement("media:content", "", item["media_content"])
+        if item.get("media_thumbnail"):
+            handler.addQuickElement("media:thumbnail", "", {"url": item["media_thumbnail"]})
 
 
 def generate_rss_feed(
@@ -119,13 +400,30 @@ def generate_rss_feed(
     title = str(channel_info["title"])  # type: ignore[index]
     link = str(channel_info["link"])  # type: ignore[index]
     description = str(channel_info["description"])  # type: ignore[index]
-    feed = feedgenerator.Rss201rev2Feed(title=title, link=link, description=description)
+    feed = _MediaRssFeed(title=title, link=link, description=description)
 
     for article in articles:
         enclosures: List[object] = []
+        media: Dict[str, object] = {}
+        enclosure_obj = article.get("enclosure")
         thumb_obj = article.get("thumbnail")
         thumb = str(thumb_obj) if isinstance(thumb_obj, str) else None
-        if thumb:
+        if isinstance(enclosure_obj, Mapping):
+            enclosures = [
+                feedgenerator.Enclosure(
+                    url=str(enclosure_obj["url"]),
+                    length=str(enclosure_obj["length"]),
+                    mime_type=str(enclosure_obj["type"]),
+                )
+            ]
+            media = {
+                "media_content": {
+                    "url": str(enclosure_obj["url"]),
+                    "type": str(enclosure_obj["type"]),
+                },
+                "media_thumbnail": thumb,
+            }
+        elif thumb:
             enclosures = [
                 feedgenerator.Enclosure(
                     url=thumb, length="0", mime_type=_guess_mime_type(thumb)
@@ -135,158 +433,103 @@ def generate_rss_feed(
         item_link = str(article["url"])  # type: ignore[index]
         desc_obj = article.get("description")
         item_desc = str(desc_obj) if isinstance(desc_obj, str) else ""
+        pubdate_obj = article.get("pubdate")
         feed.add_item(
             title=item_title,
             link=item_link,
             description=item_desc,
+            pubdate=(
+                datetime.datetime.fromisoformat(pubdate_obj)
+                if isinstance(pubdate_obj, str)
+                else None
+            ),
             enclosures=enclosures,
+            **media,
         )
 
     return feed.writeString("utf-8")
 
 
-def create_audee_rss_file(url: str, output_path: str) -> None:
-    """AuDeeの番組ページのRSSフィードを作成し、ファイルに保存します。"""
-    html = get_html(url)
+def write_rss_file(
+    output_path: str,
+    content: FeedContent,
+    manifest: Optional[FeedManifest] = None,
+) -> bool:
+    """RSSフィードを整形済みの形で一時ファイルへ書き出し、アトミックに置き換えます。
 
-    base_info = parse_channel_info_from_audee_page(html)
-    channel_info: ChannelInfo = {
-        "title": base_info["title"],
-        "description": base_info["description"],
-        "link": url,
-    }
+    `manifest` を渡した場合、内容のハッシュ値が前回と同じなら書き込まずに False を返します。
+    """
+    written = write_feed_files(
+        {"rss": output_path}, content["channel"], content["articles"], manifest
+    )
+    return bool(written)
 
-    articles = parse_articles_from_audee_page(html)
-    rss_xml = generate_rss_feed(channel_info, articles)
 
-    # 生成されたXMLを整形する
-    dom = xml.dom.minidom.parseString(rss_xml)
-    pretty_xml = dom.toprettyxml(indent="  ")
-    # 空白行を削除
-    pretty_xml = "\n".join([line for line in pretty_xml.split("\n") if line.strip()])
+# ---------------- AuDee ----------------
+def parse_channel_info_from_audee_page(html: str) -> ChannelInfoBase:
+    """AuDeeの番組ページHTMLからチャンネル情報を抽出します。"""
+    return extract_channel_info(AUDEE, _make_soup(html))
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(pretty_xml)
 
+def parse_articles_from_audee_page(html: str) -> List[FeedItem]:
+    """AuDeeの番組ページHTMLから記事リストを抽出します。"""
+    return extract_articles(AUDEE, _make_soup(html))
 
-def parse_channel_info_from_jfn_pods_page(html: str) -> ChannelInfoBase:
-    """JFN Podsのポッドキャスト一覧ページHTMLからチャンネル情報を抽出します。"""
-    soup = BeautifulSoup(html, "html.parser")
 
-    title_tag = soup.select_one("meta[property='og:title']")
-    description_tag = soup.select_one("meta[name='description']")
+def extract_audee_page(html: str, *, partial: bool = False) -> PageData:
+    """AuDeeの番組ページHTMLを1回だけ解析し、チャンネル情報と記事リストを抽出します。"""
+    return extract_page(AUDEE, html, partial=partial)
 
-    title_val = title_tag.get("content") if title_tag else "タイトル不明"
-    desc_val = description_tag.get("content") if description_tag else "概要不明"
 
-    title = "".join(title_val) if isinstance(title_val, list) else str(title_val)
-    description = "".join(desc_val) if isinstance(desc_val, list) else str(desc_val)
+def prepare_audee_feed(html: str, url: str, *, partial: bool = False) -> FeedContent:
+    """AuDeeの番組ページHTMLからRSSフィードの内容を組み立てます。"""
+    return prepare_feed(AUDEE, html, url, partial=partial)
 
-    return {
-        "title": title.strip(),
-        "description": description.strip(),
-    }
 
+def create_audee_rss_file(
+    url: str, output_path: str, manifest: Optional[FeedManifest] = None
+) -> None:
+    """AuDeeの番組ページのRSSフィードを作成し、ファイルに保存します。"""
+    create_rss_file(AUDEE, url, output_path, manifest)
 
-def parse_articles_from_jfn_pods_page(html: str, base_url: str) -> List[Article]:
-    """JFN Podsのポッドキャスト一覧ページHTMLから記事リストを抽出します。"""
-    soup = BeautifulSoup(html, "html.parser")
-    articles: List[Article] = []
-    seen: set[str] = set()
 
-    for link_tag in soup.select("article a[href*='/voice/']"):
-        if not isinstance(link_tag, Tag):
-            continue
+# ---------------- JFN Pods ----------------
+def parse_channel_info_from_jfn_pods_page(html: str) -> ChannelInfoBase:
+    """JFN Podsのポッドキャスト一覧ページHTMLからチャンネル情報を抽出します。"""
+    return extract_channel_info(JFN_PODS, _make_soup(html))
 
-        href = _attr_to_str(link_tag.get("href"))
-        if not href:
-            continue
 
-        url = urljoin(base_url, href)
-        if url in seen:
-            continue
-        seen.add(url)
+def parse_articles_from_jfn_pods_page(html: str, base_url: str) -> List[FeedItem]:
+    """JFN Podsのポッドキャスト一覧ページHTMLから記事リストを抽出します。"""
+    return extract_articles(JFN_PODS, _make_soup(html), base_url)
 
-        title_tag = link_tag.select_one("h3")
-        img_tag = link_tag.select_one("img")
-        if not (isinstance(title_tag, Tag) and isinstance(img_tag, Tag)):
-            continue
 
-        title = title_tag.get_text(strip=True)
-        thumb_src = _attr_to_str(img_tag.get("src"))
-        if not (title and thumb_src):
-            continue
+def extract_jfn_pods_page(
+    html: str, base_url: str, *, partial: bool = False
+) -> PageData:
+    """JFN Podsの一覧ページHTMLを1回だけ解析し、チャンネル情報と記事リストを抽出します。"""
+    return extract_page(JFN_PODS, html, base_url, partial=partial)
 
-        thumbnail = urljoin(base_url, thumb_src)
-        art: Article = {"title": title, "url": url, "thumbnail": thumbnail}
-        articles.append(art)
 
-    return articles
+def prepare_jfn_pods_feed(html: str, url: str, *, partial: bool = False) -> FeedContent:
+    """JFN Podsのポッドキャスト一覧ページHTMLからRSSフィードの内容を組み立てます。"""
+    return prepare_feed(JFN_PODS, html, url, partial=partial)
 
 
-def create_jfn_pods_rss_file(url: str, output_path: str) -> None:
+def create_jfn_pods_rss_file(
+    url: str, output_path: str, manifest: Optional[FeedManifest] = None
+) -> None:
     """JFN Podsのポッドキャスト一覧ページからRSSフィードを作成し、保存します。"""
-    html = get_html(url)
-
-    base_info = parse_channel_info_from_jfn_pods_page(html)
-    channel_info: ChannelInfo = {
-        "title": base_info["title"],
-        "description": base_info["description"],
-        "link": url,
-    }
-    if _is_missing_text(channel_info["title"], "タイトル不明"):
-        raise ValueError(f"JFN Podsのタイトルを抽出できませんでした: {url}")
-    if _is_missing_text(channel_info["description"], "概要不明"):
-        raise ValueError(f"JFN Podsの概要を抽出できませんでした: {url}")
-
-    articles = parse_articles_from_jfn_pods_page(html, base_url=url)
-    if not articles:
-        raise ValueError(f"JFN Podsの記事を抽出できませんでした: {url}")
-    rss_xml = generate_rss_feed(channel_info, articles)
-
-    dom = xml.dom.minidom.parseString(rss_xml)
-    pretty_xml = dom.toprettyxml(indent="  ")
-    pretty_xml = "\n".join([line for line in pretty_xml.split("\n") if line.strip()])
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(pretty_xml)
+    create_rss_file(JFN_PODS, url, output_path, manifest)
 
 
 # ---------------- Bitfan (伊集院光のタネ まとめ聴き) ----------------
 def parse_channel_info_from_bitfan_updates_page(html: str) -> ChannelInfoBase:
     """Bitfanの更新ページHTMLからチャンネル情報を抽出します。"""
-    soup = BeautifulSoup(html, "html.parser")
-
-    # タイトルと説明はogタグ or 通常のmetaから取得
-    title_tag = soup.select_one("meta[property='og:title']") or soup.find("title")
-    desc_tag = soup.select_one("meta[property='og:description']") or soup.select_one(
-        "meta[name='description']"
-    )
-
-    if isinstance(title_tag, Tag):
-        raw_title = (
-            title_tag.get("content")
-            if title_tag.has_attr("content")
-            else title_tag.string
-        )
-    else:
-        raw_title = "タイトル不明"
-
-    if isinstance(desc_tag, Tag):
-        raw_desc = desc_tag.get("content") if desc_tag.has_attr("content") else ""
-    else:
-        raw_desc = ""
-
-    title = _attr_to_str(raw_title) or str(raw_title or "")
-    description = _attr_to_str(raw_desc) or str(raw_desc or "")
+    return extract_channel_info(BITFAN_UPDATES, _make_soup(html))
 
-    return {
-        "title": title.strip() if title else "タイトル不明",
-        "description": description.strip(),
-    }
 
-
-def parse_articles_from_bitfan_updates_page(html: str, base_url: str) -> List[Article]:
+def parse_articles_from_bitfan_updates_page(html: str, base_url: str) -> List[FeedItem]:
     """Bitfanの更新ページHTMLから記事リストを抽出します。
 
     対象は `section.p-clubSection` 配下のみ。各アイテムは
@@ -294,71 +537,25 @@ def parse_articles_from_bitfan_updates_page(html: str, base_url: str) -> List[Ar
     タイトルは `.p-clubMedia__name` のテキスト（NEW等のラベル除去）、
     サムネイルは `.p-clubMedia__icon img[src]` を使用します。
     """
-    soup = BeautifulSoup(html, "html.parser")
-    articles: List[Article] = []
-
-    container = soup.select_one("section.p-clubSection")
-    if not container:
-        return []
-
-    seen: set[str] = set()
-    for a in container.select("a.p-clubMedia__inner[href*='/contents/']"):
-        if not isinstance(a, Tag):
-            continue
-        href_raw = _attr_to_str(a.get("href"))
-        if not href_raw:
-            continue
-        abs_url = urljoin(base_url, href_raw)
-        if abs_url in seen:
-            continue
-        seen.add(abs_url)
-
-        # タイトル抽出（NEWラベルなどのspanは除去）
-        name_tag = a.select_one(".p-clubMedia__name")
-        title = ""
-        if isinstance(name_tag, Tag):
-            for span in name_tag.find_all("span"):
-                span.decompose()
-            title = name_tag.get_text(strip=True)
-        if not title:
-            # フォールバック：アンカー全体のテキスト
-            title = a.get_text(strip=True)
-
-        # サムネイル
-        thumb_url: Optional[str] = None
-        img_tag = a.select_one(".p-clubMedia__icon img[src]")
-        if not isinstance(img_tag, Tag):
-            img_tag = a.find("img")
-        if isinstance(img_tag, Tag):
-            src_val = _attr_to_str(img_tag.get("src"))
-            if src_val:
-                thumb_url = urljoin(base_url, src_val)
-
-        art: Article = {"title": title, "url": abs_url, "thumbnail": thumb_url}
-        articles.append(art)
-
-    return articles
-
-
-def create_bitfan_updates_rss_file(url: str, output_path: str) -> None:
-    """Bitfanの更新ページからRSSフィードを作成し、ファイルに保存します。"""
-    html = get_html(url)
+    return extract_articles(BITFAN_UPDATES, _make_soup(html), base_url)
 
-    base_info = parse_channel_info_from_bitfan_updates_page(html)
-    channel_info: ChannelInfo = {
-        "title": base_info["title"],
-        "description": base_info["description"],
-        "link": url,
-    }
 
-    articles = parse_articles_from_bitfan_updates_page(html, base_url=url)
-    rss_xml = generate_rss_feed(channel_info, articles)
+def extract_bitfan_updates_page(
+    html: str, base_url: str, *, partial: bool = False
+) -> PageData:
+    """Bitfanの更新ページHTMLを1回だけ解析し、チャンネル情報と記事リストを抽出します。"""
+    return extract_page(BITFAN_UPDATES, html, base_url, partial=partial)
 
-    # 生成されたXMLを整形する
-    dom = xml.dom.minidom.parseString(rss_xml)
-    pretty_xml = dom.toprettyxml(indent="  ")
-    # 空白行を削除
-    pretty_xml = "\n".join([line for line in pretty_xml.split("\n") if line.strip()])
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(pretty_xml)
+def prepare_bitfan_updates_feed(
+    html: str, url: str, *, partial: bool = False
+) -> FeedContent:
+    """Bitfanの更新ページHTMLからRSSフィードの内容を組み立てます。"""
+    return prepare_feed(BITFAN_UPDATES, html, url, partial=partial)
+
+
+def create_bitfan_updates_rss_file(
+    url: str, output_path: str, manifest: Optional[FeedManifest] = None
+) -> None:
+    """Bitfanの更新ページからRSSフィードを作成し、ファイルに保存します。"""
+    create_rss_file(BITFAN_UPDATES, url, output_path, manifest)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, Mapping, Optional, TypedDict
+
+from .atomic import atomic_write
+
+
+class CacheEntry(TypedDict, total=False):
+    etag: str
+    last_modified: str
+    # 前回フィードを生成したときの記事一覧部分のフィンガープリント
+    fingerprint: str
+
+
+class HttpCache:
+    """URLごとのETag/Last-Modifiedをディスクへ保存し、条件付きリクエストに使います。"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CacheEntry] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                self._entries = loaded  # type: ignore[assignment]
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """保存済みの検証子から If-None-Match / If-Modified-Since ヘッダーを組み立てます。"""
+        with self._lock:
+            entry = self._entries.get(url, {})
+        headers: Dict[str, str] = {}
+        if "etag" in entry:
+            headers["If-None-Match"] = entry["etag"]
+        if "last_modified" in entry:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def remember(self, url: str, response_headers: Mapping[str, str]) -> None:
+        """レスポンスヘッダーの ETag / Last-Modified を記録します。"""
+        entry: CacheEntry = {}
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        if etag:
+            entry["etag"] = etag
+        if last_modified:
+            entry["last_modified"] = last_modified
+        with self._lock:
+            # 検証子が毎回変わるサーバーでも、内容の比較に使えるよう残す
+            fingerprint = self._entries.get(url, {}).get("fingerprint")
+            if fingerprint is not None:
+                entry["fingerprint"] = fingerprint
+            if entry:
+                self._entries[url] = entry
+            else:
+                self._entries.pop(url, None)
+
+    def fingerprint(self, url: str) -> Optional[str]:
+        """前回フィードを生成したときのフィンガープリントを返します。"""
+        with self._lock:
+            return self._entries.get(url, {}).get("fingerprint")
+
+    def remember_fingerprint(self, url: str, fingerprint: Optional[str]) -> None:
+        """フィードを生成したページのフィンガープリントを記録します（None なら破棄します）。"""
+        with self._lock:
+            if fingerprint is not None:
+                self._entries.setdefault(url, {})["fingerprint"] = fingerprint
+            elif url in self._entries:
+                self._entries[url].pop("fingerprint", None)
+                if not self._entries[url]:
+                    del self._entries[url]
+
+    def forget(self, url: str) -> None:
+        """URLの検証子とフィンガープリントを破棄し、次回は無条件で取得・生成させます。"""
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def save(self) -> None:
+        """キャッシュをディスクへ書き出します。"""
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False, indent=2, sort_keys=True)
+        with atomic_write(self.path) as f:
+            f.write(data)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import email.utils
+import os
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Set, Tuple, TypedDict
+
+from .generate_rss import ArticleLike, ChannelInfo, FeedContent
+from .model import FeedEnclosure, FeedItem
+from .rss_writer import MEDIA_NAMESPACE
+
+# 差分更新時にフィードへ残す記事数の既定値
+DEFAULT_HISTORY_LIMIT = 200
+
+
+class PublishedFeed(TypedDict):
+    channel: ChannelInfo
+    articles: List[FeedItem]
+    # 既存記事の識別子（link と guid）
+    keys: Set[str]
+
+
+def _article_from_item(item: ET.Element) -> FeedItem:
+    pubdate = item.findtext("pubDate")
+    article = FeedItem(
+        item.findtext("title") or "",
+        item.findtext("link") or "",
+        description=item.findtext("description") or None,
+        pubdate=(
+            email.utils.parsedate_to_datetime(pubdate).isoformat() if pubdate else None
+        ),
+    )
+
+    enclosure = item.find("enclosure")
+    url = enclosure.get("url") if enclosure is not None else None
+    if enclosure is None or not url:
+        return article
+    # 音声ファイルの enclosure には media:content が付き、サムネイルは media:thumbnail にある
+    if item.find(f"{{{MEDIA_NAMESPACE}}}content") is not None:
+        article.enclosure = FeedEnclosure(
+            url, enclosure.get("length", "0"), enclosure.get("type", "")
+        )
+        thumbnail = item.find(f"{{{MEDIA_NAMESPACE}}}thumbnail")
+        if thumbnail is not None:
+            article.thumbnail = thumbnail.get("url") or None
+    else:
+        article.thumbnail = url
+    return article
+
+
+def load_published_feed(path: str) -> Optional[PublishedFeed]:
+    """公開済みのRSSファイルを読み込み、チャンネル情報と記事リストに戻します。
+
+    ファイルが無い場合は None を返します。
+    """
+    if not os.path.exists(path):
+        return None
+    channel_el = ET.parse(path).getroot().find("channel")
+    if channel_el is None:
+        raise ValueError(f"RSSのchannel要素が見つかりませんでした: {path}")
+    channel: ChannelInfo = {
+        "title": channel_el.findtext("title") or "",
+        "description": channel_el.findtext("description") or "",
+        "link": channel_el.findtext("link") or "",
+    }
+    articles: List[FeedItem] = []
+    keys: Set[str] = set()
+    for item in channel_el.findall("item"):
+        article = _article_from_item(item)
+        articles.append(article)
+        keys.add(article["url"])
+        guid = item.findtext("guid")
+        if guid:
+            keys.add(guid)
+    return {"channel": channel, "articles": articles, "keys": keys}
+
+
+def merge_feed(
+    fresh: FeedContent,
+    published: Optional[PublishedFeed],
+    history_limit: int = DEFAULT_HISTORY_LIMIT,
+) -> Tuple[FeedContent, int]:
+    """新しく見つかった記事だけを公開済みフィードの先頭に追加します。
+
+    既存の記事はリンク（またはguid）で照合し、公開済みの内容をそのまま残します。
+    記事数は `history_limit` 件までに切り詰め、追加した記事数を併せて返します。
+    """
+    if published is None:
+        articles = fresh["articles"][:history_limit]
+        return {"channel": fresh["channel"], "articles": articles}, len(articles)
+
+    known = set(published["keys"])
+    new_articles: List[ArticleLike] = []
+    for article in fresh["articles"]:
+        if article["url"] in known:
+            continue
+        known.add(article["url"])
+        new_articles.append(article)
+
+    merged = (new_articles + published["articles"])[:history_limit]
+    return {"channel": fresh["channel"], "articles": merged}, len(new_articles)
+
+
+def is_unchanged(
+    fresh: FeedContent, published: Optional[PublishedFeed], new_count: int
+) -> bool:
+    """新しい記事が無く、チャンネル情報も公開済みと同じかを判定します。"""
+    return (
+        published is not None
+        and new_count == 0
+        and published["channel"] == fresh["channel"]
+    )
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, TypedDict
+
+from .model import FeedChannel, FeedEnclosure, FeedItem
+
+if TYPE_CHECKING:
+    from .generate_rss import FeedContent
+
+# 1回の問い合わせで IN (...) に渡すURLの数（SQLiteの変数の上限より小さくする）
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    feed TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    link TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    feed TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    thumbnail TEXT,
+    description TEXT,
+    pubdate TEXT,
+    enclosure_url TEXT,
+    enclosure_length TEXT,
+    enclosure_type TEXT,
+    -- 初めて見つけた時刻（Unix時間）と、そのときの一覧ページ上の順番
+    first_seen REAL NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (feed, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_feed_first_seen
+    ON items (feed, first_seen DESC, position);
+CREATE INDEX IF NOT EXISTS items_first_seen ON items (first_seen);
+CREATE TABLE IF NOT EXISTS title_history (
+    feed TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    -- この見出しが新しい見出しに置き換わった時刻
+    replaced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS title_history_item ON title_history (feed, url);
+"""
+
+_ITEM_COLUMNS = (
+    "url, title, thumbnail, description, pubdate,"
+    " enclosure_url, enclosure_length, enclosure_type"
+)
+
+_UPSERT_ITEM = f"""
+INSERT INTO items (feed, {_ITEM_COLUMNS}, first_seen, position)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (feed, url) DO UPDATE SET
+    title = excluded.title,
+    thumbnail = excluded.thumbnail,
+    description = excluded.description,
+    pubdate = excluded.pubdate,
+    enclosure_url = excluded.enclosure_url,
+    enclosure_length = excluded.enclosure_length,
+    enclosure_type = excluded.enclosure_type
+"""
+
+
+class UpsertResult(TypedDict):
+    new_items: int
+    # 見出しなどが変わった既存の記事の数
+    updated_items: int
+    channel_changed: bool
+
+
+def _item_from_row(row: Sequence[Optional[str]]) -> FeedItem:
+    url, title, thumbnail, description, pubdate, media_url, length, media_type = row
+    enclosure = None
+    if media_url is not None:
+        enclosure = FeedEnclosure(media_url, length or "0", media_type or "")
+    return FeedItem(
+        title or "",
+        url or "",
+        thumbnail=thumbnail,
+        description=description,
+        pubdate=pubdate,
+        enclosure=enclosure,
+    )
+
+
+def _merge_item(stored: FeedItem, fresh: FeedItem) -> FeedItem:
+    # 差分更新では詳細ページを読まないため、一覧から取れなかった項目は保存済みの値を残す
+    return FeedItem(
+        fresh.title,
+        fresh.url,
+        thumbnail=fresh.thumbnail if fresh.thumbnail is not None else stored.thumbnail,
+        description=(
+            fresh.description if fresh.description is not None else stored.description
+        ),
+        pubdate=fresh.pubdate if fresh.pubdate is not None else stored.pubdate,
+        enclosure=fresh.enclosure if fresh.enclosure is not None else stored.enclosure,
+    )
+
+
+class ItemStore:
+    """フィードごとの記事を (フィード名, URL) で保存するSQLiteのデータベース。
+
+    記事を初めて見つけた時刻と、変わる前の見出しを残します。フィードは保存済みの記事から
+    インデックスを使って組み立てられるため、HTMLを取得し直さずに書き出し直せます。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # 取得スレッドと書き出し側の両方から使うため、ロックで直列化する
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def has_feed(self, feed: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM channels WHERE feed = ?", (feed,)
+            ).fetchone()
+        return row is not None
+
+    def known_urls(self, feed: str) -> Set[str]:
+        """フィードに保存済みの記事URLを返します。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM items WHERE feed = ?", (feed,)
+            ).fetchall()
+        return {url for (url,) in rows}
+
+    def _stored_items(self, feed: str, urls: Sequence[str]) -> Dict[str, FeedItem]:
+        stored: Dict[str, FeedItem] = {}
+        for start in range(0, len(urls), _QUERY_CHUNK):
+            chunk = urls[start : start + _QUERY_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT {_ITEM_COLUMNS} FROM items"
+                f" WHERE feed = ? AND url IN ({placeholders})",
+                (feed, *chunk),
+            )
+            for row in rows:
+                item = _item_from_row(row)
+                stored[item.url] = item
+        return stored
+
+    def upsert(
+        self, feed: str, content: FeedContent, seen_at: Optional[float] = None
+    ) -> UpsertResult:
+        """抽出したチャンネル情報と記事を1回のトランザクションでまとめて保存します。
+
+        新しい記事は `seen_at`（省略時は現在時刻）を初めて見つけた時刻として記録します。
+        既存の記事は一覧から取れた項目だけを更新し、見出しが変わった場合は元の見出しを
+        履歴に残します。
+        """
+        now = time.time() if seen_at is None else seen_at
+        channel = FeedChannel.from_info(content["channel"])
+        fresh: Dict[str, FeedItem] = {}
+        for article in content["articles"]:
+            item = FeedItem.from_article(article)
+            fresh.setdefault(item.url, item)
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT title, description, link FROM channels WHERE feed = ?", (feed,)
+            ).fetchone()
+            channel_changed = row != (channel.title, channel.description, channel.link)
+            if channel_changed:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO channels (feed, title, description, link)"
+                    " VALUES (?, ?, ?, ?)",
+                    (feed, channel.title, channel.description, channel.link),
+                )
+
+            stored = self._stored_items(feed, list(fresh))
+            rows = []
+            replaced_titles = []
+            new_count = 0
+            for position, (url, item) in enumerate(fresh.items()):
+                previous = stored.get(url)
+                if previous is None:
+                    new_count += 1
+                else:
+                    item = _merge_item(previous, item)
+                    if item == previous:
+                        continue
+                    if item.title != previous.title:
+                        replaced_titles.append((feed, url, previous.title, now))
+                enclosure = item.enclosure
+                rows.append(
+                    (
+                        feed,
+                        url,
+                        item.title,
+                        item.thumbnail,
+                        item.description,
+                        item.pubdate,
+                        enclosure.url if enclosure is not None else None,
+                        enclosure.length if enclosure is not None else None,
+                        enclosure.type if enclosure is not None else None,
+                        now,
+                        position,
+                    )
+                )
+            self._conn.executemany(_UPSERT_ITEM, rows)
+            self._conn.executemany(
+                "INSERT INTO title_history (feed, url, title, replaced_at)"
+                " VALUES (?, ?, ?, ?)",
+                replaced_titles,
+            )
+        return {
+            "new_items": new_count,
+            "updated_items": len(rows) - new_count,
+            "channel_changed": channel_changed,
+        }
+
+    def feed_content(self, feed: str, limit: Optional[int] = None) -> Optional[FeedContent]:
+        """保存済みの記事を新しく見つけた順に最大 `limit` 件返します。
+
+        フィードを保存していない場合は None を返します。
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, description, link FROM channels WHERE feed = ?", (feed,)
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._conn.execute(
+                f"SELECT {_ITEM_COLUMNS} FROM items WHERE feed = ?"
+                " ORDER BY first_seen DESC, position LIMIT ?",
+                (feed, -1 if limit is None else limit),
+            ).fetchall()
+        title, description, link = row
+        return {
+            "channel": {"title": title, "description": description, "link": link},
+            "articles": [_item_from_row(item) for item in rows],
+        }
+
+    def first_seen(self, feed: str, url: str) -> Optional[float]:
+        """記事を初めて見つけた時刻（Unix時間）を返します。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT first_seen FROM items WHERE feed = ? AND url = ?", (feed, url)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def title_history(self, feed: str, url: str) -> List[str]:
+        """記事の過去の見出しを古い順に返します（現在の見出しは含みません）。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title FROM title_history WHERE feed = ? AND url = ?"
+                " ORDER BY replaced_at, rowid",
+                (feed, url),
+            ).fetchall()
+        return [title for (title,) in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Mapping, Optional, Sequence
+
+from .atomic import atomic_write
+
+
+def _plain(value: object) -> object:
+    # FeedItem などの Mapping は、同じ内容の dict と同じJSONにする
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def content_hash(
+    channel_info: Mapping[str, object], articles: Sequence[Mapping[str, object]]
+) -> str:
+    """チャンネル情報と記事リストの正規化したJSONからハッシュ値を計算します。
+
+    lastBuildDate のような生成時刻は含めないため、内容が同じなら同じ値になります。
+    """
+    canonical = json.dumps(
+        {"channel": channel_info, "articles": list(articles)},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_plain,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class FeedManifest:
+    """出力ファイルごとに、最後に書き出した内容のハッシュ値を保存します。
+
+    配信サーバーでは複数のフィードを並行して生成し直すため、スレッドセーフにしています。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                self._hashes = loaded  # type: ignore[assignment]
+
+    def get(self, output_path: str) -> Optional[str]:
+        with self._lock:
+            return self._hashes.get(output_path)
+
+    def set(self, output_path: str, digest: str) -> None:
+        with self._lock:
+            self._hashes[output_path] = digest
+
+    def is_current(self, output_path: str, digest: str) -> bool:
+        """出力ファイルが存在し、前回書き出した内容と同じかを判定します。"""
+        return self.get(output_path) == digest and os.path.exists(output_path)
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps(self._hashes, ensure_ascii=False, indent=2, sort_keys=True)
+        with atomic_write(self.path) as f:
+            f.write(data)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import datetime
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NotRequired, Optional, TextIO, TypedDict
+
+from .atomic import atomic_write
+
+_PREFIX = "rss_maker"
+
+# 記事数・バイト数・キャッシュヒット数など、フィードごとに数える項目の説明
+COUNTER_HELP: Dict[str, str] = {
+    "bytes_fetched": "Listing HTML bytes received on the wire, before gzip/br decoding.",
+    "items": "Number of articles extracted for the feed.",
+    "new_items": "Number of articles not yet in the published feed.",
+    "pages_fetched": "Number of listing pages fetched, including the first page.",
+    "page_failures": "Later listing pages that failed, ending the crawl early.",
+    "http_cache_hits": "Listing fetches answered with 304 Not Modified.",
+    "fingerprint_hits": "Listing pages skipped because their fingerprint was unchanged.",
+    "detail_cache_hits": "Articles enriched from the detail cache.",
+    "detail_fetches": "Detail pages fetched for enrichment.",
+    "detail_failures": "Detail pages that could not be fetched or extracted.",
+}
+
+
+class FeedRecord(TypedDict):
+    feed: str
+    ok: bool
+    # 各ステージ（fetch / fingerprint / parse / crawl / enrich / merge / write）の所要秒数
+    durations: Dict[str, float]
+    counters: Dict[str, float]
+    http_status: NotRequired[int]
+    outcome: NotRequired[str]
+
+
+class FeedMetrics:
+    """1つのフィードについて、ステージごとの所要時間とカウンタを集めます。"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._durations: Dict[str, float] = {}
+        self._counters: Dict[str, float] = {}
+        self._http_status: Optional[int] = None
+        self._outcome: Optional[str] = None
+        self._ok = True
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """`with` ブロックの所要時間をステージ `name` に加算します。"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_duration(name, time.perf_counter() - start)
+
+    def add_duration(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._durations[name] = self._durations.get(name, 0.0) + seconds
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def set_http_status(self, status: int) -> None:
+        """HTTPステータスを記録します。
+
+        最初に受け取ったレスポンス（記事一覧の1ページ目）のものを残し、ページ送りで
+        読んだ以降のページでは上書きしません。
+        """
+        with self._lock:
+            if self._http_status is None:
+                self._http_status = status
+
+    def finish(self, ok: bool, outcome: str) -> None:
+        """フィードの成否と結果（written / unchanged / not_modified / error）を記録します。"""
+        with self._lock:
+            self._ok = ok
+            self._outcome = outcome
+
+    def record(self) -> FeedRecord:
+        with self._lock:
+            record: FeedRecord = {
+                "feed": self.name,
+                "ok": self._ok,
+                "durations": dict(self._durations),
+                "counters": dict(self._counters),
+            }
+            if self._http_status is not None:
+                record["http_status"] = self._http_status
+            if self._outcome is not None:
+                record["outcome"] = self._outcome
+        return record
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRecorder:
+    """ビルド全体のメトリクスを保持し、JSONログやPrometheus形式で書き出します。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._feeds: Dict[str, FeedMetrics] = {}
+        self.started_at = time.time()
+
+    def feed(self, name: str) -> FeedMetrics:
+        with self._lock:
+            metrics = self._feeds.get(name)
+            if metrics is None:
+                metrics = FeedMetrics(name)
+                self._feeds[name] = metrics
+            return metrics
+
+    def records(self) -> List[FeedRecord]:
+        with self._lock:
+            feeds = list(self._feeds.values())
+        return [metrics.record() for metrics in feeds]
+
+    def write_json_lines(self, out: TextIO) -> None:
+        """フィードごとに1行のJSONログを書き出します。"""
+        timestamp = datetime.datetime.fromtimestamp(
+            self.started_at, tz=datetime.timezone.utc
+        ).isoformat()
+        for record in self.records():
+            line = {"event": "feed_metrics", "timestamp": timestamp, **record}
+            out.write(json.dumps(line, ensure_ascii=False, sort_keys=True) + "\n")
+
+    def render_prometheus(self, *, openmetrics: bool = False) -> str:
+        """Prometheusのテキスト形式（`openmetrics=True` ならOpenMetrics形式）で返します。"""
+        records = self.records()
+        lines: List[str] = []
+
+        def family(name: str, help_text: str) -> None:
+            lines.append(f"# HELP {_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {_PREFIX}_{name} gauge")
+
+        family("stage_duration_seconds", "Duration of each pipeline stage per feed.")
+        for record in records:
+            for stage, seconds in sorted(record["durations"].items()):
+                lines.append(
+                    f'{_PREFIX}_stage_duration_seconds{{feed="{_label(record["feed"])}",'
+                    f'stage="{_label(stage)}"}} {_number(seconds)}'
+                )
+        for counter, help_text in COUNTER_HELP.items():
+            family(f"feed_{counter}", help_text)
+            for record in records:
+                if counter in record["counters"]:
+                    value = record["counters"][counter]
+                    lines.append(
+                        f'{_PREFIX}_feed_{counter}{{feed="{_label(record["feed"])}"}}'
+                        f" {_number(value)}"
+                    )
+        family("feed_http_status", "HTTP status of the listing page fetch.")
+        for record in records:
+            if "http_status" in record:
+                lines.append(
+                    f'{_PREFIX}_feed_http_status{{feed="{_label(record["feed"])}"}}'
+                    f' {record["http_status"]}'
+                )
+        family("feed_ok", "1 if the feed was built without errors.")
+        for record in records:
+            lines.append(
+                f'{_PREFIX}_feed_ok{{feed="{_label(record["feed"])}"}}'
+                f" {1 if record['ok'] else 0}"
+            )
+        family("last_run_timestamp_seconds", "Unix time the build started.")
+        lines.append(f"{_PREFIX}_last_run_timestamp_seconds {_number(self.started_at)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_textfile(self, path: str, *, openmetrics: bool = False) -> None:
+        """node_exporter の textfile collector が読めるよう、アトミックに書き出します。"""
+        text = self.render_prometheus(openmetrics=openmetrics)
+        with atomic_write(path) as f:
+            f.write(text)
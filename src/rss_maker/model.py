@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import datetime
+from collections.abc import Iterator, Mapping, MutableMapping
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# 値が無い場合はキー自体を持たない項目（TypedDict の NotRequired と同じ）
+_OPTIONAL_ITEM_KEYS = ("description", "pubdate", "enclosure")
+_ITEM_KEYS = ("title", "url", "thumbnail", *_OPTIONAL_ITEM_KEYS)
+
+
+def _require_str(kind: str, mapping: Mapping[str, object], key: str) -> str:
+    value = mapping.get(key)
+    if not isinstance(value, str):
+        raise ValueError(f"{kind}の{key}は文字列で指定してください: {value!r}")
+    return value
+
+
+def _optional_str(kind: str, mapping: Mapping[str, object], key: str) -> Optional[str]:
+    if mapping.get(key) is None:
+        return None
+    return _require_str(kind, mapping, key)
+
+
+def _check_pubdate(value: Optional[str]) -> Optional[str]:
+    # 書き出し時に失敗しないよう、公開日時は受け取った時点で検証する
+    if value is not None:
+        try:
+            datetime.datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"記事のpubdateはISO 8601で指定してください: {value}") from None
+    return value
+
+
+def _check_enclosure(value: object) -> Optional[FeedEnclosure]:
+    if value is None:
+        return None
+    if not isinstance(value, Mapping):
+        raise ValueError(f"記事のenclosureは辞書で指定してください: {value!r}")
+    return FeedEnclosure.from_mapping(value)
+
+
+@dataclass(slots=True, eq=False)
+class FeedEnclosure(Mapping[str, Any]):
+    """音声などの実ファイル。`Enclosure`（TypedDict）と同じキーで読めます。"""
+
+    url: str
+    length: str
+    type: str
+
+    @classmethod
+    def from_mapping(cls, value: Mapping[str, object]) -> FeedEnclosure:
+        if isinstance(value, FeedEnclosure):
+            return value
+        return cls(
+            _require_str("enclosure", value, "url"),
+            _require_str("enclosure", value, "length"),
+            _require_str("enclosure", value, "type"),
+        )
+
+    def __getitem__(self, key: str) -> str:
+        if key in ("url", "length", "type"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("url", "length", "type"))
+
+    def __len__(self) -> int:
+        return 3
+
+
+@dataclass(slots=True, eq=False)
+class FeedItem(MutableMapping[str, Any]):
+    """抽出時に一度だけ検証した記事。
+
+    `Article`（TypedDict）と同じキーで読み書きでき、dict と比較すると同じ内容なら
+    等しくなります。キーで書き込んだ値も作成時と同じく検証します。辞書より小さく、
+    RSSの書き出しでは型の確認や変換をせずにそのまま使えます。JSONなどへ渡す場合は
+    `to_dict()` で辞書にします。
+    """
+
+    title: str
+    url: str
+    thumbnail: Optional[str] = None
+    description: Optional[str] = None
+    # 公開日時（ISO 8601）
+    pubdate: Optional[str] = None
+    enclosure: Optional[FeedEnclosure] = None
+
+    def __post_init__(self) -> None:
+        _check_pubdate(self.pubdate)
+
+    @property
+    def published(self) -> Optional[datetime.datetime]:
+        """公開日時を解釈した日時。記事ごとに保持するとメモリが増えるため都度解釈します。"""
+        return datetime.datetime.fromisoformat(self.pubdate) if self.pubdate else None
+
+    @classmethod
+    def from_article(cls, article: Mapping[str, object]) -> FeedItem:
+        """記事の辞書を検証して FeedItem にします。FeedItem はそのまま返します。"""
+        if isinstance(article, FeedItem):
+            return article
+        unknown = [key for key in article if key not in _ITEM_KEYS]
+        if unknown:
+            raise ValueError(f"記事に不明な項目があります: {', '.join(unknown)}")
+        return cls(
+            _require_str("記事", article, "title"),
+            _require_str("記事", article, "url"),
+            _optional_str("記事", article, "thumbnail"),
+            _optional_str("記事", article, "description"),
+            _optional_str("記事", article, "pubdate"),
+            _check_enclosure(article.get("enclosure")),
+        )
+
+    def __reduce__(self) -> tuple[type[FeedItem], tuple[object, ...]]:
+        # 解析用のプロセスから受け渡すときに、既定より小さく直列化する
+        return (
+            FeedItem,
+            (
+                self.title,
+                self.url,
+                self.thumbnail,
+                self.description,
+                self.pubdate,
+                self.enclosure,
+            ),
+        )
+
+    def to_dict(self) -> dict[str, object]:
+        """`Article` と同じ形の辞書を返します。json.dumps などにそのまま渡せます。"""
+        article = dict(self)
+        if self.enclosure is not None:
+            article["enclosure"] = dict(self.enclosure)
+        return article
+
+    def __getitem__(self, key: str) -> Any:
+        if key in ("title", "url", "thumbnail"):
+            return getattr(self, key)
+        if key in _OPTIONAL_ITEM_KEYS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _ITEM_KEYS:
+            raise ValueError(f"記事に不明な項目があります: {key}")
+        checked = {key: value}
+        if key in ("title", "url"):
+            setattr(self, key, _require_str("記事", checked, key))
+        elif key == "enclosure":
+            self.enclosure = _check_enclosure(value)
+        else:
+            text = _optional_str("記事", checked, key)
+            setattr(self, key, _check_pubdate(text) if key == "pubdate" else text)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in _OPTIONAL_ITEM_KEYS:
+            raise ValueError(f"記事の{key}は削除できません")
+        if getattr(self, key) is None:
+            raise KeyError(key)
+        setattr(self, key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        yield "title"
+        yield "url"
+        yield "thumbnail"
+        for key in _OPTIONAL_ITEM_KEYS:
+            if getattr(self, key) is not None:
+                yield key
+
+    def __len__(self) -> int:
+        return 3 + sum(getattr(self, key) is not None for key in _OPTIONAL_ITEM_KEYS)
+
+
+@dataclass(slots=True, eq=False)
+class FeedChannel(Mapping[str, Any]):
+    """検証済みのチャンネル情報。`ChannelInfo`（TypedDict）と同じキーで読めます。"""
+
+    title: str
+    description: str
+    link: str
+
+    @classmethod
+    def from_info(cls, info: Mapping[str, object]) -> FeedChannel:
+        if isinstance(info, FeedChannel):
+            return info
+        return cls(
+            _require_str("チャンネル情報", info, "title"),
+            _require_str("チャンネル情報", info, "description"),
+            _require_str("チャンネル情報", info, "link"),
+        )
+
+    def __getitem__(self, key: str) -> str:
+        if key in ("title", "description", "link"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("title", "description", "link"))
+
+    def __len__(self) -> int:
+        return 3
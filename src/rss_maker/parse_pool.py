@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from bs4 import BeautifulSoup
+
+from . import generate_rss
+from .extractor import get_extractor
+from .sites import SiteAdapter
+
+# 解析するページ（サイトアダプタ・HTML・リンクを解決する基準URL）
+ParseJob = Tuple[SiteAdapter, str, str]
+
+# 1回にワーカーへ送るページ数を、ワーカーあたりこの回数に分けて送る
+_CHUNKS_PER_WORKER = 4
+
+
+class _InlineExecutor(Executor):
+    """submitされた関数をその場で実行するExecutor（プロセスプールを使わない場合用）。"""
+
+    def submit(self, fn, /, *args, **kwargs):  # type: ignore[override]
+        future: Future[object] = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def _init_worker(parser_backend: str, adapters: Sequence[SiteAdapter]) -> None:
+    """ワーカーの起動時に、最初のページより前にパーサーとセレクタを読み込んでおきます。"""
+    generate_rss.set_parser_backend(parser_backend)
+    # bs4 のツリービルダー（lxml など）は最初の解析で読み込まれるため、空のページで済ませる
+    BeautifulSoup("<html></html>", parser_backend)
+    for adapter in adapters:
+        get_extractor(adapter)
+
+
+def make_parse_pool(
+    workers: Optional[int] = None,
+    parser_backend: Optional[str] = None,
+    adapters: Iterable[SiteAdapter] = (),
+) -> Executor:
+    """解析用のプロセスプールを作ります。`workers=0` の場合は呼び出し元で解析します。
+
+    ワーカーは `parser_backend`（省略時は現在のバックエンド）と `adapters` のセレクタを
+    読み込んだ状態で起動します。取得スレッドが動いている最中にforkしないよう、spawnで
+    起動します。
+    """
+    if workers == 0:
+        return _InlineExecutor()
+    backend = parser_backend or generate_rss.get_parser_backend()
+    return ProcessPoolExecutor(
+        max_workers=max(workers or os.cpu_count() or 1, 1),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(backend, tuple(adapters)),
+    )
+
+
+def make_feed_parse_pool(
+    parse_workers: Optional[int],
+    feed_count: int,
+    parser_backend: Optional[str] = None,
+    adapters: Iterable[SiteAdapter] = (),
+) -> Executor:
+    """`feed_count` 件のフィードを解析するためのプールを作ります。
+
+    `parse_workers` を省略するとフィード数とCPU数の小さい方、0 なら呼び出し元で解析します。
+    """
+    if parse_workers == 0:
+        return make_parse_pool(0)
+    workers = parse_workers or min(feed_count, os.cpu_count() or 1)
+    return make_parse_pool(max(workers, 1), parser_backend, adapters)
+
+
+def _extract_job(job: ParseJob, partial: bool) -> generate_rss.PageData:
+    adapter, html, url = job
+    return generate_rss.extract_page(adapter, html, url, partial=partial)
+
+
+def parse_pages(
+    jobs: Sequence[ParseJob],
+    *,
+    pool: Optional[Executor] = None,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    partial: bool = False,
+) -> List[generate_rss.PageData]:
+    """多数のページをプロセスプールでまとめて解析し、入力順に結果を返します。
+
+    ページは `chunksize` 件ずつ（省略時はワーカーあたり数回に分けて）ワーカーへ送ります。
+    結果は BeautifulSoup を含まない辞書と FeedItem だけなので、小さく直列化されます。
+    `pool` を渡すと起動済みのプールを使い、省略すると `workers` 個のワーカーで
+    一時的なプールを作ります。いずれかのページで失敗した場合はその例外を送出します。
+    """
+    if not jobs:
+        return []
+    if chunksize is None:
+        count = workers or os.cpu_count() or 1
+        chunksize = max(1, len(jobs) // (count * _CHUNKS_PER_WORKER))
+    adapters = {adapter["name"]: adapter for adapter, _, _ in jobs}
+    with (
+        nullcontext(pool)
+        if pool is not None
+        else make_parse_pool(workers, adapters=adapters.values())
+    ) as executor:
+        return list(
+            executor.map(
+                functools.partial(_extract_job, partial=partial), jobs, chunksize=chunksize
+            )
+        )
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import datetime
+import email.utils
+import mimetypes
+import re
+from io import StringIO
+from typing import List, Mapping, Optional, Sequence, TextIO, Tuple
+
+from feedgenerator.django.utils.encoding import (  # type: ignore[reportMissingTypeStubs]
+    iri_to_uri,
+)
+from feedgenerator.django.utils.xmlutils import (  # type: ignore[reportMissingTypeStubs]
+    UnserializableContentError,
+)
+
+from .model import FeedChannel, FeedItem
+
+# XML 1.0 で表現できない制御文字（feedgeneratorと同じ判定）
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0B-\x0C\x0E-\x1F]")
+_INDENT = "  "
+# 音声ファイルのある記事で、enclosure とサムネイルを区別して残すための Media RSS
+MEDIA_NAMESPACE = "http://search.yahoo.com/mrss/"
+
+
+def _check_content(text: str) -> None:
+    if text and _CONTROL_CHARS.search(text):
+        raise UnserializableContentError(
+            "Control characters are not supported in XML 1.0"
+        )
+
+
+def _escape_text(text: str) -> str:
+    # 従来はXMLを再パースしていたため、改行コードはLFに正規化される
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _escape_attr(text: str) -> str:
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    text = text.replace('"', "&quot;")
+    return text.replace("\r", "&#13;").replace("\n", "&#10;").replace("\t", "&#9;")
+
+
+def guess_mime_type(url: str) -> str:
+    """URLからRSS enclosure用のMIME typeを推定する。"""
+    mime_type, _ = mimetypes.guess_type(url)
+    return mime_type or "application/octet-stream"
+
+
+def rfc2822_date(date: datetime.datetime) -> str:
+    return email.utils.format_datetime(date)
+
+
+class _NonBlankLineWriter:
+    """空白だけの行を捨てながら、行を改行で連結して書き出すラッパー。
+
+    minidomの整形結果から空白行を取り除いていた従来の出力と同じ形になる。
+    """
+
+    def __init__(self, out: TextIO) -> None:
+        self._out = out
+        self._pending = ""
+        self._first = True
+
+    def write(self, text: str) -> None:
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        kept = [line for line in lines if line.strip()]
+        if not kept:
+            return
+        # 残す行をまとめて1回で書き出す
+        self._out.write(("" if self._first else "\n") + "\n".join(kept))
+        self._first = False
+
+    def _emit(self, line: str) -> None:
+        if not line.strip():
+            return
+        if not self._first:
+            self._out.write("\n")
+        self._out.write(line)
+        self._first = False
+
+    def close(self) -> None:
+        self._emit(self._pending)
+        self._pending = ""
+
+
+def _enclosure_attrs(item: FeedItem) -> List[Tuple[str, str]]:
+    if item.enclosure is not None:
+        return [
+            ("length", item.enclosure.length),
+            ("type", item.enclosure.type),
+            ("url", iri_to_uri(item.enclosure.url)),
+        ]
+    if item.thumbnail:
+        return [
+            ("length", "0"),
+            ("type", guess_mime_type(item.thumbnail)),
+            ("url", iri_to_uri(item.thumbnail)),
+        ]
+    return []
+
+
+def _media_xml(item: FeedItem) -> str:
+    """音声ファイルのある記事は、enclosure がサムネイルでないことを media:content で示します。
+
+    enclosure に入らないサムネイルは media:thumbnail に残し、差分更新で読み戻せるようにします。
+    """
+    if item.enclosure is None:
+        return ""
+    parts = [
+        xml_element(
+            3,
+            "media:content",
+            attrs=[
+                ("type", item.enclosure.type),
+                ("url", iri_to_uri(item.enclosure.url)),
+            ],
+        )
+    ]
+    if item.thumbnail:
+        parts.append(
+            xml_element(3, "media:thumbnail", attrs=[("url", iri_to_uri(item.thumbnail))])
+        )
+    return "".join(parts)
+
+
+def latest_pubdate(
+    articles: Sequence[Mapping[str, object]],
+) -> Optional[datetime.datetime]:
+    """記事の公開日時のうち最新のものを返します（feedgeneratorのlastBuildDateと同じ）。"""
+    dates = [
+        item.published
+        for item in map(FeedItem.from_article, articles)
+        if item.published is not None
+    ]
+    return max(dates) if dates else None
+
+
+def xml_element(
+    depth: int,
+    name: str,
+    text: Optional[str] = None,
+    attrs: Sequence[Tuple[str, str]] = (),
+) -> str:
+    """インデント付きの1行のXML要素を返します（テキストが空なら空要素）。"""
+    for _, value in attrs:
+        _check_content(value)
+    attr_text = "".join(f' {key}="{_escape_attr(value)}"' for key, value in attrs)
+    indent = _INDENT * depth
+    if text:
+        _check_content(text)
+        return f"{indent}<{name}{attr_text}>{_escape_text(text)}</{name}>\n"
+    return f"{indent}<{name}{attr_text}/>\n"
+
+
+def _item_xml(item: FeedItem) -> str:
+    parts = [
+        f"{_INDENT * 2}<item>\n",
+        xml_element(3, "title", item.title),
+        xml_element(3, "link", iri_to_uri(item.url)),
+        xml_element(3, "description", item.description or ""),
+    ]
+    if item.published is not None:
+        parts.append(xml_element(3, "pubDate", rfc2822_date(item.published)))
+    enclosure = _enclosure_attrs(item)
+    if enclosure:
+        parts.append(xml_element(3, "enclosure", attrs=enclosure))
+    parts.append(_media_xml(item))
+    parts.append(f"{_INDENT * 2}</item>\n")
+    return "".join(parts)
+
+
+def write_rss(
+    channel_info: Mapping[str, object],
+    articles: Sequence[Mapping[str, object]],
+    out: TextIO,
+    *,
+    last_build_date: Optional[datetime.datetime] = None,
+) -> None:
+    """RSS 2.0 を整形済みの形で `out` へ直接書き出します。
+
+    出力は feedgenerator で生成したXMLを minidom で整形し、空白行を除いた
+    従来の出力とバイト単位で一致します。
+    """
+    # FeedItem / FeedChannel はそのまま使い、辞書はここで一度だけ検証する
+    channel = FeedChannel.from_info(channel_info)
+    items = [FeedItem.from_article(article) for article in articles]
+    writer = _NonBlankLineWriter(out)
+    build_date = (
+        last_build_date
+        or latest_pubdate(items)
+        or datetime.datetime.now(tz=datetime.timezone.utc)
+    )
+
+    writer.write('<?xml version="1.0" ?>\n')
+    # サムネイルだけのフィードは従来の出力のまま、名前空間を増やさない
+    media = (
+        f' xmlns:media="{MEDIA_NAMESPACE}"'
+        if any(item.enclosure is not None for item in items)
+        else ""
+    )
+    writer.write(
+        f'<rss xmlns:atom="http://www.w3.org/2005/Atom"{media} version="2.0">\n'
+    )
+    writer.write(f"{_INDENT}<channel>\n")
+    writer.write(xml_element(2, "title", channel.title))
+    writer.write(xml_element(2, "link", iri_to_uri(channel.link)))
+    writer.write(xml_element(2, "description", channel.description))
+    writer.write(xml_element(2, "lastBuildDate", rfc2822_date(build_date)))
+
+    for item in items:
+        # 記事ごとにまとめて書き出す
+        writer.write(_item_xml(item))
+
+    writer.write(f"{_INDENT}</channel>\n")
+    writer.write("</rss>\n")
+    writer.close()
+
+
+def render_rss(
+    channel_info: Mapping[str, object],
+    articles: Sequence[Mapping[str, object]],
+    *,
+    last_build_date: Optional[datetime.datetime] = None,
+) -> str:
+    """write_rss と同じ整形済みRSSを文字列として返します。"""
+    buffer = StringIO()
+    write_rss(channel_info, articles, buffer, last_build_date=last_build_date)
+    return buffer.getvalue()
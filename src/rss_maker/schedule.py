@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, NotRequired, Optional, Sequence, Tuple, TypedDict
+
+from .atomic import atomic_write
+
+if TYPE_CHECKING:
+    # build は requests や bs4 を読み込むため、期限の判定だけなら読み込まない
+    from .build import FeedResult, FeedSpec
+
+# フィードごとの取得間隔（秒）の既定値
+DEFAULT_INTERVAL = 60 * 60
+# 更新が無いたびに間隔を伸ばす倍率
+BACKOFF_FACTOR = 1.5
+
+
+class FeedState(TypedDict):
+    # 現在の取得間隔と、次に取得する時刻（Unix時間）
+    interval: float
+    next_run: float
+    last_run: NotRequired[float]
+    # 最後に新しい記事を書き出した時刻
+    last_published: NotRequired[float]
+
+
+class ScheduleState:
+    """フィードごとの取得間隔と次回の取得時刻を保存します。
+
+    `path` を省略した場合はメモリ上だけで保持します。
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, FeedState] = {}
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                self._entries = loaded  # type: ignore[assignment]
+
+    def get(self, name: str) -> Optional[FeedState]:
+        with self._lock:
+            return self._entries.get(name)
+
+    def set(self, name: str, state: FeedState) -> None:
+        with self._lock:
+            self._entries[name] = state
+
+    def save(self) -> None:
+        """状態をディスクへ書き出します。"""
+        if self.path is None:
+            return
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False, indent=2, sort_keys=True)
+        with atomic_write(self.path) as f:
+            f.write(data)
+
+
+def interval_bounds(spec: FeedSpec) -> Tuple[float, float, float]:
+    """フィードの（基準, 最短, 最長）の取得間隔を返します。"""
+    base = spec.get("interval", DEFAULT_INTERVAL)
+    lower = spec.get("min_interval", base / 4)
+    upper = spec.get("max_interval", base * 8)
+    if not 0 < lower <= base <= upper:
+        raise ValueError(
+            f"取得間隔は 0 < min_interval <= interval <= max_interval で指定してください: "
+            f"{spec['name']}"
+        )
+    return base, lower, upper
+
+
+def published_new_items(result: FeedResult) -> bool:
+    """ビルド結果が、新しい内容を書き出したものかを判定します。"""
+    if not result["ok"] or result.get("not_modified") or result.get("unchanged"):
+        return False
+    return result.get("new_items", 1) > 0
+
+
+def next_interval(spec: FeedSpec, current: float, result: FeedResult) -> float:
+    """ビルド結果から次の取得間隔を決めます。
+
+    新しい記事を書き出した直後は続報や修正が出やすいため最短の間隔に縮め、
+    更新が無いたびに `BACKOFF_FACTOR` 倍ずつ最長の間隔まで伸ばします。
+    失敗した場合は、一時的な障害から早く回復できるよう間隔を伸ばさずに据え置きます。
+    """
+    _, lower, upper = interval_bounds(spec)
+    if published_new_items(result):
+        return lower
+    if not result["ok"]:
+        return min(upper, max(lower, current))
+    return min(upper, max(lower, current * BACKOFF_FACTOR))
+
+
+def feed_state(state: ScheduleState, spec: FeedSpec, now: float) -> FeedState:
+    """保存済みの状態を返します。初めてのフィードはすぐに取得する状態を返します。"""
+    saved = state.get(spec["name"])
+    if saved is None:
+        return {"interval": interval_bounds(spec)[0], "next_run": now}
+    return saved
+
+
+def due_feeds(
+    feeds: Sequence[FeedSpec], state: ScheduleState, now: float
+) -> List[FeedSpec]:
+    """取得時刻を過ぎたフィードを返します。"""
+    return [spec for spec in feeds if feed_state(state, spec, now)["next_run"] <= now]
+
+
+def record_result(
+    state: ScheduleState, spec: FeedSpec, result: FeedResult, now: float
+) -> FeedState:
+    """ビルド結果から次の取得間隔と取得時刻を決め、状態を更新します。"""
+    previous = feed_state(state, spec, now)
+    interval = next_interval(spec, previous["interval"], result)
+    updated: FeedState = {
+        "interval": interval,
+        "next_run": now + interval,
+        "last_run": now,
+    }
+    if published_new_items(result):
+        updated["last_published"] = now
+    elif "last_published" in previous:
+        updated["last_published"] = previous["last_published"]
+    state.set(spec["name"], updated)
+    return updated
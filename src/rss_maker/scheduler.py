@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Sequence
+
+from . import generate_rss
+from .build import FeedResult, FeedSpec, build_feeds
+from .enrich import DetailCache
+from .fetch import Fetcher, HostLimiter
+from .http_cache import HttpCache
+from .incremental import DEFAULT_HISTORY_LIMIT
+from .item_store import ItemStore
+from .manifest import FeedManifest
+from .metrics import MetricsRecorder
+from .parse_pool import make_feed_parse_pool
+from .schedule import (
+    DEFAULT_INTERVAL,
+    ScheduleState,
+    due_feeds,
+    feed_state,
+    interval_bounds,
+    record_result,
+)
+from .sites import SITE_ADAPTERS
+
+# 同じホストへのリクエストの開始間隔（秒）と、その伸縮の割合
+DEFAULT_HOST_INTERVAL = 1.0
+DEFAULT_HOST_JITTER = 0.5
+
+
+class Scheduler:
+    """フィードごとの間隔で build_feeds を繰り返し実行する常駐スケジューラ。
+
+    HTTPの接続プール（Fetcher）・ホストごとの制限・解析用のプロセスプールは
+    起動中ずっと使い回し、取得のたびにインタプリタやワーカーを起動し直しません。
+    ホストごとのリクエストは `host_interval` 秒（`host_jitter` の割合で伸縮）ずつ空けます。
+    `on_results` には、各回のビルド結果とメトリクスが渡されます。
+    """
+
+    def __init__(
+        self,
+        feeds: Sequence[FeedSpec],
+        *,
+        state: Optional[ScheduleState] = None,
+        max_workers: int = 8,
+        max_per_host: int = 2,
+        max_page_bytes: Optional[int] = None,
+        host_interval: float = DEFAULT_HOST_INTERVAL,
+        host_jitter: float = DEFAULT_HOST_JITTER,
+        parse_workers: Optional[int] = None,
+        parser_backend: Optional[str] = None,
+        cache: Optional[HttpCache] = None,
+        streaming: bool = False,
+        incremental: bool = False,
+        history_limit: int = DEFAULT_HISTORY_LIMIT,
+        manifest: Optional[FeedManifest] = None,
+        detail_cache: Optional[DetailCache] = None,
+        item_store: Optional[ItemStore] = None,
+        fetcher: Optional[Fetcher] = None,
+        on_results: Optional[Callable[[List[FeedResult], MetricsRecorder], None]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        for spec in feeds:
+            interval_bounds(spec)
+        self.feeds = list(feeds)
+        self.state = state or ScheduleState()
+        self.max_workers = max_workers
+        self.parse_workers = parse_workers
+        self.cache = cache
+        self.streaming = streaming
+        self.incremental = incremental
+        self.history_limit = history_limit
+        self.manifest = manifest
+        self.detail_cache = detail_cache
+        self.item_store = item_store
+        self.on_results = on_results
+        self._clock = clock
+        if parser_backend is not None:
+            generate_rss.set_parser_backend(parser_backend)
+        self.limiter = HostLimiter(
+            max_per_host, min_interval=host_interval, jitter=host_jitter
+        )
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher or Fetcher(
+            pool_maxsize=max_per_host, max_bytes=max_page_bytes
+        )
+        self._parse_pool: Optional[Executor] = None
+
+    def due(self, now: Optional[float] = None) -> List[FeedSpec]:
+        """取得時刻を過ぎたフィードを返します。"""
+        now = self._clock() if now is None else now
+        return due_feeds(self.feeds, self.state, now)
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """次にいずれかのフィードの取得時刻になるまでの秒数を返します。"""
+        now = self._clock() if now is None else now
+        if not self.feeds:
+            return DEFAULT_INTERVAL
+        next_run = min(feed_state(self.state, spec, now)["next_run"] for spec in self.feeds)
+        return max(0.0, next_run - now)
+
+    def _pool(self) -> Executor:
+        if self._parse_pool is None:
+            self._parse_pool = make_feed_parse_pool(
+                self.parse_workers,
+                len(self.feeds),
+                generate_rss.get_parser_backend(),
+                # 未対応のサイト種別はビルドごとにエラーとして報告する
+                [
+                    SITE_ADAPTERS[spec["site"]]
+                    for spec in self.feeds
+                    if spec["site"] in SITE_ADAPTERS
+                ],
+            )
+        return self._parse_pool
+
+    def run_due(self) -> List[FeedResult]:
+        """取得時刻を過ぎたフィードをまとめてビルドし、次回の取得時刻を決め直します。"""
+        now = self._clock()
+        due = self.due(now)
+        if not due:
+            return []
+        metrics = MetricsRecorder()
+        results = build_feeds(
+            due,
+            max_workers=self.max_workers,
+            cache=self.cache,
+            fetcher=self.fetcher,
+            streaming=self.streaming,
+            incremental=self.incremental,
+            history_limit=self.history_limit,
+            manifest=self.manifest,
+            detail_cache=self.detail_cache,
+            item_store=self.item_store,
+            metrics=metrics,
+            limiter=self.limiter,
+            parse_pool=self._pool(),
+        )
+        for spec, result in zip(due, results):
+            record_result(self.state, spec, result, now)
+        self.state.save()
+        if self.on_results is not None:
+            self.on_results(results, metrics)
+        return results
+
+    def run_forever(self, stop: Optional[threading.Event] = None) -> None:
+        """`stop` がセットされるまで、取得時刻になったフィードを順次ビルドします。"""
+        stop = stop or threading.Event()
+        try:
+            while not stop.is_set():
+                self.run_due()
+                stop.wait(self.seconds_until_next())
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+        if self._owns_fetcher:
+            self.fetcher.close()
+
+    def __enter__(self) -> Scheduler:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Literal, Mapping, NotRequired, TypedDict
+
+if TYPE_CHECKING:
+    # streaming は bs4 を読み込むため、アダプタの登録だけなら読み込まない
+    from .streaming import ContainerSpec
+
+
+class AttrRule(TypedDict):
+    selector: str
+    attr: str
+
+
+class DetailRules(TypedDict, total=False):
+    """記事の詳細ページから説明・公開日時・音声ファイルを取り出すルール。
+
+    説明と公開日時は最初に見つかった要素の content / datetime 属性（無ければテキスト）を使う。
+    """
+
+    description: List[str]
+    pubdate: List[str]
+    enclosure: List[AttrRule]
+
+
+class SiteAdapter(TypedDict):
+    """サイトごとの抽出ルール。関数を持たないため、設定ファイルからも定義できます。
+
+    セレクタはすべてCSSセレクタで、記事内のセレクタは `item` 要素を起点に評価します。
+    """
+
+    name: str
+    # エラーメッセージなどに使う表示名
+    label: str
+    # チャンネル情報。最初に見つかった要素の content 属性（無ければテキスト）を使う
+    channel_title: List[str]
+    channel_description: List[str]
+    title_fallback: NotRequired[str]
+    description_fallback: NotRequired[str]
+    # 記事一覧の範囲（省略時はページ全体）と、記事1件を表す要素
+    container: NotRequired[str]
+    item: str
+    # 記事リンク（省略時は item 要素自身の href）
+    link: NotRequired[str]
+    title: List[str]
+    # タイトルから取り除く要素（NEW等のラベル）
+    title_remove: NotRequired[List[str]]
+    # タイトル要素が空の場合に item 全体のテキストを使うか
+    title_fallback_to_item_text: NotRequired[bool]
+    thumbnail: List[AttrRule]
+    # 値が取れなかった記事を捨てる項目
+    required: NotRequired[List[Literal["title", "thumbnail"]]]
+    # リンクを解決する基準URL（省略時はページのURL）
+    base_url: NotRequired[str]
+    # 次の一覧ページへのリンク。部分解析でも見えるよう記事コンテナ内にあること
+    next_page: NotRequired[str]
+    # ページ番号を表すクエリパラメータ。後続ページのURLを予測して並列に取得する
+    page_param: NotRequired[str]
+    # 抽出できなかった場合にエラーとする項目
+    validate: NotRequired[
+        List[Literal["channel_title", "channel_description", "articles"]]
+    ]
+    # 詳細ページの抽出ルール（省略時は DEFAULT_DETAIL_RULES）
+    detail: NotRequired[DetailRules]
+    # ストリーミング取得で、閉じた時点で読み込みを打ち切れる記事コンテナ
+    stream_container: NotRequired[ContainerSpec]
+    # 部分解析時に meta/title 以外で取り込む要素
+    partial_tags: NotRequired[List[str]]
+
+
+# OGP・HTML5の一般的なマークアップから詳細情報を取り出す既定のルール
+DEFAULT_DETAIL_RULES: DetailRules = {
+    "description": ["meta[property='og:description']", "meta[name='description']"],
+    "pubdate": [
+        "meta[property='article:published_time']",
+        "time[datetime]",
+    ],
+    "enclosure": [
+        {"selector": "meta[property='og:audio']", "attr": "content"},
+        {"selector": "audio[src]", "attr": "src"},
+        {"selector": "audio source[src]", "attr": "src"},
+    ],
+}
+
+AUDEE: SiteAdapter = {
+    "name": "audee",
+    "label": "AuDee",
+    "channel_title": ["meta[property='og:title']"],
+    "channel_description": ["meta[name='description']"],
+    "description_fallback": "概要不明",
+    # 「コンテンツ一覧」の中の「すべて」タブのセクションに限定して検索
+    "container": "#content_tab_all",
+    "item": ".box-article-item",
+    "link": "a",
+    "title": ["a p.txt-article"],
+    "thumbnail": [{"selector": "a img.lazy", "attr": "data-original"}],
+    "required": ["title", "thumbnail"],
+    "base_url": "https://audee.jp",
+    "stream_container": {"attr": "id", "value": "content_tab_all"},
+}
+
+JFN_PODS: SiteAdapter = {
+    "name": "jfn_pods",
+    "label": "JFN Pods",
+    "channel_title": ["meta[property='og:title']"],
+    "channel_description": ["meta[name='description']"],
+    "description_fallback": "概要不明",
+    "item": "article a[href*='/voice/']",
+    "title": ["h3"],
+    "thumbnail": [{"selector": "img", "attr": "src"}],
+    "required": ["title", "thumbnail"],
+    "validate": ["channel_title", "channel_description", "articles"],
+    # 記事がページ内の article 要素に散らばっているため、コンテナでは打ち切れない
+    "partial_tags": ["article"],
+}
+
+BITFAN_UPDATES: SiteAdapter = {
+    "name": "bitfan_updates",
+    "label": "Bitfan",
+    # タイトルと説明はogタグ or 通常のmetaから取得
+    "channel_title": ["meta[property='og:title']", "title"],
+    "channel_description": [
+        "meta[property='og:description']",
+        "meta[name='description']",
+    ],
+    "container": "section.p-clubSection",
+    "item": "a.p-clubMedia__inner[href*='/contents/']",
+    "title": [".p-clubMedia__name"],
+    "title_remove": ["span"],
+    "title_fallback_to_item_text": True,
+    "thumbnail": [
+        {"selector": ".p-clubMedia__icon img[src]", "attr": "src"},
+        {"selector": "img", "attr": "src"},
+    ],
+    "next_page": ".c-clubPagination a[rel='next']",
+    "page_param": "page",
+    "stream_container": {
+        "tag": "section",
+        "attr": "class",
+        "value": "p-clubSection",
+    },
+}
+
+_REQUIRED_KEYS = (
+    "name",
+    "label",
+    "channel_title",
+    "channel_description",
+    "item",
+    "title",
+    "thumbnail",
+)
+
+SITE_ADAPTERS: Dict[str, SiteAdapter] = {}
+
+
+def register_site_adapter(adapter: Mapping[str, object]) -> SiteAdapter:
+    """サイトアダプタを登録します。設定ファイルから読み込んだ辞書もそのまま渡せます。"""
+    missing = [key for key in _REQUIRED_KEYS if key not in adapter]
+    if missing:
+        raise ValueError(f"サイトアダプタの必須項目がありません: {', '.join(missing)}")
+    site: SiteAdapter = dict(adapter)  # type: ignore[assignment]
+    SITE_ADAPTERS[site["name"]] = site
+    return site
+
+
+def get_site_adapter(name: str) -> SiteAdapter:
+    try:
+        return SITE_ADAPTERS[name]
+    except KeyError:
+        raise ValueError(f"未対応のサイト種別です: {name}") from None
+
+
+for _adapter in (AUDEE, JFN_PODS, BITFAN_UPDATES):
+    register_site_adapter(_adapter)
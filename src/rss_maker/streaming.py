@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+from typing import Iterable, List, Mapping, NotRequired, Optional, Sequence, TypedDict
+
+from bs4 import SoupStrainer
+
+
+class ContainerSpec(TypedDict):
+    """記事一覧を囲む要素の指定。`attr="class"` の場合はクラス名の一致で判定します。"""
+
+    attr: str
+    value: str
+    tag: NotRequired[str]
+
+
+def _attr_matches(attr: str, expected: str, actual: object) -> bool:
+    if actual is None:
+        return False
+    if isinstance(actual, (list, tuple)):
+        actual = " ".join(str(x) for x in actual)  # type: ignore[reportUnknownVariableType]
+    if attr == "class":
+        return expected in str(actual).split()
+    return str(actual) == expected
+
+
+def matches_container(
+    container: ContainerSpec, name: str, attrs: Mapping[str, object]
+) -> bool:
+    """タグ名と属性がコンテナ指定に一致するかを判定します。"""
+    if "tag" in container and container["tag"] != name:
+        return False
+    return _attr_matches(container["attr"], container["value"], attrs.get(container["attr"]))
+
+
+class ContainerScanner(HTMLParser):
+    """HTMLを逐次トークナイズし、コンテナ要素が閉じたかどうかを追跡します。"""
+
+    def __init__(self, container: ContainerSpec) -> None:
+        super().__init__(convert_charrefs=False)
+        self.container = container
+        self.closed = False
+        self._tag: Optional[str] = None
+        self._depth = 0
+
+    def handle_starttag(self, tag: str, attrs: List[tuple[str, Optional[str]]]) -> None:
+        if self.closed:
+            return
+        if self._tag is None:
+            if matches_container(self.container, tag, dict(attrs)):
+                self._tag = tag
+                self._depth = 1
+        elif tag == self._tag:
+            self._depth += 1
+
+    def handle_startendtag(
+        self, tag: str, attrs: List[tuple[str, Optional[str]]]
+    ) -> None:
+        # <br/> のような自己終了タグは入れ子の深さに影響しない
+        pass
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.closed or self._tag is None or tag != self._tag:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self.closed = True
+
+
+def read_until_container(chunks: Iterable[str], container: ContainerSpec) -> str:
+    """チャンクを順に読み、コンテナの閉じタグを含むチャンクまでで読み込みを打ち切ります。
+
+    コンテナが見つからない場合は最後まで読み込みます。
+    """
+    scanner = ContainerScanner(container)
+    parts: List[str] = []
+    for chunk in chunks:
+        parts.append(chunk)
+        scanner.feed(chunk)
+        if scanner.closed:
+            break
+    return "".join(parts)
+
+
+class _PartialStrainer(SoupStrainer):
+    """head内のメタ情報と、記事を含む部分木だけをツリーに取り込むフィルタ。"""
+
+    def __init__(
+        self, container: Optional[ContainerSpec], extra_tags: Sequence[str]
+    ) -> None:
+        super().__init__()
+        self._container = container
+        self._extra_tags = frozenset(extra_tags)
+
+    def allow_tag_creation(
+        self, nsprefix: Optional[str], name: str, attrs: Optional[Mapping[str, object]]
+    ) -> bool:
+        if name in self._extra_tags:
+            return True
+        if self._container is None:
+            return False
+        return matches_container(self._container, name, attrs or {})
+
+
+def partial_strainer(
+    container: Optional[ContainerSpec], extra_tags: Sequence[str] = ("meta", "title")
+) -> SoupStrainer:
+    """コンテナ要素と `extra_tags` の部分木だけを解析対象にする SoupStrainer を返します。"""
+    return _PartialStrainer(container, extra_tags)
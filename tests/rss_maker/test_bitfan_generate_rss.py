@@ -2,6 +2,7 @@ import xml.etree.ElementTree as ET
 from pathlib import Path
 
 from rss_maker.generate_rss import (
+    extract_bitfan_updates_page,
     generate_rss_feed,
     parse_articles_from_bitfan_updates_page,
     parse_channel_info_from_bitfan_updates_page,
@@ -49,3 +50,13 @@ def test_generate_rss_feed_from_bitfan_parsed_data():
     assert channel_el.find("title") is not None
     items = channel_el.findall("item")
     assert len(items) == len(articles)
+
+
+def test_extract_bitfan_updates_page_matches_separate_parsers():
+    html = load_fixture()
+    base_url = "https://ij-matome.bitfan.id/updates"
+
+    page = extract_bitfan_updates_page(html, base_url)
+
+    assert page["channel"] == parse_channel_info_from_bitfan_updates_page(html)
+    assert page["articles"] == parse_articles_from_bitfan_updates_page(html, base_url)
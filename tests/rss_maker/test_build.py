@@ -0,0 +1,563 @@
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+import requests
+
+import rss_maker.generate_rss
+from rss_maker.build import FeedSpec, HostLimiter, build_feeds
+from rss_maker.enrich import DetailCache
+from rss_maker.fetch import Fetcher
+from rss_maker.http_cache import HttpCache
+from rss_maker.item_store import ItemStore
+from rss_maker.manifest import FeedManifest
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+JFN_URL = "https://jfn-pods.com/program/40889/voice"
+BITFAN_URL = "https://ij-matome.bitfan.id/updates"
+
+
+def _pages() -> dict[str, str]:
+    return {
+        JFN_URL: (FIXTURES / "jfn_pods_voice_page.html").read_text(encoding="utf-8"),
+        BITFAN_URL: (FIXTURES / "ij-matome_program_page.html").read_text(
+            encoding="utf-8"
+        ),
+    }
+
+
+def _feeds(tmp_path: Path) -> list[FeedSpec]:
+    return [
+        {
+            "name": "Bitfan",
+            "site": "bitfan_updates",
+            "url": BITFAN_URL,
+            "output_path": str(tmp_path / "bitfan.xml"),
+        },
+        {
+            "name": "JFN Pods",
+            "site": "jfn_pods",
+            "url": JFN_URL,
+            "output_path": str(tmp_path / "jfn.xml"),
+        },
+    ]
+
+
+def _item_count(path: str) -> int:
+    channel = ET.parse(path).getroot().find("channel")
+    assert channel is not None
+    return len(channel.findall("item"))
+
+
+@pytest.mark.parametrize(
+    ("parse_workers", "streaming"), [(0, False), (1, False), (0, True)]
+)
+def test_build_feeds_writes_every_feed(mocker, tmp_path, parse_workers, streaming):
+    pages = _pages()
+    mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: pages[url],
+    )
+    feeds = _feeds(tmp_path)
+
+    results = build_feeds(feeds, parse_workers=parse_workers, streaming=streaming)
+
+    assert results == [{"name": "Bitfan", "ok": True}, {"name": "JFN Pods", "ok": True}]
+    assert _item_count(feeds[0]["output_path"]) == 12
+    assert _item_count(feeds[1]["output_path"]) == 3
+
+
+def test_build_feeds_reports_failure_per_feed(mocker, tmp_path):
+    """
+    1つのフィードが失敗しても他のフィードは生成され、結果に失敗が記録される
+    """
+    pages = _pages()
+    pages[JFN_URL] = "<html><head></head><body></body></html>"
+    mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: pages[url],
+    )
+    feeds = _feeds(tmp_path)
+    feeds.append(
+        {
+            "name": "Unknown",
+            "site": "unknown",
+            "url": "https://example.com",
+            "output_path": str(tmp_path / "unknown.xml"),
+        }
+    )
+
+    results = build_feeds(feeds, parse_workers=0)
+
+    assert results[0] == {"name": "Bitfan", "ok": True}
+    assert results[1]["ok"] is False
+    assert "タイトルを抽出できませんでした" in results[1]["error"]
+    assert "ValueError" in results[1]["traceback"]
+    assert results[2]["ok"] is False
+    assert "未対応のサイト種別" in results[2]["error"]
+    assert not (tmp_path / "jfn.xml").exists()
+
+
+def test_build_feeds_skips_not_modified_feeds(mocker, tmp_path):
+    pages = _pages()
+    feeds = _feeds(tmp_path)
+    (tmp_path / "bitfan.xml").write_text("previous", encoding="utf-8")
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    mock_get = mocker.patch(
+        "rss_maker.generate_rss.get_html_if_modified",
+        side_effect=lambda url, _cache, fetcher=None, container=None, metrics=None: (
+            None if url == BITFAN_URL else pages[url]
+        ),
+    )
+
+    results = build_feeds(feeds, parse_workers=0, cache=cache)
+
+    assert results == [
+        {"name": "Bitfan", "ok": True, "not_modified": True},
+        {"name": "JFN Pods", "ok": True},
+    ]
+    assert mock_get.call_count == 2
+    assert (tmp_path / "bitfan.xml").read_text(encoding="utf-8") == "previous"
+    assert _item_count(feeds[1]["output_path"]) == 3
+    assert (tmp_path / "http_cache.json").exists()
+
+
+def test_build_feeds_fetches_unconditionally_when_output_is_missing(mocker, tmp_path):
+    pages = _pages()
+    feeds = _feeds(tmp_path)[:1]
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    cache.remember(BITFAN_URL, {"ETag": '"v1"'})
+    session = mocker.Mock()
+    session.get.return_value = mocker.Mock(
+        status_code=200,
+        text=pages[BITFAN_URL],
+        headers={},
+        raw=mocker.Mock(**{"tell.return_value": 0}),
+    )
+
+    results = build_feeds(
+        feeds, parse_workers=0, cache=cache, fetcher=Fetcher(session=session)
+    )
+
+    assert results == [{"name": "Bitfan", "ok": True}]
+    session.get.assert_called_once_with(BITFAN_URL, timeout=(5, 20), headers={})
+
+
+def test_build_feeds_skips_parse_when_listing_fingerprint_matches(mocker, tmp_path):
+    """
+    304を返さないサーバーでも、記事一覧の範囲が前回と同じなら解析と生成を省略することを確認するテスト
+    """
+    # --- Arrange ---
+    html = _pages()[BITFAN_URL]
+    feeds = _feeds(tmp_path)[:1]
+    session = mocker.Mock()
+    responses = [
+        html,
+        # トークンだけが変わったページ
+        html.replace("<head>", '<head><meta name="csrf-token" content="x">', 1),
+        html.replace("『37.鉄道マニアに言わせれば』", "『37.鉄道マニア』"),
+    ]
+    session.get.side_effect = [
+        mocker.Mock(
+            status_code=200,
+            text=text,
+            headers={"ETag": f'"v{n}"'},
+            raw=mocker.Mock(**{"tell.return_value": 0}),
+        )
+        for n, text in enumerate(responses)
+    ]
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    extract = mocker.spy(rss_maker.generate_rss, "extract_page")
+    fetcher = Fetcher(session=session)
+
+    # --- Act ---
+    results = [
+        build_feeds(feeds, parse_workers=0, cache=cache, fetcher=fetcher)
+        for _ in responses
+    ]
+
+    # --- Assert ---
+    assert results == [
+        [{"name": "Bitfan", "ok": True}],
+        [{"name": "Bitfan", "ok": True, "not_modified": True}],
+        [{"name": "Bitfan", "ok": True}],
+    ]
+    assert extract.call_count == 2
+    assert "『37.鉄道マニア』" in Path(feeds[0]["output_path"]).read_text(encoding="utf-8")
+
+
+def test_build_feeds_forgets_validators_when_body_read_fails(mocker, tmp_path):
+    """
+    ヘッダーの受信後に本文の読み込みで失敗した場合、新しい検証子を残さず、
+    次回は条件付きにせず取得し直すことを確認するテスト
+    """
+    # --- Arrange ---
+    body = _pages()[BITFAN_URL].encode("utf-8")
+    feeds = _feeds(tmp_path)[:1]
+
+    def response(etag: str, error: Exception | None = None):
+        def iter_content(chunk_size):
+            yield body[:1024]
+            if error is not None:
+                raise error
+            yield body[1024:]
+
+        mock = mocker.Mock(
+            status_code=200,
+            headers={"ETag": etag},
+            url=BITFAN_URL,
+            raw=mocker.Mock(**{"tell.return_value": 0}),
+        )
+        mock.iter_content.side_effect = iter_content
+        return mock
+
+    session = mocker.Mock()
+    session.get.side_effect = [
+        response('"v1"'),
+        # 更新後のページを読んでいる途中で接続が切れる
+        response('"v2"', requests.exceptions.ChunkedEncodingError("切断")),
+        response('"v3"'),
+    ]
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    fetcher = Fetcher(session=session, max_retries=0, max_bytes=len(body))
+
+    # --- Act ---
+    first = build_feeds(feeds, parse_workers=0, cache=cache, fetcher=fetcher)
+    failed = build_feeds(feeds, parse_workers=0, cache=cache, fetcher=fetcher)
+    validators = HttpCache(str(tmp_path / "http_cache.json")).conditional_headers(
+        BITFAN_URL
+    )
+    retried = build_feeds(feeds, parse_workers=0, cache=cache, fetcher=fetcher)
+
+    # --- Assert ---
+    assert first == [{"name": "Bitfan", "ok": True}]
+    assert failed[0]["ok"] is False
+    assert validators == {}
+    assert retried == [{"name": "Bitfan", "ok": True}]
+    assert [call.kwargs["headers"] for call in session.get.call_args_list] == [
+        {},
+        {"If-None-Match": '"v1"'},
+        {},
+    ]
+    assert cache.conditional_headers(BITFAN_URL) == {"If-None-Match": '"v3"'}
+
+
+def test_build_feeds_incremental_keeps_history_and_skips_unchanged(mocker, tmp_path):
+    pages = _pages()
+    feeds = _feeds(tmp_path)[1:]
+    output = Path(feeds[0]["output_path"])
+    mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: pages[url],
+    )
+
+    first = build_feeds(feeds, parse_workers=0, incremental=True)
+    assert first == [{"name": "JFN Pods", "ok": True, "new_items": 3}]
+
+    # ページ上の記事が入れ替わっても、ページから消えた過去の記事は残る
+    pages[JFN_URL] = pages[JFN_URL].replace(
+        "/program/40889/voice/DER343oevd", "/program/40889/voice/NEWEPISODE"
+    )
+    second = build_feeds(feeds, parse_workers=0, incremental=True)
+    assert second == [{"name": "JFN Pods", "ok": True, "new_items": 1}]
+    assert _item_count(str(output)) == 4
+    written = output.read_text(encoding="utf-8")
+
+    third = build_feeds(feeds, parse_workers=0, incremental=True)
+    assert third == [{"name": "JFN Pods", "ok": True, "unchanged": True, "new_items": 0}]
+    assert output.read_text(encoding="utf-8") == written
+
+
+def test_build_feeds_keeps_history_in_item_store(mocker, tmp_path):
+    """
+    アイテムストアを使う差分更新でも過去の記事が残り、変わった見出しは履歴に残して書き直すことを確認するテスト
+    """
+    # --- Arrange ---
+    pages = _pages()
+    feeds = _feeds(tmp_path)[1:]
+    output = Path(feeds[0]["output_path"])
+    mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: pages[url],
+    )
+    # 公開済みのRSSから取り込んだ記事も履歴として残す
+    build_feeds(feeds, parse_workers=0, incremental=True)
+    store = ItemStore(str(tmp_path / "items.sqlite3"))
+
+    # --- Act ---
+    first = build_feeds(feeds, parse_workers=0, incremental=True, item_store=store)
+    pages[JFN_URL] = pages[JFN_URL].replace(
+        "/program/40889/voice/DER343oevd", "/program/40889/voice/NEWEPISODE"
+    )
+    second = build_feeds(feeds, parse_workers=0, incremental=True, item_store=store)
+    pages[JFN_URL] = pages[JFN_URL].replace("サイコロトーク！", "サイコロトーク！！")
+    third = build_feeds(feeds, parse_workers=0, incremental=True, item_store=store)
+
+    # --- Assert ---
+    assert first == [{"name": "JFN Pods", "ok": True, "unchanged": True, "new_items": 0}]
+    assert second == [{"name": "JFN Pods", "ok": True, "new_items": 1}]
+    assert third == [{"name": "JFN Pods", "ok": True, "new_items": 0}]
+    assert _item_count(str(output)) == 4
+    items = ET.parse(output).getroot().findall("channel/item")
+    assert items[0].findtext("link") == JFN_URL + "/NEWEPISODE"
+    assert items[1].findtext("title") == "実家帰省中に！サイコロトーク！！vol.212"
+    assert store.title_history("JFN Pods", JFN_URL + "/Odgwkb1lar") == [
+        "実家帰省中に！サイコロトーク！vol.212"
+    ]
+
+
+def test_build_feeds_skips_write_when_manifest_hash_matches(mocker, tmp_path):
+    pages = _pages()
+    feeds = _feeds(tmp_path)
+    mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: pages[url],
+    )
+    manifest_path = tmp_path / "manifest.json"
+
+    first = build_feeds(
+        feeds, parse_workers=0, manifest=FeedManifest(str(manifest_path))
+    )
+    mtimes = [os.stat(feed["output_path"]).st_mtime_ns for feed in feeds]
+    second = build_feeds(
+        feeds, parse_workers=0, manifest=FeedManifest(str(manifest_path))
+    )
+
+    assert first == [{"name": "Bitfan", "ok": True}, {"name": "JFN Pods", "ok": True}]
+    assert second == [
+        {"name": "Bitfan", "ok": True, "unchanged": True},
+        {"name": "JFN Pods", "ok": True, "unchanged": True},
+    ]
+    assert [os.stat(feed["output_path"]).st_mtime_ns for feed in feeds] == mtimes
+
+
+def test_build_feeds_enriches_only_unpublished_articles(mocker, tmp_path):
+    """
+    差分更新では公開済みの記事の詳細ページは読まず、新しい記事だけを補うことを確認するテスト
+    """
+    # --- Arrange ---
+    pages = _pages()
+    detail = '<meta property="og:description" content="詳細の説明">'
+    get_html = mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: pages.get(url, detail),
+    )
+    feed = {**_feeds(tmp_path)[1], "enrich": True}
+    build_feeds([feed], parse_workers=0, incremental=True, fetcher=mocker.Mock())
+    get_html.reset_mock()
+    # 公開済みのフィードから1件だけ取り除き、その記事が新しく見つかった状態にする
+    path = Path(feed["output_path"])
+    root = ET.parse(path)
+    channel = root.getroot().find("channel")
+    assert channel is not None
+    channel.remove(channel.findall("item")[0])
+    root.write(path, encoding="utf-8")
+
+    # --- Act ---
+    results = build_feeds([feed], parse_workers=0, incremental=True, fetcher=mocker.Mock())
+
+    # --- Assert ---
+    assert results[0]["new_items"] == 1
+    detail_urls = [c.args[0] for c in get_html.call_args_list if c.args[0] != JFN_URL]
+    assert len(detail_urls) == 1
+    items = ET.parse(path).getroot().findall("channel/item")
+    assert items[0].findtext("link") == detail_urls[0]
+    assert items[0].findtext("description") == "詳細の説明"
+
+
+def test_build_feeds_retries_failed_detail_pages_of_published_articles(mocker, tmp_path):
+    """
+    詳細ページを取得できなかった記事は、公開済みになっても次回のビルドで読み直すことを確認するテスト
+    """
+    # --- Arrange ---
+    pages = _pages()
+    details: dict[str, str] = {}
+
+    def get_html(url, fetcher=None, container=None, metrics=None):
+        if url in pages:
+            return pages[url]
+        if not details:
+            raise requests.HTTPError(f"404 Client Error: {url}")
+        return details["html"]
+
+    mocker.patch("rss_maker.generate_rss.get_html", side_effect=get_html)
+    feed = {**_feeds(tmp_path)[1], "enrich": True}
+    detail_cache = DetailCache(str(tmp_path / "details.json"))
+    store = ItemStore(str(tmp_path / "items.sqlite3"))
+
+    def build():
+        return build_feeds(
+            [feed],
+            parse_workers=0,
+            incremental=True,
+            fetcher=mocker.Mock(),
+            detail_cache=detail_cache,
+            item_store=store,
+        )
+
+    # --- Act ---
+    first = build()
+    details["html"] = '<meta property="og:description" content="詳細の説明">'
+    second = build()
+
+    # --- Assert ---
+    assert first[0]["new_items"] == 3
+    assert second == [{"name": "JFN Pods", "ok": True, "new_items": 0}]
+    items = ET.parse(feed["output_path"]).getroot().findall("channel/item")
+    assert [item.findtext("description") for item in items] == ["詳細の説明"] * 3
+
+
+def test_build_feeds_refetches_listing_after_detail_pages_fail(mocker, tmp_path):
+    """
+    詳細ページを取得できなかったビルドでは一覧の検証子を残さず、次回304で読み直しを逃さないことを確認するテスト
+    """
+    # --- Arrange ---
+    pages = _pages()
+    details: dict[str, str] = {}
+
+    def get_html_if_modified(url, cache, fetcher=None, container=None, metrics=None):
+        # 検証子があれば一覧ページは更新されていない
+        if cache.conditional_headers(url):
+            return None
+        cache.remember(url, {"ETag": '"v1"'})
+        return pages[url]
+
+    def get_html(url, fetcher=None, container=None, metrics=None):
+        if not details:
+            raise requests.HTTPError(f"503 Server Error: {url}")
+        return details["html"]
+
+    mocker.patch(
+        "rss_maker.generate_rss.get_html_if_modified", side_effect=get_html_if_modified
+    )
+    mocker.patch("rss_maker.generate_rss.get_html", side_effect=get_html)
+    feed = {**_feeds(tmp_path)[1], "enrich": True}
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    detail_cache = DetailCache(str(tmp_path / "details.json"))
+
+    def build():
+        return build_feeds(
+            [feed],
+            parse_workers=0,
+            cache=cache,
+            fetcher=mocker.Mock(),
+            detail_cache=detail_cache,
+        )
+
+    # --- Act ---
+    first = build()
+    details["html"] = '<meta property="og:description" content="詳細の説明">'
+    second = build()
+    third = build()
+
+    # --- Assert ---
+    assert first == [{"name": "JFN Pods", "ok": True}]
+    assert second == [{"name": "JFN Pods", "ok": True}]
+    items = ET.parse(feed["output_path"]).getroot().findall("channel/item")
+    assert [item.findtext("description") for item in items] == ["詳細の説明"] * 3
+    # すべて補えた後は、通常どおり304で省略する
+    assert third == [{"name": "JFN Pods", "ok": True, "not_modified": True}]
+
+
+def test_build_feeds_writes_extra_outputs_from_one_parse(mocker, tmp_path):
+    """
+    RSS と同時に Atom・JSON Feed・ポッドキャスト用RSSを1回の解析から書き出す
+    """
+    # --- Arrange ---
+    pages = _pages()
+    mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: pages[url],
+    )
+    extract_page = mocker.spy(rss_maker.generate_rss, "extract_page")
+    outputs = {
+        "atom": str(tmp_path / "jfn.atom"),
+        "json": str(tmp_path / "jfn.json"),
+        "podcast": str(tmp_path / "jfn_podcast.xml"),
+    }
+    feed: FeedSpec = {**_feeds(tmp_path)[1], "outputs": outputs}
+    rss_only = {key: value for key, value in feed.items() if key != "outputs"}
+    build_feeds([rss_only], parse_workers=0, incremental=True)
+
+    # --- Act ---
+    # 記事に変更が無くても、まだ無い形式は書き出す（解析はビルドごとに1回）
+    results = build_feeds([feed], parse_workers=0, incremental=True)
+
+    # --- Assert ---
+    assert results == [{"name": "JFN Pods", "ok": True, "new_items": 0}]
+    assert extract_page.call_count == 2
+    entries = ET.parse(outputs["atom"]).getroot().findall(
+        "{http://www.w3.org/2005/Atom}entry"
+    )
+    assert len(entries) == 3
+    assert len(json.loads(Path(outputs["json"]).read_text(encoding="utf-8"))["items"]) == 3
+    assert _item_count(outputs["podcast"]) == 3
+
+
+def test_host_limiter_caps_concurrency_per_host():
+    limiter = HostLimiter(max_per_host=2)
+    lock = threading.Lock()
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    def work(url: str, host: str) -> None:
+        with limiter.limit(url):
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(0.02)
+            with lock:
+                active[host] -= 1
+
+    threads = [
+        threading.Thread(target=work, args=(f"https://{host}/page/{i}", host))
+        for host in ("a.example.com", "b.example.com")
+        for i in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == {"a.example.com": 2, "b.example.com": 2}
+
+
+def test_host_limiter_spaces_requests_to_the_same_host():
+    """同じホストへのリクエストは開始を min_interval ずつ空け、別のホストは待たないことを確認するテスト"""
+    sleeps: list[float] = []
+    limiter = HostLimiter(
+        max_per_host=2, min_interval=1.0, clock=lambda: 100.0, sleep=sleeps.append
+    )
+
+    urls = ["https://a.example.com/1", "https://a.example.com/2", "https://b.example.com/"]
+    for url in urls:
+        with limiter.limit(url):
+            pass
+    with limiter.limit("https://a.example.com/3"):
+        pass
+
+    assert sleeps == [1.0, 2.0]
+
+
+def test_host_limiter_jitter_stays_within_range():
+    sleeps: list[float] = []
+    limiter = HostLimiter(
+        max_per_host=1,
+        min_interval=2.0,
+        jitter=0.5,
+        clock=lambda: 0.0,
+        sleep=sleeps.append,
+    )
+
+    for _ in range(2):
+        with limiter.limit("https://a.example.com/"):
+            pass
+
+    assert 1.0 <= sleeps[0] <= 3.0
+    with pytest.raises(ValueError):
+        HostLimiter(max_per_host=1, jitter=1.5)
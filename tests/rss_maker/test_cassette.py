@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+from rss_maker.cassette import CassetteMissError, cassette_session
+from rss_maker.fetch import Fetcher
+from rss_maker.fixture_server import FixtureServer
+from rss_maker.generate_rss import get_html, get_html_if_modified
+from rss_maker.http_cache import HttpCache
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+ROUTES = {"/program/show/40889": "audee_program_page.html"}
+CONTAINER = {"attr": "id", "value": "content_tab_all"}
+
+
+def test_replays_recorded_responses_without_network(tmp_path):
+    """
+    記録したレスポンスを、サーバー停止後も同じ内容・同じ検証子で再生できることを確認するテスト
+    """
+    # --- Arrange ---
+    path = str(tmp_path / "cassette.json")
+    with FixtureServer(routes=ROUTES) as server:
+        url = server.url("/program/show/40889")
+        with Fetcher(session=cassette_session(path, "record")) as fetcher:
+            recorded = get_html(url, fetcher=fetcher)
+            recorded_head = fetcher.head(url)
+
+    # --- Act ---
+    cache = HttpCache(str(tmp_path / "cache.json"))
+    with Fetcher(session=cassette_session(path), max_retries=0) as fetcher:
+        replayed = get_html_if_modified(url, cache, fetcher=fetcher)
+        not_modified = get_html_if_modified(url, cache, fetcher=fetcher)
+        partial = get_html(url, fetcher=fetcher, container=CONTAINER)
+        head = fetcher.head(url)
+
+    # --- Assert ---
+    assert recorded == (FIXTURES / "audee_program_page.html").read_bytes().decode("utf-8")
+    assert replayed == recorded
+    assert not_modified is None
+    assert 0 < len(partial) < len(recorded)
+    assert head.status_code == 200
+    assert head.content == b""
+    assert head.headers["ETag"] == recorded_head.headers["ETag"]
+
+
+def test_replay_raises_for_unrecorded_request(tmp_path):
+    path = str(tmp_path / "cassette.json")
+    with FixtureServer(routes=ROUTES) as server:
+        with Fetcher(session=cassette_session(path, "record")) as fetcher:
+            get_html(server.url("/program/show/40889"), fetcher=fetcher)
+
+    with Fetcher(session=cassette_session(path), max_retries=0) as fetcher:
+        with pytest.raises(CassetteMissError):
+            get_html("https://audee.jp/program/show/1", fetcher=fetcher)
+
+
+def test_replay_requires_existing_cassette(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        cassette_session(str(tmp_path / "missing.json"))
@@ -0,0 +1,138 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from rss_maker.cli import main
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+SRC = Path(__file__).parent.parent.parent / "src"
+
+JFN_URL = "https://jfn-pods.com/program/40889/voice"
+
+
+def _write_config(tmp_path: Path) -> Path:
+    path = tmp_path / "feeds.toml"
+    path.write_text(
+        f"""
+[settings]
+http_cache = "{tmp_path / 'http_cache.json'}"
+manifest = "{tmp_path / 'manifest.json'}"
+detail_cache = "{tmp_path / 'detail_cache.json'}"
+metrics_log = "{tmp_path / 'metrics.jsonl'}"
+schedule_state = "{tmp_path / 'schedule.json'}"
+item_store = "{tmp_path / 'items.sqlite3'}"
+streaming = false
+
+[[feeds]]
+name = "JFN Pods"
+site = "jfn_pods"
+url = "{JFN_URL}"
+output_path = "{tmp_path / 'jfn.xml'}"
+interval = 3600
+
+[[feeds]]
+name = "Bitfan"
+site = "bitfan_updates"
+url = "https://ij-matome.bitfan.id/updates"
+output_path = "{tmp_path / 'bitfan.xml'}"
+""",
+        encoding="utf-8",
+    )
+    return path
+
+
+def _items(xml: str) -> str:
+    # lastBuildDate は生成時刻が入るため比べない
+    return xml[xml.index("<item>") :]
+
+
+def test_main_builds_selected_feed_and_records_schedule(mocker, tmp_path, capsys):
+    """
+    --only で選んだフィードだけを生成し、次回の取得時刻を保存して --due では生成しないことを確認するテスト
+    """
+    # --- Arrange ---
+    html = (FIXTURES / "jfn_pods_voice_page.html").read_text(encoding="utf-8")
+    response = mocker.Mock(
+        status_code=200, headers={}, raw=mocker.Mock(**{"tell.return_value": 0})
+    )
+    # 上限のバイト数があるため本文はストリーミングで読まれる
+    response.iter_content.side_effect = lambda chunk_size: iter([html.encode("utf-8")])
+    session = mocker.patch("rss_maker.fetch._make_session").return_value
+    session.get.return_value = response
+    config = str(_write_config(tmp_path))
+
+    # --- Act ---
+    code = main(["--config", config, "--only", "JFN Pods", "--jobs", "1"])
+    due_code = main(["--config", config, "--only", "JFN Pods", "--due"])
+
+    # --- Assert ---
+    assert code == 0
+    assert due_code == 0
+    assert session.get.call_count == 1
+    assert (tmp_path / "jfn.xml").exists()
+    assert not (tmp_path / "bitfan.xml").exists()
+    state = json.loads((tmp_path / "schedule.json").read_text(encoding="utf-8"))
+    assert state["JFN Pods"]["interval"] == 900
+    assert state["JFN Pods"]["next_run"] > time.time()
+    out = capsys.readouterr().out
+    assert "✅ JFN Pods RSSフィードの作成が完了しました。" in out
+    assert out.endswith("生成するフィードはありません。\n")
+
+
+def test_regenerate_rewrites_feeds_from_item_store_without_fetching(
+    mocker, tmp_path, capsys
+):
+    """--regenerate ではHTMLを取得せず、保存済みの記事からフィードを書き出し直すことを確認するテスト"""
+    html = (FIXTURES / "jfn_pods_voice_page.html").read_text(encoding="utf-8")
+    session = mocker.patch("rss_maker.fetch._make_session").return_value
+    session.get.return_value = mocker.Mock(
+        status_code=200, headers={}, raw=mocker.Mock(**{"tell.return_value": 0})
+    )
+    session.get.return_value.iter_content.side_effect = lambda chunk_size: iter(
+        [html.encode("utf-8")]
+    )
+    config = str(_write_config(tmp_path))
+    assert main(["--config", config, "--only", "JFN Pods", "--jobs", "1"]) == 0
+    written = (tmp_path / "jfn.xml").read_text(encoding="utf-8")
+    (tmp_path / "jfn.xml").unlink()
+    session.get.reset_mock()
+
+    code = main(["--config", config, "--only", "JFN Pods", "--regenerate"])
+
+    assert code == 0
+    session.get.assert_not_called()
+    assert _items((tmp_path / "jfn.xml").read_text(encoding="utf-8")) == _items(written)
+    # 保存していないフィードはエラーにする
+    assert main(["--config", config, "--only", "Bitfan", "--regenerate"]) == 1
+    assert "アイテムストアに記事がありません: Bitfan" in capsys.readouterr().out
+
+
+def test_main_reports_config_errors(tmp_path, capsys):
+    code = main(["--config", str(tmp_path / "missing.toml")])
+
+    assert code == 2
+    assert "設定ファイルが見つかりませんでした" in capsys.readouterr().err
+
+
+def test_dry_run_does_not_import_network_or_parser_libraries(tmp_path):
+    """--dry-run では requests・bs4・feedgenerator を読み込まないことを確認するテスト"""
+    config = _write_config(tmp_path)
+    script = (
+        "import sys\n"
+        "from rss_maker.cli import main\n"
+        f"assert main(['--config', {str(config)!r}, '--dry-run']) == 0\n"
+        "print(sorted(m for m in ('bs4', 'requests', 'feedgenerator') if m in sys.modules))\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": str(SRC)},
+    )
+
+    assert "JFN Pods (jfn_pods)" in result.stdout
+    assert result.stdout.splitlines()[-1] == "[]"
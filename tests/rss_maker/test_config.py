@@ -0,0 +1,107 @@
+import pytest
+
+from rss_maker.config import DEFAULT_SETTINGS, load_config, select_feeds
+
+CONFIG = """
+[settings]
+http_cache = ".cache/http.json"
+metrics_textfile = "metrics.prom"
+history_limit = 50
+
+[[feeds]]
+name = "AuDee"
+site = "audee"
+url = "https://audee.jp/program/show/40889"
+output_path = "docs/audee_rss.xml"
+enabled = false
+
+[[feeds]]
+name = "Example"
+site = "example"
+url = "https://example.com/episodes"
+output_path = "docs/example.xml"
+max_pages = 3
+interval = 1800
+
+[[sites]]
+name = "example"
+label = "Example"
+channel_title = ["meta[property='og:title']"]
+channel_description = ["meta[name='description']"]
+item = "li.episode"
+link = "a"
+title = ["h2"]
+thumbnail = [{ selector = "img", attr = "src" }]
+"""
+
+
+def test_load_config_reads_settings_feeds_and_sites(tmp_path):
+    path = tmp_path / "feeds.toml"
+    path.write_text(CONFIG, encoding="utf-8")
+
+    config = load_config(str(path))
+
+    assert config["settings"]["http_cache"] == ".cache/http.json"
+    assert config["settings"]["metrics_textfile"] == "metrics.prom"
+    assert config["settings"]["history_limit"] == 50
+    assert config["settings"]["streaming"] is DEFAULT_SETTINGS["streaming"]
+    assert [spec["name"] for spec in config["feeds"]] == ["AuDee", "Example"]
+    assert config["feeds"][1]["max_pages"] == 3
+    assert config["sites"][0]["thumbnail"] == [{"selector": "img", "attr": "src"}]
+
+
+def test_select_feeds_skips_disabled_unless_named(tmp_path):
+    path = tmp_path / "feeds.toml"
+    path.write_text(CONFIG, encoding="utf-8")
+    feeds = load_config(str(path))["feeds"]
+
+    assert [spec["name"] for spec in select_feeds(feeds)] == ["Example"]
+    assert [spec["name"] for spec in select_feeds(feeds, ["AuDee"])] == ["AuDee"]
+    with pytest.raises(ValueError, match="設定ファイルに無いフィードです: Missing"):
+        select_feeds(feeds, ["Missing"])
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [
+        ('[[feeds]]\nname = "A"\nsite = "audee"\nurl = "u"\n', "必須項目がありません: A: output_path"),
+        (
+            '[[feeds]]\nname = "A"\nsite = "audee"\nurl = "u"\noutput_path = "o"\nmax_pages = true\n',
+            "項目の型が正しくありません: A: max_pages",
+        ),
+        (
+            '[[feeds]]\nname = "A"\nsite = "audee"\nurl = "u"\noutput_path = "o"\nmaxpages = 2\n',
+            "不明なフィードの項目です: A: maxpages",
+        ),
+        (
+            '[[feeds]]\nname = "A"\nsite = "audee"\nurl = "u"\noutput_path = "o"\noutputs = { rdf = "o.rdf" }\n',
+            "未対応の出力形式です: A: rdf",
+        ),
+        ("[settings]\nstreaming = 1\n", "設定項目の型が正しくありません: streaming"),
+        ("[settings]\ncache = 'x'\n", "不明な設定項目です: cache"),
+    ],
+)
+def test_load_config_rejects_invalid_entries(tmp_path, text, message):
+    path = tmp_path / "feeds.toml"
+    path.write_text(text, encoding="utf-8")
+
+    with pytest.raises(ValueError, match=message):
+        load_config(str(path))
+
+
+def test_load_config_reads_yaml(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "feeds.yaml"
+    path.write_text(
+        "feeds:\n"
+        "  - name: JFN Pods\n"
+        "    site: jfn_pods\n"
+        "    url: https://jfn-pods.com/program/40889/voice\n"
+        "    output_path: docs/jfn_pods_voice_rss.xml\n"
+        "    enrich: true\n",
+        encoding="utf-8",
+    )
+
+    config = load_config(str(path))
+
+    assert config["feeds"][0]["enrich"] is True
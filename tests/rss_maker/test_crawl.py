@@ -0,0 +1,223 @@
+import pytest
+import requests
+
+from rss_maker import sites
+from rss_maker.build import build_feeds
+from rss_maker.crawl import crawl_pages, following_page_urls
+from rss_maker.http_cache import HttpCache
+from rss_maker.metrics import MetricsRecorder
+from rss_maker.sites import register_site_adapter
+
+LIST_URL = "https://example.com/updates"
+
+
+def _page(numbers, next_url=None):
+    page = {
+        "channel": {"title": "番組", "description": "概要"},
+        "articles": [
+            {"title": f"第{n}回", "url": f"{LIST_URL}/{n}", "thumbnail": None}
+            for n in numbers
+        ],
+    }
+    if next_url:
+        page["next_url"] = next_url
+    return page
+
+
+def _urls(articles):
+    return [article["url"].rsplit("/", 1)[1] for article in articles]
+
+
+def test_following_page_urls_increments_page_param():
+    assert following_page_urls(f"{LIST_URL}?page=2&sort=new", "page", 2) == [
+        f"{LIST_URL}?page=3&sort=new",
+        f"{LIST_URL}?page=4&sort=new",
+    ]
+    assert following_page_urls(LIST_URL, "page", 2) == []
+
+
+def test_crawl_pages_prefetches_in_parallel_and_dedupes_across_pages():
+    pages = {
+        f"{LIST_URL}?page=2": _page([4, 3], f"{LIST_URL}?page=3"),
+        f"{LIST_URL}?page=3": _page([3, 2]),
+        # 最終ページの先を予測して取得しても、リンクが無いため使われない
+        f"{LIST_URL}?page=4": _page([99]),
+    }
+    fetched = []
+
+    def fetch_page(url):
+        fetched.append(url)
+        return pages[url]
+
+    articles = crawl_pages(
+        _page([6, 5], f"{LIST_URL}?page=2"),
+        fetch_page,
+        max_pages=10,
+        page_param="page",
+        parallel=3,
+    )
+
+    assert _urls(articles) == ["6", "5", "4", "3", "2"]
+    assert sorted(fetched) == sorted(pages)
+
+
+def test_crawl_pages_stops_at_published_article_and_max_items():
+    fetch_page = pytest.fail
+
+    # 1ページ目に公開済みの記事があれば、続きのページは読まない
+    known = crawl_pages(
+        _page([3, 2, 1], f"{LIST_URL}?page=2"),
+        fetch_page,
+        max_pages=5,
+        known_urls={f"{LIST_URL}/2"},
+    )
+    limited = crawl_pages(
+        _page([3, 2, 1], f"{LIST_URL}?page=2"), fetch_page, max_pages=5, max_items=2
+    )
+
+    assert _urls(known) == ["3"]
+    assert _urls(limited) == ["3", "2"]
+
+
+def test_crawl_pages_keeps_collected_articles_when_a_page_fails():
+    pages = {
+        f"{LIST_URL}?page=2": _page([4, 3], f"{LIST_URL}?page=3"),
+        f"{LIST_URL}?page=4": _page([1], f"{LIST_URL}?page=5"),
+    }
+    errors = []
+
+    def fetch_page(url):
+        if url not in pages:
+            raise ValueError(f"404: {url}")
+        return pages[url]
+
+    articles = crawl_pages(
+        _page([6, 5], f"{LIST_URL}?page=2"),
+        fetch_page,
+        max_pages=10,
+        page_param="page",
+        parallel=3,
+        on_error=lambda url, error: errors.append((url, str(error))),
+    )
+
+    # 失敗したページより後の先読み結果は使わない
+    assert _urls(articles) == ["6", "5", "4", "3"]
+    assert errors == [(f"{LIST_URL}?page=3", f"404: {LIST_URL}?page=3")]
+
+
+def _list_html(numbers, next_page=None):
+    items = "".join(f'<li><a href="/updates/{n}">第{n}回</a></li>' for n in numbers)
+    pager = f'<a rel="next" href="/updates?page={next_page}">次へ</a>' if next_page else ""
+    return (
+        '<html><head><meta property="og:title" content="番組"></head>'
+        f"<body><ul>{items}</ul>{pager}</body></html>"
+    )
+
+
+def _register_paged_site(mocker):
+    mocker.patch.dict(sites.SITE_ADAPTERS)
+    register_site_adapter(
+        {
+            "name": "paged",
+            "label": "Paged",
+            "channel_title": ["meta[property='og:title']"],
+            "channel_description": ["meta[name='description']"],
+            "item": "li",
+            "link": "a",
+            "title": ["a"],
+            "thumbnail": [],
+            "next_page": "a[rel='next']",
+            "page_param": "page",
+        }
+    )
+
+
+def _paged_feed(tmp_path):
+    return {
+        "name": "Paged",
+        "site": "paged",
+        "url": LIST_URL,
+        "output_path": str(tmp_path / "paged.xml"),
+        "max_pages": 5,
+    }
+
+
+def test_build_feeds_crawls_back_catalogue_once(mocker, tmp_path):
+    _register_paged_site(mocker)
+    pages = {
+        LIST_URL: _list_html([5, 4], next_page=2),
+        f"{LIST_URL}?page=2": _list_html([3, 2], next_page=3),
+        f"{LIST_URL}?page=3": _list_html([1]),
+    }
+    get_html = mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: pages[url],
+    )
+    output = tmp_path / "paged.xml"
+    feeds = [_paged_feed(tmp_path)]
+
+    first = build_feeds(feeds, parse_workers=0, incremental=True)
+    assert first[0]["new_items"] == 5
+    assert output.read_text(encoding="utf-8").count("<item>") == 5
+
+    # 新しい記事が1件増えただけなら、1ページ目だけで打ち切る
+    pages[LIST_URL] = _list_html([6, 5], next_page=2)
+    get_html.reset_mock()
+    second = build_feeds(feeds, parse_workers=0, incremental=True)
+
+    assert second[0]["new_items"] == 1
+    assert [call.args[0] for call in get_html.call_args_list] == [LIST_URL]
+
+
+def test_build_feeds_publishes_first_pages_when_a_later_page_fails(mocker, tmp_path):
+    """2ページ目の取得に失敗しても、1ページ目の記事でフィードを生成することを確認するテスト"""
+    _register_paged_site(mocker)
+    pages = {LIST_URL: _list_html([5, 4], next_page=2)}
+
+    def get_html(url, fetcher=None, container=None, metrics=None):
+        if url not in pages:
+            raise requests.HTTPError(f"404 Client Error: {url}")
+        return pages[url]
+
+    mocker.patch("rss_maker.generate_rss.get_html", side_effect=get_html)
+    metrics = MetricsRecorder()
+
+    results = build_feeds([_paged_feed(tmp_path)], parse_workers=0, metrics=metrics)
+
+    assert results == [{"name": "Paged", "ok": True}]
+    assert (tmp_path / "paged.xml").read_text(encoding="utf-8").count("<item>") == 2
+    assert metrics.records()[0]["counters"]["page_failures"] == 1
+
+
+def test_build_feeds_resumes_crawl_after_a_later_page_fails(mocker, tmp_path):
+    """2ページ目の取得に失敗したビルドの後も、次回304にならずページ送りを読み直すことを確認するテスト"""
+    _register_paged_site(mocker)
+    pages = {LIST_URL: _list_html([5, 4], next_page=2)}
+
+    def get_html_if_modified(url, cache, fetcher=None, container=None, metrics=None):
+        # 検証子があれば1ページ目は更新されていない
+        if cache.conditional_headers(url):
+            return None
+        cache.remember(url, {"ETag": '"v1"'})
+        return pages[url]
+
+    def get_html(url, fetcher=None, container=None, metrics=None):
+        if url not in pages:
+            raise requests.HTTPError(f"503 Server Error: {url}")
+        return pages[url]
+
+    mocker.patch(
+        "rss_maker.generate_rss.get_html_if_modified", side_effect=get_html_if_modified
+    )
+    mocker.patch("rss_maker.generate_rss.get_html", side_effect=get_html)
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    feeds = [_paged_feed(tmp_path)]
+
+    first = build_feeds(feeds, parse_workers=0, cache=cache)
+    pages[f"{LIST_URL}?page=2"] = _list_html([3, 2])
+    second = build_feeds(feeds, parse_workers=0, cache=cache)
+    third = build_feeds(feeds, parse_workers=0, cache=cache)
+
+    assert first == second == [{"name": "Paged", "ok": True}]
+    assert (tmp_path / "paged.xml").read_text(encoding="utf-8").count("<item>") == 4
+    assert third == [{"name": "Paged", "ok": True, "not_modified": True}]
@@ -0,0 +1,126 @@
+import pytest
+import requests
+
+from rss_maker.enrich import DetailCache, enrich_articles
+from rss_maker.generate_rss import extract_detail, parse_pubdate
+from rss_maker.metrics import MetricsRecorder
+from rss_maker.sites import JFN_PODS
+
+EPISODE_URL = "https://example.com/voice/1"
+
+DETAIL_HTML = """
+<html><head>
+  <meta property="og:description" content=" 第1回の内容 ">
+</head><body>
+  <time datetime="2024-05-01T06:00:00+09:00">2024.05.01</time>
+  <audio><source src="/media/1.mp3"></audio>
+</body></html>
+"""
+
+
+def _head_response(mocker, status_code=200, headers=None):
+    response = mocker.Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("2024-05-01T06:00:00Z", "2024-05-01T06:00:00+00:00"),
+        ("2024.05.01", "2024-05-01T00:00:00+09:00"),
+        ("配信日：2024年5月1日", "2024-05-01T00:00:00+09:00"),
+        ("近日公開", None),
+    ],
+)
+def test_parse_pubdate(value, expected):
+    assert parse_pubdate(value) == expected
+
+
+def test_extract_detail_uses_default_rules():
+    assert extract_detail(JFN_PODS, DETAIL_HTML, EPISODE_URL) == {
+        "description": "第1回の内容",
+        "pubdate": "2024-05-01T06:00:00+09:00",
+        "enclosure": {
+            "url": "https://example.com/media/1.mp3",
+            "length": "0",
+            "type": "audio/mpeg",
+        },
+    }
+
+
+def test_enrich_articles_probes_media_and_caches_details(mocker, tmp_path):
+    """
+    詳細ページとHEADの結果で記事を補い、2回目はキャッシュからリクエストせずに補うことを確認するテスト
+    """
+    # --- Arrange ---
+    get_html = mocker.patch("rss_maker.generate_rss.get_html", return_value=DETAIL_HTML)
+    fetcher = mocker.Mock()
+    fetcher.head.return_value = _head_response(
+        mocker,
+        headers={"Content-Length": "12345", "Content-Type": "audio/mpeg; charset=binary"},
+    )
+    article = {"title": "第1回", "url": EPISODE_URL, "thumbnail": None}
+    cache = DetailCache(str(tmp_path / "details.json"))
+
+    # --- Act ---
+    enriched = enrich_articles(JFN_PODS, [article], fetcher, cache=cache)
+    cache.save()
+    get_html.reset_mock()
+    fetcher.reset_mock()
+    cached = enrich_articles(
+        JFN_PODS, [article], fetcher, cache=DetailCache(str(tmp_path / "details.json"))
+    )
+
+    # --- Assert ---
+    assert enriched[0]["description"] == "第1回の内容"
+    assert enriched[0]["enclosure"] == {
+        "url": "https://example.com/media/1.mp3",
+        "length": "12345",
+        "type": "audio/mpeg",
+    }
+    fetcher.head.assert_not_called()
+    get_html.assert_not_called()
+    assert cached == enriched
+
+
+def test_enrich_articles_keeps_article_when_detail_fetch_fails(mocker):
+    mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=requests.exceptions.HTTPError("404 Client Error"),
+    )
+    known = {"title": "既存", "url": "https://example.com/voice/0", "thumbnail": None}
+    missing = {"title": "第1回", "url": EPISODE_URL, "thumbnail": None}
+
+    articles = enrich_articles(
+        JFN_PODS, [missing, known], mocker.Mock(), skip_urls={known["url"]}
+    )
+
+    assert articles == [missing, known]
+
+
+
+def test_enrich_articles_keeps_article_when_detail_page_is_broken(mocker, tmp_path):
+    """抽出できない詳細ページがあっても他の記事は補い、失敗した記事はキャッシュしない"""
+    broken_url = "https://example.com/voice/2"
+
+    def extract_detail(adapter, html, url):
+        if url == broken_url:
+            raise ValueError("詳細ページを解析できません")
+        return {"description": "第1回の内容"}
+
+    mocker.patch("rss_maker.generate_rss.get_html", return_value=DETAIL_HTML)
+    mocker.patch("rss_maker.generate_rss.extract_detail", side_effect=extract_detail)
+    broken = {"title": "第2回", "url": broken_url, "thumbnail": None}
+    article = {"title": "第1回", "url": EPISODE_URL, "thumbnail": None}
+    cache = DetailCache(str(tmp_path / "details.json"))
+    metrics = MetricsRecorder().feed("番組")
+
+    articles = enrich_articles(
+        JFN_PODS, [broken, article], mocker.Mock(), cache=cache, metrics=metrics
+    )
+
+    assert articles == [broken, {**article, "description": "第1回の内容"}]
+    assert cache.get(broken_url) is None
+    assert metrics.record()["counters"] == {"detail_fetches": 1, "detail_failures": 1}
@@ -0,0 +1,131 @@
+import copy
+
+import pytest
+from bs4 import BeautifulSoup
+
+from rss_maker import extractor
+from rss_maker.extractor import SiteExtractor, get_extractor
+
+BASE_URL = "https://example.com/list/"
+
+SITE = {
+    "name": "extractor-test",
+    "label": "Example",
+    "channel_title": ["meta[property='og:title']", "title"],
+    "channel_description": ["meta[name='description']"],
+    "container": "ul.items",
+    "item": "LI.item",
+    "link": "a",
+    "title": ["h3", "a"],
+    "title_remove": ["span.label"],
+    "thumbnail": [
+        {"selector": "img.thumb", "attr": "src"},
+        {"selector": "img", "attr": "data-src"},
+    ],
+}
+
+HTML = """
+<html><head><title>一覧</title></head><body>
+  <a href="/outside">コンテナの外</a>
+  <ul class="items">
+    <li class="item"><a href="/a">A</a><h3><span class="label">NEW</span>記事A</h3>
+      <img class="thumb" src="a.png"></li>
+    <li class="item"><div><a href="b">記事B</a></div><img data-src="/b.png"></li>
+    <li class="item"><h3>リンクなし</h3></li>
+    <li class="item"><a href="/a">A（重複）</a></li>
+    <li class="item"><a href="/outer">外側</a>
+      <ul><li class="item"><a href="/inner">内側</a></li></ul></li>
+  </ul>
+</body></html>
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_extractors(mocker):
+    """テスト中に作った抽出器が他のテストへ残らないようにする。"""
+    mocker.patch.dict(extractor._EXTRACTORS, clear=True)
+
+
+def _soup(html: str = HTML) -> BeautifulSoup:
+    return BeautifulSoup(html, "html.parser")
+
+
+def _select_one_articles(site, soup):
+    """記事ごとに select_one する素朴な実装（走査1回の結果と比べる）。"""
+    results = []
+    for item in soup.select_one(site["container"]).select(site["item"]):
+        fields = [item.select_one(site["link"])]
+        fields += [item.select_one(selector) for selector in site["title"]]
+        fields += [item.select_one(rule["selector"]) for rule in site["thumbnail"]]
+        results.append((item, fields))
+    return results
+
+
+def test_single_scan_matches_select_one_per_item():
+    """1回の走査で集めた要素が、記事ごとの select_one と同じになる（入れ子の記事も含む）"""
+    site_extractor = SiteExtractor(SITE)
+    soup = _soup()
+    scope = soup.select_one("ul.items")
+
+    scanned = extractor._scan_items(scope, site_extractor.item, site_extractor._fields)
+
+    # bs4 の == は構造の比較のため、同じ要素かどうかを id で比べる
+    def identities(results):
+        return [
+            (id(item), [None if tag is None else id(tag) for tag in fields])
+            for item, fields in results
+        ]
+
+    assert identities(scanned) == identities(_select_one_articles(SITE, soup))
+    assert len(scanned) == 6
+
+
+def test_articles_resolves_fields_and_skips_duplicates():
+    articles = SiteExtractor(SITE).articles(_soup(), BASE_URL)
+
+    assert articles == [
+        ("記事A", "https://example.com/a", "https://example.com/list/a.png"),
+        ("記事B", "https://example.com/list/b", "https://example.com/b.png"),
+        ("外側", "https://example.com/outer", None),
+        ("内側", "https://example.com/inner", None),
+    ]
+
+
+def test_articles_with_scope_selector_falls_back_to_per_item_match():
+    """:scope を含むセレクタは記事要素を起点に評価する"""
+    site = dict(SITE, link=":scope > a", title=[":scope > a"], thumbnail=[])
+
+    articles = SiteExtractor(site).articles(_soup(), BASE_URL)
+
+    assert [url for _, url, _ in articles] == [
+        "https://example.com/a",
+        "https://example.com/outer",
+        "https://example.com/inner",
+    ]
+
+
+def test_channel_info_and_next_page():
+    site = dict(SITE, next_page="a[rel='next']")
+    soup = _soup('<title> 一覧 </title><a rel="next" href="?page=2">次へ</a>')
+    site_extractor = SiteExtractor(site)
+
+    assert site_extractor.channel_info(soup) == ("一覧", "")
+    assert site_extractor.next_page_url(soup, BASE_URL) == BASE_URL + "?page=2"
+
+
+def test_get_extractor_reuses_compiled_selectors_for_equal_adapters():
+    """プロセスに渡された複製でも、同じ内容なら抽出器を使い回す"""
+    first = get_extractor(SITE)
+
+    assert get_extractor(copy.deepcopy(SITE)) is first
+
+
+def test_get_extractor_rebuilds_when_adapter_changes():
+    site = copy.deepcopy(SITE)
+    first = get_extractor(site)
+    site["item"] = "li"
+
+    rebuilt = get_extractor(site)
+
+    assert rebuilt is not first
+    assert rebuilt.item.pattern == "li"
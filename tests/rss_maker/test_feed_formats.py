@@ -0,0 +1,144 @@
+import json
+import xml.etree.ElementTree as ET
+from io import StringIO
+
+import pytest
+
+from rss_maker import config, feed_formats
+from rss_maker.feed_formats import (
+    FEED_FORMATS,
+    write_atom,
+    write_feed_files,
+    write_json_feed,
+    write_podcast_rss,
+)
+from rss_maker.manifest import FeedManifest
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ITUNES = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+
+CHANNEL = {
+    "title": "伊藤沙莉のsaireek channel",
+    "description": "番組の概要",
+    "link": "https://jfn-pods.com/program/40889/voice",
+}
+
+ARTICLES = [
+    {
+        "title": "第2回 <特別編>",
+        "url": "https://jfn-pods.com/program/40889/voice/2",
+        "thumbnail": "https://example.com/img/2.jpg",
+        "description": "内容",
+        "pubdate": "2024-05-08T06:00:00+09:00",
+        "enclosure": {
+            "url": "https://example.com/media/2.mp3",
+            "length": "12345",
+            "type": "audio/mpeg",
+        },
+    },
+    {
+        "title": "第1回",
+        "url": "https://jfn-pods.com/program/40889/voice/1",
+        "thumbnail": "https://example.com/img/1.jpg",
+    },
+]
+
+
+def _render(writer) -> str:
+    out = StringIO()
+    writer(CHANNEL, ARTICLES, out)
+    return out.getvalue()
+
+
+def test_write_atom_uses_links_as_ids_and_latest_pubdate():
+    feed = ET.fromstring(_render(write_atom))
+
+    assert feed.findtext(f"{ATOM}title") == CHANNEL["title"]
+    assert feed.findtext(f"{ATOM}updated") == "2024-05-08T06:00:00+09:00"
+    entries = feed.findall(f"{ATOM}entry")
+    assert [entry.findtext(f"{ATOM}id") for entry in entries] == [
+        article["url"] for article in ARTICLES
+    ]
+    assert entries[0].findtext(f"{ATOM}title") == "第2回 <特別編>"
+    enclosure = entries[0].find(f"{ATOM}link[@rel='enclosure']")
+    assert enclosure is not None
+    assert enclosure.attrib["length"] == "12345"
+    # 公開日時の無い記事はフィードの更新日時を使う
+    assert entries[1].findtext(f"{ATOM}updated") == "2024-05-08T06:00:00+09:00"
+    assert entries[1].find(f"{ATOM}published") is None
+
+
+def test_write_json_feed_follows_json_feed_1_1():
+    feed = json.loads(_render(write_json_feed))
+
+    assert feed["version"] == "https://jsonfeed.org/version/1.1"
+    assert feed["home_page_url"] == CHANNEL["link"]
+    assert feed["items"][0]["attachments"] == [
+        {
+            "url": "https://example.com/media/2.mp3",
+            "mime_type": "audio/mpeg",
+            "size_in_bytes": 12345,
+        }
+    ]
+    assert feed["items"][1] == {
+        "id": ARTICLES[1]["url"],
+        "url": ARTICLES[1]["url"],
+        "title": "第1回",
+        "content_text": "",
+        "image": "https://example.com/img/1.jpg",
+    }
+
+
+def test_write_podcast_rss_adds_itunes_tags_and_only_audio_enclosures():
+    channel = ET.fromstring(_render(write_podcast_rss)).find("channel")
+    assert channel is not None
+
+    assert channel.findtext(f"{ITUNES}explicit") == "false"
+    image = channel.find(f"{ITUNES}image")
+    assert image is not None
+    assert image.attrib["href"] == "https://example.com/img/2.jpg"
+    items = channel.findall("item")
+    assert items[0].find("enclosure").attrib["type"] == "audio/mpeg"  # type: ignore[union-attr]
+    # サムネイルは enclosure にせず itunes:image にする
+    assert items[1].find("enclosure") is None
+    assert items[1].find(f"{ITUNES}image").attrib["href"] == ARTICLES[1]["thumbnail"]  # type: ignore[union-attr]
+    assert items[1].findtext("guid") == ARTICLES[1]["url"]
+
+
+def test_write_feed_files_writes_every_format_once_and_honors_manifest(tmp_path):
+    outputs = {name: str(tmp_path / f"feed.{name}") for name in FEED_FORMATS}
+    manifest = FeedManifest(str(tmp_path / "manifest.json"))
+
+    written = write_feed_files(outputs, CHANNEL, ARTICLES, manifest)
+
+    assert written == list(outputs.values())
+    assert write_feed_files(outputs, CHANNEL, ARTICLES, manifest) == []
+    (tmp_path / "feed.atom").unlink()
+    assert write_feed_files(outputs, CHANNEL, ARTICLES, manifest) == [outputs["atom"]]
+
+
+def test_write_feed_files_replaces_nothing_when_a_format_fails(mocker, tmp_path):
+    outputs = {"rss": str(tmp_path / "feed.xml"), "atom": str(tmp_path / "feed.atom")}
+    write_feed_files(outputs, CHANNEL, ARTICLES)
+    before = {path: open(path, encoding="utf-8").read() for path in outputs.values()}
+    mocker.patch.dict(
+        feed_formats.FEED_FORMATS,
+        {"atom": {**FEED_FORMATS["atom"], "write": mocker.Mock(side_effect=OSError)}},
+    )
+
+    with pytest.raises(OSError):
+        write_feed_files(outputs, {**CHANNEL, "title": "新しい番組名"}, ARTICLES)
+
+    assert {
+        path: open(path, encoding="utf-8").read() for path in outputs.values()
+    } == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["feed.atom", "feed.xml"]
+
+
+def test_write_feed_files_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="未対応の出力形式です: rdf"):
+        write_feed_files({"rdf": str(tmp_path / "feed.rdf")}, CHANNEL, ARTICLES)
+
+
+def test_config_output_formats_match_writers():
+    assert set(config._OUTPUT_FORMATS) == set(FEED_FORMATS) - {"rss"}
@@ -0,0 +1,160 @@
+import gzip
+import os
+import threading
+
+import pytest
+import requests
+
+from rss_maker.build import FeedSpec
+from rss_maker.feed_server import FeedCache, FeedServer, load_feed
+
+FIRST = b'<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel/></rss>'
+SECOND = FIRST.replace(b"<channel/>", b"<channel><title>new</title></channel>")
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _spec(tmp_path, interval: float = 600) -> FeedSpec:
+    return {
+        "name": "JFN Pods",
+        "site": "jfn_pods",
+        "url": "https://jfn-pods.com/program/40889/voice",
+        "output_path": str(tmp_path / "jfn_pods_voice_rss.xml"),
+        "interval": interval,
+    }
+
+
+def _writer(body: bytes, calls: list, release: threading.Event | None = None):
+    def build(feeds):
+        calls.append([spec["name"] for spec in feeds])
+        if release is not None:
+            release.wait(5)
+        with open(feeds[0]["output_path"], "wb") as f:
+            f.write(body)
+        return [{"name": spec["name"], "ok": True} for spec in feeds]
+
+    return build
+
+
+def test_serves_gzip_and_answers_conditional_get_with_304(tmp_path):
+    """
+    事前圧縮した本文と強いETagを返し、If-None-Match が一致すれば304を返すことを確認するテスト
+    """
+    # --- Arrange ---
+    spec = _spec(tmp_path)
+    (tmp_path / "jfn_pods_voice_rss.xml").write_bytes(FIRST)
+    clock = FakeClock(os.path.getmtime(spec["output_path"]))
+    calls: list = []
+
+    with FeedServer([spec], build=_writer(SECOND, calls), port=0, clock=clock) as server:
+        url = server.base_url + "/jfn_pods_voice_rss.xml"
+
+        # --- Act ---
+        plain = requests.get(url, headers={"Accept-Encoding": "identity"})
+        compressed = requests.get(url, headers={"Accept-Encoding": "gzip"}, stream=True)
+        raw = compressed.raw.read()
+        revalidated = requests.get(
+            url,
+            headers={"Accept-Encoding": "identity", "If-None-Match": plain.headers["ETag"]},
+        )
+        # gzip の表現を受け取るクライアントが、非圧縮の表現のETagを送ってきた場合
+        mismatched = requests.get(
+            url, headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["ETag"]}
+        )
+        missing = requests.get(server.base_url + "/unknown.xml")
+
+    # --- Assert ---
+    assert plain.status_code == 200
+    assert plain.content == FIRST
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(raw) == FIRST
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+    assert plain.headers["Vary"] == "Accept-Encoding"
+    assert plain.headers["Cache-Control"] == "public, max-age=600"
+    assert revalidated.status_code == 304
+    assert mismatched.status_code == 200
+    assert mismatched.headers["ETag"] == compressed.headers["ETag"]
+    assert missing.status_code == 404
+    assert calls == []
+
+
+def test_stale_feed_is_served_while_regenerating_in_background(tmp_path):
+    """TTLを過ぎたフィードは古い内容を返しつつ、バックグラウンドで1回だけ生成し直すことを確認するテスト"""
+    # --- Arrange ---
+    spec = _spec(tmp_path)
+    (tmp_path / "jfn_pods_voice_rss.xml").write_bytes(FIRST)
+    clock = FakeClock(os.path.getmtime(spec["output_path"]) + 601)
+    calls: list = []
+    release = threading.Event()
+    build = _writer(SECOND, calls, release)
+
+    with FeedServer([spec], build=build, port=0, clock=clock) as server:
+        url = server.base_url + "/jfn_pods_voice_rss.xml"
+
+        # --- Act ---
+        stale = [requests.get(url) for _ in range(3)]
+        release.set()
+        server.wait_idle(5)
+        fresh = requests.get(url)
+
+    # --- Assert ---
+    assert [response.content for response in stale] == [FIRST] * 3
+    assert stale[0].headers["Cache-Control"] == "public, max-age=0"
+    assert calls == [["JFN Pods"]]
+    assert fresh.content == SECOND
+    assert fresh.headers["ETag"] != stale[0].headers["ETag"]
+    assert fresh.headers["Cache-Control"] == "public, max-age=600"
+
+
+def test_missing_feed_returns_503_and_is_generated_in_background(tmp_path):
+    spec = _spec(tmp_path)
+    calls: list = []
+
+    with FeedServer([spec], build=_writer(FIRST, calls), port=0) as server:
+        url = server.base_url + "/jfn_pods_voice_rss.xml"
+        first = requests.get(url)
+        server.wait_idle(5)
+        second = requests.get(url)
+
+    assert first.status_code == 503
+    assert first.headers["Retry-After"] == "30"
+    assert second.status_code == 200
+    assert second.content == FIRST
+    assert calls == [["JFN Pods"]]
+
+
+def test_feed_cache_evicts_least_recently_used(tmp_path):
+    path = tmp_path / "feed.xml"
+    path.write_bytes(FIRST)
+    entry = load_feed(str(path))
+    cache = FeedCache(max_entries=2)
+
+    cache.put("a", entry)
+    cache.put("b", entry)
+    cache.get("a")
+    cache.put("c", entry)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is entry
+    assert len(cache) == 2
+    with pytest.raises(ValueError):
+        FeedCache(max_entries=0)
+
+
+def test_rejects_outputs_served_at_the_same_path(tmp_path):
+    """別のディレクトリでも同じファイル名の出力は同じパスになるため、起動時にエラーにする"""
+    other = {
+        **_spec(tmp_path),
+        "name": "JFN Pods（別番組）",
+        "output_path": str(tmp_path / "other" / "jfn_pods_voice_rss.xml"),
+    }
+
+    with pytest.raises(ValueError, match="/jfn_pods_voice_rss.xml"):
+        FeedServer([_spec(tmp_path), other], port=0)
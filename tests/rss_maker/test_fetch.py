@@ -0,0 +1,179 @@
+import pytest
+import requests
+
+from rss_maker.fetch import (
+    Fetcher,
+    ResponseTooLargeError,
+    _parse_retry_after,
+    detect_charset,
+)
+from rss_maker.generate_rss import get_html
+
+
+def _response(mocker, status_code, headers=None, text=""):
+    response = mocker.Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.text = text
+    return response
+
+
+def test_fetcher_keeps_timeout_and_retries_transient_errors(mocker):
+    """
+    5xxは再試行し、最終的に成功したレスポンスを返すことを確認するテスト
+    """
+    # --- Arrange ---
+    session = mocker.Mock()
+    session.get.side_effect = [
+        _response(mocker, 503),
+        _response(mocker, 502),
+        _response(mocker, 200, text="<html></html>"),
+    ]
+    sleeps: list[float] = []
+    fetcher = Fetcher(session=session, backoff_base=1.0, sleep=sleeps.append)
+
+    # --- Act ---
+    response = fetcher.get("https://example.com")
+
+    # --- Assert ---
+    assert response.status_code == 200
+    assert session.get.call_count == 3
+    session.get.assert_called_with("https://example.com", timeout=(5, 20), headers={})
+    # フルジッターのため上限のみ確認する
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0
+    assert 0 <= sleeps[1] <= 2.0
+
+
+def test_fetcher_honors_retry_after(mocker):
+    session = mocker.Mock()
+    session.get.side_effect = [
+        _response(mocker, 429, headers={"Retry-After": "7"}),
+        _response(mocker, 200),
+    ]
+    sleeps: list[float] = []
+
+    Fetcher(session=session, sleep=sleeps.append).get("https://example.com")
+
+    assert sleeps == [7.0]
+
+
+def test_fetcher_returns_last_response_when_retries_are_exhausted(mocker):
+    session = mocker.Mock()
+    session.get.return_value = _response(mocker, 500)
+    fetcher = Fetcher(session=session, max_retries=2, sleep=lambda _: None)
+
+    response = fetcher.get("https://example.com")
+
+    assert response.status_code == 500
+    assert session.get.call_count == 3
+
+
+def test_fetcher_does_not_retry_client_errors(mocker):
+    session = mocker.Mock()
+    session.get.return_value = _response(mocker, 404)
+    fetcher = Fetcher(session=session, sleep=lambda _: None)
+
+    assert fetcher.get("https://example.com").status_code == 404
+    assert session.get.call_count == 1
+
+
+def test_fetcher_reraises_timeout_after_retries(mocker):
+    session = mocker.Mock()
+    session.get.side_effect = requests.exceptions.ReadTimeout
+    fetcher = Fetcher(session=session, max_retries=1, sleep=lambda _: None)
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        fetcher.get("https://example.com")
+    assert session.get.call_count == 2
+
+
+def test_fetcher_session_pools_connections_and_accepts_compression():
+    with Fetcher(pool_maxsize=4) as fetcher:
+        adapter = fetcher.session.get_adapter("https://example.com")
+        assert adapter._pool_maxsize == 4  # type: ignore[attr-defined]
+        assert "gzip" in fetcher.session.headers["Accept-Encoding"]
+
+
+def test_parse_retry_after_accepts_http_date():
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert _parse_retry_after("120") == 120.0
+    assert _parse_retry_after("soon") is None
+
+
+def test_get_html_uses_shared_fetcher(mocker):
+    session = mocker.Mock()
+    session.get.return_value = _response(mocker, 200, text="<html></html>")
+
+    assert get_html("https://example.com", fetcher=Fetcher(session=session)) == (
+        "<html></html>"
+    )
+    session.get.assert_called_once_with(
+        "https://example.com", timeout=(5, 20), headers={}
+    )
+
+
+def _streamed(mocker, body: bytes, headers=None, size: int = 7):
+    """`size` バイトずつ本文を返すストリーミング用のレスポンス"""
+    response = _response(mocker, 200, headers=headers)
+    response.url = "https://example.com"
+    response.iter_content.side_effect = lambda chunk_size: iter(
+        [body[i : i + size] for i in range(0, len(body), size)]
+    )
+    return response
+
+
+def test_get_html_streams_and_decodes_declared_charset_with_max_bytes(mocker):
+    """
+    上限のバイト数があると本文をストリーミングで読み、<meta charset> の文字コードで
+    チャンクの境目にまたがる文字も正しくデコードすることを確認するテスト
+    """
+    # --- Arrange ---
+    body = "".join(f"<p>第{number}回　①</p>" for number in range(200))
+    html = f'<html><head><meta charset="Shift_JIS"></head><body>{body}</body></html>'
+    session = mocker.Mock()
+    # requests は charset の無い text/html を ISO-8859-1 とみなすが、それには従わない
+    session.get.return_value = _streamed(
+        mocker, html.encode("cp932"), headers={"Content-Type": "text/html"}
+    )
+    fetcher = Fetcher(session=session, max_bytes=64 * 1024)
+
+    # --- Act ---
+    text = get_html("https://example.com", fetcher=fetcher)
+
+    # --- Assert ---
+    assert text == html
+    session.get.assert_called_once_with(
+        "https://example.com", timeout=(5, 20), headers={}, stream=True
+    )
+    session.get.return_value.close.assert_called_once()
+
+
+def test_get_html_stops_reading_pages_over_max_bytes(mocker):
+    body = b"<html>" + b"x" * 100 + b"</html>"
+    declared = _streamed(mocker, body, headers={"Content-Length": str(len(body))})
+    undeclared = _streamed(mocker, body)
+    session = mocker.Mock()
+    session.get.side_effect = [declared, undeclared]
+    fetcher = Fetcher(session=session, max_bytes=64)
+
+    # Content-Length で分かれば本文を読まずに打ち切る
+    with pytest.raises(ResponseTooLargeError, match="64 バイト"):
+        get_html("https://example.com", fetcher=fetcher)
+    declared.iter_content.assert_not_called()
+    # 分からなければ上限を超えたチャンクで打ち切る
+    with pytest.raises(ResponseTooLargeError):
+        get_html("https://example.com", fetcher=fetcher)
+    undeclared.close.assert_called_once()
+
+
+def test_detect_charset_prefers_bom_then_header_then_meta():
+    meta = b'<meta http-equiv="Content-Type" content="text/html; charset=EUC-JP">'
+
+    assert detect_charset(b"\xef\xbb\xbf" + meta, "text/html; charset=cp932") == (
+        "utf-8-sig"
+    )
+    assert detect_charset(meta, "text/html; charset=Shift_JIS") == "cp932"
+    assert detect_charset(meta, "text/html") == "euc_jp"
+    assert detect_charset(b'<meta charset="utf-16">') == "utf-8"
+    assert detect_charset(b"<html>", "text/html; charset=unknown") == "utf-8"
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from rss_maker.fingerprint import page_fingerprint
+from rss_maker.sites import BITFAN_UPDATES, JFN_PODS
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+BITFAN_HTML = (FIXTURES / "ij-matome_program_page.html").read_text(encoding="utf-8")
+JFN_HTML = (FIXTURES / "jfn_pods_voice_page.html").read_text(encoding="utf-8")
+
+ITEM_TITLE = "第404回 2025年9月12日放送『37.鉄道マニアに言わせれば』"
+
+
+def test_page_fingerprint_ignores_volatile_noise():
+    """記事一覧の外側や、範囲内のスクリプト・トークン・広告枠が変わっても同じ値になる"""
+    noisy = BITFAN_HTML.replace(
+        "<head>", '<head><meta name="csrf-token" content="token-2">', 1
+    ).replace(
+        '<section class="p-clubSection">',
+        '<section class="p-clubSection">'
+        '<input type="hidden" name="_token" value="token-2">'
+        "<script>window.now = 1760000000;</script>"
+        '<ins class="adsbygoogle" data-ad-slot="2"></ins>'
+        "<!-- rendered in 12ms -->",
+        1,
+    )
+    noisy = noisy.replace("</body>", "<footer>2025-10-17 12:00:00</footer></body>", 1)
+
+    assert page_fingerprint(BITFAN_UPDATES, noisy) == page_fingerprint(
+        BITFAN_UPDATES, BITFAN_HTML
+    )
+
+
+def test_page_fingerprint_changes_with_articles_channel_and_settings():
+    original = page_fingerprint(BITFAN_UPDATES, BITFAN_HTML)
+    assert original is not None
+    assert ITEM_TITLE in BITFAN_HTML
+
+    retitled = BITFAN_HTML.replace(ITEM_TITLE, ITEM_TITLE + "（再）")
+    renamed = BITFAN_HTML.replace(
+        'property="og:title" content="', 'property="og:title" content="新・', 1
+    )
+
+    assert page_fingerprint(BITFAN_UPDATES, retitled) != original
+    assert page_fingerprint(BITFAN_UPDATES, renamed) != original
+    assert page_fingerprint(BITFAN_UPDATES, BITFAN_HTML, {"max_pages": 3}) != original
+
+
+def test_page_fingerprint_covers_scattered_article_tags():
+    """コンテナの無いサイトでは partial_tags の要素をすべて範囲にする"""
+    original = page_fingerprint(JFN_PODS, JFN_HTML)
+    last_article = JFN_HTML.rindex("<article")
+    changed = JFN_HTML[:last_article] + JFN_HTML[last_article:].replace(
+        "<h3>", "<h3>【再】", 1
+    )
+
+    assert original is not None
+    assert page_fingerprint(JFN_PODS, changed) != original
+
+
+def test_page_fingerprint_is_none_without_a_known_region():
+    no_region = {**JFN_PODS, "partial_tags": []}
+    custom_channel = {**BITFAN_UPDATES, "channel_title": ["h1.program-title"]}
+    missing_container = BITFAN_HTML.replace("p-clubSection", "p-otherSection")
+
+    assert page_fingerprint(no_region, JFN_HTML) is None  # type: ignore[arg-type]
+    assert page_fingerprint(custom_channel, BITFAN_HTML) is None  # type: ignore[arg-type]
+    assert page_fingerprint(BITFAN_UPDATES, missing_container) is None
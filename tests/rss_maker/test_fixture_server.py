@@ -0,0 +1,116 @@
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+import requests
+
+from rss_maker.build import build_feeds
+from rss_maker.fetch import Fetcher
+from rss_maker.fixture_server import FixtureServer
+from rss_maker.generate_rss import get_html, get_html_if_modified
+from rss_maker.http_cache import HttpCache
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+ROUTES = {
+    "/program/40889/voice": "jfn_pods_voice_page.html",
+    "/updates": "ij-matome_program_page.html",
+    "/program/show/40889": "audee_program_page.html",
+}
+
+
+def _fetcher(**kwargs) -> Fetcher:
+    return Fetcher(sleep=lambda seconds: None, **kwargs)
+
+
+def test_serves_fixture_and_answers_conditional_request_with_304(tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.json"))
+    with FixtureServer(routes=ROUTES) as server, _fetcher() as fetcher:
+        url = server.url("/program/40889/voice")
+
+        first = get_html_if_modified(url, cache, fetcher=fetcher)
+        second = get_html_if_modified(url, cache, fetcher=fetcher)
+
+    assert first == (FIXTURES / "jfn_pods_voice_page.html").read_bytes().decode("utf-8")
+    assert second is None
+
+
+def test_fetcher_reuses_one_connection_for_sequential_requests():
+    """キープアライブで、同じホストへの連続したリクエストが接続を再利用することを確認するテスト"""
+    with FixtureServer(routes=ROUTES) as server, _fetcher() as fetcher:
+        for path in ROUTES:
+            get_html(server.url(path), fetcher=fetcher)
+
+        assert len(server.requests) == 3
+        assert server.connections == 1
+
+
+def test_fetcher_retries_faults_until_fixture_is_served():
+    with FixtureServer(routes=ROUTES, faults={"/updates": [503, 502]}) as server:
+        with _fetcher(max_retries=2) as fetcher:
+            html = get_html(server.url("/updates"), fetcher=fetcher)
+
+        assert "p-clubSection" in html
+        assert server.requests == [("GET", "/updates")] * 3
+
+
+def test_missing_path_returns_404():
+    with FixtureServer() as server, _fetcher() as fetcher:
+        with pytest.raises(requests.HTTPError):
+            get_html(server.url("/no-such-page.html"), fetcher=fetcher)
+
+
+def test_latency_longer_than_read_timeout_raises_timeout():
+    with FixtureServer(routes=ROUTES, latency=0.5) as server:
+        with _fetcher(timeout=(1, 0.1), max_retries=0) as fetcher:
+            with pytest.raises(requests.exceptions.Timeout):
+                get_html(server.url("/updates"), fetcher=fetcher)
+
+
+def test_streaming_read_of_throttled_body_stops_at_container():
+    """帯域制限された遅い本文でも、記事コンテナが閉じた時点で読み込みを打ち切ることを確認するテスト"""
+    with FixtureServer(routes=ROUTES, throttle=256 * 1024) as server:
+        with _fetcher() as fetcher:
+            url = server.url("/program/show/40889")
+            full = get_html(url, fetcher=fetcher)
+            partial = get_html(
+                url, fetcher=fetcher, container={"attr": "id", "value": "content_tab_all"}
+            )
+
+    assert 0 < len(partial) < len(full)
+    assert 'id="content_tab_all"' in partial
+
+
+def test_build_feeds_end_to_end_against_fixture_server(tmp_path):
+    """ネットワークを使わず、取得から書き込みまでの並行ビルドを通しで行うテスト"""
+    # --- Arrange ---
+    cache = HttpCache(str(tmp_path / "cache.json"))
+    with FixtureServer(routes=ROUTES, latency=0.05, faults={"/updates": [503]}) as server:
+        feeds = [
+            {
+                "name": "Bitfan",
+                "site": "bitfan_updates",
+                "url": server.url("/updates"),
+                "output_path": str(tmp_path / "bitfan.xml"),
+            },
+            {
+                "name": "JFN Pods",
+                "site": "jfn_pods",
+                "url": server.url("/program/40889/voice"),
+                "output_path": str(tmp_path / "jfn.xml"),
+            },
+        ]
+
+        # --- Act ---
+        with _fetcher() as fetcher:
+            first = build_feeds(
+                feeds, parse_workers=0, cache=cache, fetcher=fetcher, streaming=True
+            )
+            second = build_feeds(feeds, parse_workers=0, cache=cache, fetcher=fetcher)
+
+    # --- Assert ---
+    assert [result["ok"] for result in first] == [True, True]
+    assert [result.get("not_modified") for result in second] == [True, True]
+    channel = ET.parse(tmp_path / "jfn.xml").getroot().find("channel")
+    assert channel is not None
+    assert len(channel.findall("item")) == 3
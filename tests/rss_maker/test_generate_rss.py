@@ -1,17 +1,31 @@
+import gzip
+import io
 import pytest
 import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+import rss_maker.generate_rss
+import rss_maker.feed_formats
 from pathlib import Path
 import xml.etree.ElementTree as ET
 from rss_maker.generate_rss import (
     _guess_mime_type,
     create_audee_rss_file,
     create_jfn_pods_rss_file,
+    extract_audee_page,
+    extract_jfn_pods_page,
     generate_rss_feed,
     get_html,
+    get_html_if_modified,
     parse_articles_from_audee_page,
     parse_articles_from_jfn_pods_page,
+    parse_channel_info_from_audee_page,
     parse_channel_info_from_jfn_pods_page,
 )
+from rss_maker.fetch import Fetcher, ResponseTooLargeError
+from rss_maker.http_cache import HttpCache
+from rss_maker.manifest import FeedManifest
+from rss_maker.metrics import MetricsRecorder
 
 
 # テストフィクスチャとして、テスト用のHTMLファイルを読み込む
@@ -69,6 +83,96 @@ def test_get_html_raises_http_error(mocker):
     mock_get.assert_called_once_with(target_url, timeout=(5, 20))
 
 
+def test_get_html_if_modified_sends_validators_and_returns_none_on_304(
+    mocker, tmp_path
+):
+    """
+    保存済みの検証子で条件付きリクエストを行い、304なら None を返すことを確認するテスト
+    """
+    # --- Arrange ---
+    target_url = "https://example.com"
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    cache.remember(target_url, {"ETag": '"v1"'})
+    mock_response = mocker.Mock()
+    mock_response.status_code = 304
+    mock_get = mocker.patch(
+        "rss_maker.generate_rss.requests.get", return_value=mock_response
+    )
+
+    # --- Act ---
+    actual_html = get_html_if_modified(target_url, cache)
+
+    # --- Assert ---
+    mock_get.assert_called_once_with(
+        target_url, timeout=(5, 20), headers={"If-None-Match": '"v1"'}
+    )
+    mock_response.raise_for_status.assert_not_called()
+    assert actual_html is None
+
+
+def test_get_html_if_modified_remembers_new_validators(mocker, tmp_path):
+    target_url = "https://example.com"
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.text = "<html></html>"
+    mock_response.headers = {"ETag": '"v2"'}
+    mocker.patch("rss_maker.generate_rss.requests.get", return_value=mock_response)
+
+    assert get_html_if_modified(target_url, cache) == "<html></html>"
+    assert cache.conditional_headers(target_url) == {"If-None-Match": '"v2"'}
+
+
+def test_get_html_if_modified_keeps_old_validators_when_body_fails(mocker, tmp_path):
+    """本文が上限を超えて読めなかった場合は、新しい検証子を保存しない"""
+    target_url = "https://example.com"
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    cache.remember(target_url, {"ETag": '"v1"'})
+    session = mocker.Mock()
+    session.get.return_value = mocker.Mock(
+        status_code=200, headers={"ETag": '"v2"', "Content-Length": "2048"}
+    )
+
+    with pytest.raises(ResponseTooLargeError):
+        get_html_if_modified(
+            target_url, cache, fetcher=Fetcher(session=session, max_bytes=1024)
+        )
+    assert cache.conditional_headers(target_url) == {"If-None-Match": '"v1"'}
+
+
+def _gzip_response(body: bytes, status: int = 200) -> requests.Response:
+    """urllib3 が gzip を解くレスポンス（raw は圧縮されたまま受け取る）"""
+    headers = {"Content-Type": "text/html; charset=Shift_JIS", "Content-Encoding": "gzip"}
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response.raw = urllib3.HTTPResponse(
+        body=io.BytesIO(gzip.compress(body)), headers=headers, preload_content=False
+    )
+    return response
+
+
+@pytest.mark.parametrize("max_bytes", [None, 64 * 1024])
+def test_get_html_records_compressed_bytes_and_status(mocker, max_bytes):
+    """bytes_fetched には gzip を解く前に受け取ったバイト数を、http_status には実際のステータスを記録する"""
+    body = ("<html><body>" + "日本語のページ" * 200 + "</body></html>").encode("cp932")
+    session = mocker.Mock()
+    session.get.return_value = _gzip_response(body, status=203)
+    metrics = MetricsRecorder().feed("番組")
+
+    html = get_html(
+        "https://example.com",
+        fetcher=Fetcher(session=session, max_bytes=max_bytes),
+        metrics=metrics,
+    )
+
+    assert html.count("日本語のページ") == 200
+    record = metrics.record()
+    assert record["counters"] == {"bytes_fetched": len(gzip.compress(body))}
+    assert record["counters"]["bytes_fetched"] < len(body)
+    assert record["http_status"] == 203
+
+
 def test_parse_articles_from_audee_page(audee_page_html):
     """
     AuDeeの番組ページHTMLから記事リストを正しく抽出できるかのテスト
@@ -90,6 +194,22 @@ def test_parse_articles_from_audee_page(audee_page_html):
     )
 
 
+def test_extract_audee_page_parses_html_once(mocker, audee_page_html):
+    """
+    1回の解析でチャンネル情報と記事リストの両方を抽出できるかのテスト
+    """
+    # --- Arrange ---
+    make_soup = mocker.spy(rss_maker.generate_rss, "_make_soup")
+
+    # --- Act ---
+    page = extract_audee_page(audee_page_html)
+
+    # --- Assert ---
+    assert make_soup.call_count == 1
+    assert page["channel"] == parse_channel_info_from_audee_page(audee_page_html)
+    assert page["articles"] == parse_articles_from_audee_page(audee_page_html)
+
+
 def test_generate_rss_feed():
     """
     記事リストからRSSフィードが正しく生成されるかのテスト
@@ -145,27 +265,25 @@ def test_guess_mime_type_from_url():
     assert _guess_mime_type("https://example.com/thumb.jpg") == "image/jpeg"
 
 
-def test_create_audee_rss_file(mocker, audee_page_html):
+def test_create_audee_rss_file(mocker, tmp_path, audee_page_html):
     """
     一連の処理を実行し、最終的にRSSファイルが作成されることをテストする
     """
     # --- Arrange ---
     target_url = "https://audee.jp/program/show/40889"
-    output_path = "/tmp/test_feed.xml"
+    output_path = tmp_path / "test_feed.xml"
 
     # get_htmlをモック化
     mocker.patch("rss_maker.generate_rss.get_html", return_value=audee_page_html)
 
-    # openをモック化
-    mock_open = mocker.patch("builtins.open", mocker.mock_open())
-
     # --- Act ---
-    create_audee_rss_file(target_url, output_path)
+    create_audee_rss_file(target_url, str(output_path))
 
     # --- Assert ---
-    mock_open.assert_called_once_with(output_path, "w", encoding="utf-8")
+    # 一時ファイルからリネームされ、出力先以外のファイルは残らない
+    assert [p.name for p in tmp_path.iterdir()] == ["test_feed.xml"]
 
-    written_content = mock_open().write.call_args[0][0]
+    written_content = output_path.read_text(encoding="utf-8")
 
     root = ET.fromstring(written_content)
     channel = root.find("channel")
@@ -179,6 +297,29 @@ def test_create_audee_rss_file(mocker, audee_page_html):
     assert len(channel.findall("item")) == 9
 
 
+def test_create_audee_rss_file_skips_write_when_content_is_unchanged(
+    mocker, tmp_path, audee_page_html
+):
+    """
+    内容のハッシュ値が前回と同じ場合は、出力ファイルを書き換えないことを確認する
+    """
+    # --- Arrange ---
+    target_url = "https://audee.jp/program/show/40889"
+    output_path = tmp_path / "test_feed.xml"
+    manifest = FeedManifest(str(tmp_path / "manifest.json"))
+    mocker.patch("rss_maker.generate_rss.get_html", return_value=audee_page_html)
+    create_audee_rss_file(target_url, str(output_path), manifest)
+    first_content = output_path.read_text(encoding="utf-8")
+    atomic_write = mocker.spy(rss_maker.feed_formats, "atomic_write")
+
+    # --- Act ---
+    create_audee_rss_file(target_url, str(output_path), manifest)
+
+    # --- Assert ---
+    atomic_write.assert_not_called()
+    assert output_path.read_text(encoding="utf-8") == first_content
+
+
 def test_parse_channel_info_from_jfn_pods_page(jfn_pods_page_html):
     channel_info = parse_channel_info_from_jfn_pods_page(jfn_pods_page_html)
 
@@ -201,18 +342,30 @@ def test_parse_articles_from_jfn_pods_page(jfn_pods_page_html):
     )
 
 
-def test_create_jfn_pods_rss_file(mocker, jfn_pods_page_html):
+def test_extract_jfn_pods_page(mocker, jfn_pods_page_html):
+    base_url = "https://jfn-pods.com/program/40889/voice"
+    make_soup = mocker.spy(rss_maker.generate_rss, "_make_soup")
+
+    page = extract_jfn_pods_page(jfn_pods_page_html, base_url)
+
+    assert make_soup.call_count == 1
+    assert page["channel"] == parse_channel_info_from_jfn_pods_page(jfn_pods_page_html)
+    assert page["articles"] == parse_articles_from_jfn_pods_page(
+        jfn_pods_page_html, base_url
+    )
+
+
+def test_create_jfn_pods_rss_file(mocker, tmp_path, jfn_pods_page_html):
     target_url = "https://jfn-pods.com/program/40889/voice"
-    output_path = "/tmp/test_jfn_pods_feed.xml"
+    output_path = tmp_path / "test_jfn_pods_feed.xml"
 
     mocker.patch("rss_maker.generate_rss.get_html", return_value=jfn_pods_page_html)
-    mock_open = mocker.patch("builtins.open", mocker.mock_open())
 
-    create_jfn_pods_rss_file(target_url, output_path)
+    create_jfn_pods_rss_file(target_url, str(output_path))
 
-    mock_open.assert_called_once_with(output_path, "w", encoding="utf-8")
+    assert [p.name for p in tmp_path.iterdir()] == ["test_jfn_pods_feed.xml"]
 
-    written_content = mock_open().write.call_args[0][0]
+    written_content = output_path.read_text(encoding="utf-8")
     root = ET.fromstring(written_content)
     channel = root.find("channel")
     assert channel is not None
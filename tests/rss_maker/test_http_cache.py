@@ -0,0 +1,50 @@
+from rss_maker.http_cache import HttpCache
+
+
+def test_http_cache_round_trips_validators(tmp_path):
+    path = tmp_path / "cache" / "http_cache.json"
+    cache = HttpCache(str(path))
+    cache.remember(
+        "https://example.com/a",
+        {"ETag": '"abc"', "Last-Modified": "Wed, 01 Oct 2025 00:00:00 GMT"},
+    )
+    cache.remember("https://example.com/b", {"ETag": 'W/"b"'})
+    cache.save()
+
+    reloaded = HttpCache(str(path))
+
+    assert reloaded.conditional_headers("https://example.com/a") == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 01 Oct 2025 00:00:00 GMT",
+    }
+    assert reloaded.conditional_headers("https://example.com/b") == {
+        "If-None-Match": 'W/"b"'
+    }
+    assert reloaded.conditional_headers("https://example.com/c") == {}
+
+
+def test_http_cache_forget_and_missing_validators(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    cache.remember("https://example.com/a", {"ETag": '"abc"'})
+
+    cache.forget("https://example.com/a")
+    assert cache.conditional_headers("https://example.com/a") == {}
+
+    cache.remember("https://example.com/a", {"ETag": '"abc"'})
+    # 検証子が付かなくなったレスポンスでは古い値を残さない
+    cache.remember("https://example.com/a", {})
+    assert cache.conditional_headers("https://example.com/a") == {}
+
+
+def test_http_cache_keeps_fingerprint_across_new_validators(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.json"))
+    cache.remember("https://example.com/a", {"ETag": '"v1"'})
+    cache.remember_fingerprint("https://example.com/a", "abc")
+
+    # ETag が毎回変わるサーバーでも、フィンガープリントは次回の比較に残す
+    cache.remember("https://example.com/a", {"ETag": '"v2"'})
+    cache.remember("https://example.com/a", {})
+    assert cache.fingerprint("https://example.com/a") == "abc"
+
+    cache.forget("https://example.com/a")
+    assert cache.fingerprint("https://example.com/a") is None
@@ -0,0 +1,134 @@
+from pathlib import Path
+
+from rss_maker.incremental import is_unchanged, load_published_feed, merge_feed
+from rss_maker.rss_writer import render_rss
+
+DOCS = Path(__file__).parent.parent.parent / "docs"
+
+
+def _article(n: int) -> dict:
+    return {
+        "title": f"第{n}回",
+        "url": f"https://example.com/voice/{n}",
+        "thumbnail": f"https://example.com/thumb/{n}.jpg",
+    }
+
+
+def _content(*numbers: int) -> dict:
+    channel = {
+        "title": "番組",
+        "description": "概要",
+        "link": "https://example.com/voice",
+    }
+    return {"channel": channel, "articles": [_article(n) for n in numbers]}
+
+
+def _published(*numbers: int) -> dict:
+    content = _content(*numbers)
+    keys = {article["url"] for article in content["articles"]}
+    return {**content, "keys": keys}
+
+
+def test_load_published_feed_reads_docs_xml():
+    published = load_published_feed(str(DOCS / "jfn_pods_voice_rss.xml"))
+
+    assert published is not None
+    assert published["channel"]["link"] == "https://jfn-pods.com/program/40889/voice"
+    assert len(published["articles"]) == 12
+    first = published["articles"][0]
+    assert first["url"] == "https://jfn-pods.com/program/40889/voice/046EMBY1El"
+    assert first["thumbnail"] is not None
+    assert "description" not in first
+    assert first["url"] in published["keys"]
+
+
+def test_load_published_feed_round_trips_enriched_articles(tmp_path):
+    content = _content(2, 1)
+    content["articles"][0].update(
+        description="内容",
+        pubdate="2024-05-01T06:00:00+09:00",
+        enclosure={
+            "url": "https://example.com/media/2.mp3",
+            "length": "12345",
+            "type": "audio/mpeg",
+        },
+    )
+    path = tmp_path / "feed.xml"
+    path.write_text(render_rss(content["channel"], content["articles"]), encoding="utf-8")
+
+    published = load_published_feed(str(path))
+
+    assert published is not None
+    # 音声ファイルがある記事のサムネイルも media:thumbnail から読み戻す
+    assert published["articles"] == content["articles"]
+
+
+def test_load_published_feed_keeps_audio_enclosure_of_unknown_length(tmp_path):
+    """
+    長さが分からない（length="0"）音声ファイルも、サムネイルと取り違えずに読み戻す
+    """
+    content = _content(2, 1)
+    content["articles"][0].update(
+        thumbnail=None,
+        enclosure={
+            "url": "https://example.com/media/2.mp3",
+            "length": "0",
+            "type": "audio/mpeg",
+        },
+    )
+    path = tmp_path / "feed.xml"
+    path.write_text(render_rss(content["channel"], content["articles"]), encoding="utf-8")
+
+    published = load_published_feed(str(path))
+
+    assert published is not None
+    assert published["articles"] == content["articles"]
+    assert published["articles"][1]["thumbnail"] == "https://example.com/thumb/1.jpg"
+    assert "enclosure" not in published["articles"][1]
+
+
+def test_load_published_feed_returns_none_when_missing(tmp_path):
+    assert load_published_feed(str(tmp_path / "missing.xml")) is None
+
+
+def test_merge_feed_prepends_only_new_articles_and_keeps_history():
+    """
+    ページから消えた過去の記事を残したまま、新しい記事だけを先頭に追加する
+    """
+    # --- Arrange ---
+    published = _published(3, 2, 1)
+    fresh = _content(5, 4, 3)
+    # 既存の記事は公開済みの内容を優先する
+    fresh["articles"][2]["title"] = "変更されたタイトル"
+
+    # --- Act ---
+    merged, new_count = merge_feed(fresh, published)
+
+    # --- Assert ---
+    assert new_count == 2
+    assert [a["url"].rsplit("/", 1)[1] for a in merged["articles"]] == [
+        "5",
+        "4",
+        "3",
+        "2",
+        "1",
+    ]
+    assert merged["articles"][2]["title"] == "第3回"
+
+
+def test_merge_feed_bounds_history_window():
+    merged, new_count = merge_feed(_content(6, 5), _published(4, 3, 2, 1), 3)
+
+    assert new_count == 2
+    assert [a["url"].rsplit("/", 1)[1] for a in merged["articles"]] == ["6", "5", "4"]
+
+
+def test_is_unchanged_requires_no_new_items_and_same_channel():
+    published = _published(2, 1)
+    fresh = _content(2, 1)
+
+    assert is_unchanged(fresh, published, 0)
+    assert not is_unchanged(fresh, published, 1)
+    assert not is_unchanged(fresh, None, 0)
+    fresh["channel"]["title"] = "新しい番組名"
+    assert not is_unchanged(fresh, published, 0)
@@ -0,0 +1,81 @@
+from rss_maker.item_store import ItemStore
+
+CHANNEL = {"title": "番組", "description": "概要", "link": "https://example.com/"}
+
+
+def _article(number: int, **fields: object) -> dict[str, object]:
+    return {
+        "title": f"第{number}回",
+        "url": f"https://example.com/voice/{number}",
+        "thumbnail": f"https://example.com/img/{number}.jpg",
+        **fields,
+    }
+
+
+def test_upsert_orders_items_by_first_seen_then_page_order(tmp_path):
+    store = ItemStore(str(tmp_path / "items.sqlite3"))
+
+    first = store.upsert(
+        "番組", {"channel": CHANNEL, "articles": [_article(2), _article(1)]}, seen_at=100
+    )
+    second = store.upsert(
+        "番組",
+        {"channel": CHANNEL, "articles": [_article(4), _article(3), _article(2)]},
+        seen_at=200,
+    )
+
+    assert first == {"new_items": 2, "updated_items": 0, "channel_changed": True}
+    assert second == {"new_items": 2, "updated_items": 0, "channel_changed": False}
+    content = store.feed_content("番組")
+    assert content is not None
+    assert content["channel"] == CHANNEL
+    assert [item["title"] for item in content["articles"]] == [
+        "第4回",
+        "第3回",
+        "第2回",
+        "第1回",
+    ]
+    limited = store.feed_content("番組", limit=2)
+    assert limited is not None
+    assert len(limited["articles"]) == 2
+    assert store.first_seen("番組", "https://example.com/voice/2") == 100
+    assert store.feed_content("別の番組") is None
+
+
+def test_upsert_keeps_enriched_fields_and_records_replaced_titles(tmp_path):
+    enriched = _article(
+        1,
+        description="詳細の説明",
+        pubdate="2024-05-01T06:00:00+09:00",
+        enclosure={"url": "https://example.com/1.mp3", "length": "10", "type": "audio/mpeg"},
+    )
+    store = ItemStore(str(tmp_path / "items.sqlite3"))
+    store.upsert("番組", {"channel": CHANNEL, "articles": [enriched]})
+
+    # 一覧ページだけから取れる項目は、既存の記事と同じなら更新しない
+    unchanged = store.upsert("番組", {"channel": CHANNEL, "articles": [_article(1)]})
+    renamed = store.upsert(
+        "番組", {"channel": CHANNEL, "articles": [_article(1, title="第1回（再）")]}
+    )
+
+    assert unchanged == {"new_items": 0, "updated_items": 0, "channel_changed": False}
+    assert renamed == {"new_items": 0, "updated_items": 1, "channel_changed": False}
+    content = store.feed_content("番組")
+    assert content is not None
+    assert content["articles"] == [{**enriched, "title": "第1回（再）"}]
+    assert store.title_history("番組", enriched["url"]) == ["第1回"]  # type: ignore[arg-type]
+
+
+def test_item_store_persists_and_looks_up_many_urls(tmp_path):
+    path = str(tmp_path / "cache" / "items.sqlite3")
+    articles = [_article(number) for number in range(1200)]
+    store = ItemStore(path)
+    store.upsert("番組", {"channel": CHANNEL, "articles": articles})
+    store.close()
+
+    reopened = ItemStore(path)
+    result = reopened.upsert("番組", {"channel": CHANNEL, "articles": articles})
+
+    assert result == {"new_items": 0, "updated_items": 0, "channel_changed": False}
+    assert reopened.has_feed("番組")
+    assert len(reopened.known_urls("番組")) == 1200
@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+
+import pytest
+
+from rss_maker.atomic import atomic_write
+from rss_maker.manifest import FeedManifest, content_hash
+
+CHANNEL = {"title": "番組", "description": "概要", "link": "https://example.com"}
+ARTICLES = [{"title": "第1回", "url": "https://example.com/1", "thumbnail": None}]
+
+
+def test_content_hash_ignores_key_order_but_not_content():
+    reordered = [{"thumbnail": None, "url": "https://example.com/1", "title": "第1回"}]
+
+    assert content_hash(CHANNEL, ARTICLES) == content_hash(CHANNEL, reordered)
+    assert content_hash(CHANNEL, ARTICLES) != content_hash(CHANNEL, ARTICLES * 2)
+
+
+def test_feed_manifest_round_trip_and_requires_existing_output(tmp_path):
+    output = tmp_path / "feed.xml"
+    digest = content_hash(CHANNEL, ARTICLES)
+    manifest = FeedManifest(str(tmp_path / "manifest.json"))
+    manifest.set(str(output), digest)
+    manifest.save()
+
+    reloaded = FeedManifest(str(tmp_path / "manifest.json"))
+
+    assert reloaded.get(str(output)) == digest
+    # 出力ファイルが消えていれば、ハッシュ値が同じでも書き直す
+    assert not reloaded.is_current(str(output), digest)
+    output.write_text("x", encoding="utf-8")
+    assert reloaded.is_current(str(output), digest)
+
+
+def test_feed_manifest_accepts_concurrent_updates_while_saving(tmp_path):
+    manifest = FeedManifest(str(tmp_path / "manifest.json"))
+
+    def update(worker: int) -> None:
+        for number in range(200):
+            manifest.set(str(tmp_path / f"{worker}-{number}.xml"), "digest")
+            if number % 20 == 0:
+                manifest.save()
+
+    threads = [threading.Thread(target=update, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manifest.save()
+
+    reloaded = FeedManifest(str(tmp_path / "manifest.json"))
+    assert reloaded.get(str(tmp_path / "3-199.xml")) == "digest"
+    assert len(json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))) == 800
+
+
+def test_atomic_write_keeps_original_file_on_failure(tmp_path):
+    path = tmp_path / "feed.xml"
+    path.write_text("original", encoding="utf-8")
+    os.chmod(path, 0o640)
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as f:
+            f.write("partial")
+            raise RuntimeError("boom")
+
+    assert path.read_text(encoding="utf-8") == "original"
+    assert [p.name for p in tmp_path.iterdir()] == ["feed.xml"]
+
+    with atomic_write(str(path)) as f:
+        f.write("replaced")
+
+    assert path.read_text(encoding="utf-8") == "replaced"
+    assert oct(os.stat(path).st_mode & 0o777) == oct(0o640)
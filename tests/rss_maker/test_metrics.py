@@ -0,0 +1,90 @@
+import io
+import json
+from pathlib import Path
+
+from rss_maker.build import build_feeds
+from rss_maker.fetch import Fetcher
+from rss_maker.http_cache import HttpCache
+from rss_maker.metrics import MetricsRecorder
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+JFN_URL = "https://jfn-pods.com/program/40889/voice"
+
+
+def test_render_prometheus_escapes_labels_and_ends_openmetrics():
+    recorder = MetricsRecorder()
+    metrics = recorder.feed('番組 "A"')
+    metrics.add_duration("fetch", 0.25)
+    metrics.increment("items", 3)
+    metrics.set_http_status(200)
+    metrics.finish(True, "written")
+
+    text = recorder.render_prometheus(openmetrics=True)
+
+    assert (
+        'rss_maker_stage_duration_seconds{feed="番組 \\"A\\"",stage="fetch"} 0.25'
+        in text.splitlines()
+    )
+    assert 'rss_maker_feed_items{feed="番組 \\"A\\""} 3' in text
+    assert 'rss_maker_feed_http_status{feed="番組 \\"A\\""} 200' in text
+    assert 'rss_maker_feed_ok{feed="番組 \\"A\\""} 1' in text
+    assert text.endswith("# EOF\n")
+    assert "# EOF" not in recorder.render_prometheus()
+
+
+def test_build_feeds_records_stage_metrics(mocker, tmp_path):
+    """
+    取得・解析・書き込みの所要時間と取得バイト数・記事数、2回目の304を記録することを確認するテスト
+    """
+    # --- Arrange ---
+    html = (FIXTURES / "jfn_pods_voice_page.html").read_text(encoding="utf-8")
+    session = mocker.Mock()
+    # 圧縮を解く前に受け取ったバイト数
+    wire_bytes = 2048
+    first = mocker.Mock(
+        status_code=200,
+        text=html,
+        headers={"ETag": '"v1"'},
+        raw=mocker.Mock(**{"tell.return_value": wire_bytes}),
+    )
+    not_modified = mocker.Mock(status_code=304, headers={})
+    session.get.side_effect = [first, not_modified]
+    fetcher = Fetcher(session=session)
+    cache = HttpCache(str(tmp_path / "cache.json"))
+    feeds = [
+        {
+            "name": "JFN Pods",
+            "site": "jfn_pods",
+            "url": JFN_URL,
+            "output_path": str(tmp_path / "jfn.xml"),
+        }
+    ]
+
+    # --- Act ---
+    written = MetricsRecorder()
+    build_feeds(feeds, parse_workers=0, cache=cache, fetcher=fetcher, metrics=written)
+    skipped = MetricsRecorder()
+    build_feeds(feeds, parse_workers=0, cache=cache, fetcher=fetcher, metrics=skipped)
+
+    # --- Assert ---
+    [record] = written.records()
+    assert set(record["durations"]) == {"fetch", "fingerprint", "parse", "write"}
+    assert record["counters"] == {
+        "bytes_fetched": wire_bytes,
+        "pages_fetched": 1,
+        "items": 3,
+    }
+    assert record["http_status"] == 200
+    assert record["outcome"] == "written"
+
+    [record] = skipped.records()
+    assert record["counters"] == {"http_cache_hits": 1}
+    assert record["http_status"] == 304
+    assert record["outcome"] == "not_modified"
+
+    log = io.StringIO()
+    skipped.write_json_lines(log)
+    line = json.loads(log.getvalue())
+    assert line["event"] == "feed_metrics"
+    assert line["feed"] == "JFN Pods"
@@ -0,0 +1,108 @@
+import json
+import pickle
+
+import pytest
+
+from rss_maker.manifest import content_hash
+from rss_maker.model import FeedChannel, FeedEnclosure, FeedItem
+from rss_maker.rss_writer import render_rss
+
+CHANNEL = {"title": "番組", "description": "概要", "link": "https://example.com/"}
+
+ARTICLE = {
+    "title": "第1回",
+    "url": "https://example.com/voice/1",
+    "thumbnail": "https://example.com/img/1.jpg",
+    "description": "内容",
+    "pubdate": "2024-05-01T06:00:00+09:00",
+    "enclosure": {
+        "url": "https://example.com/media/1.mp3",
+        "length": "12345",
+        "type": "audio/mpeg",
+    },
+}
+
+
+def test_feed_item_reads_like_article_typed_dict():
+    item = FeedItem.from_article(ARTICLE)
+
+    assert item == ARTICLE
+    assert ARTICLE == item
+    assert item["enclosure"]["type"] == "audio/mpeg"
+    assert item.to_dict() == ARTICLE
+    assert isinstance(item.to_dict()["enclosure"], dict)
+    assert json.loads(json.dumps(item.to_dict())) == ARTICLE
+
+
+def test_feed_item_omits_missing_optional_keys():
+    item = FeedItem("第2回", "https://example.com/voice/2")
+
+    assert dict(item) == {
+        "title": "第2回",
+        "url": "https://example.com/voice/2",
+        "thumbnail": None,
+    }
+    assert "description" not in item
+    assert item.get("pubdate") is None
+    assert item.published is None
+
+
+@pytest.mark.parametrize(
+    "article, message",
+    [
+        ({"url": "https://example.com/"}, "title"),
+        ({"title": "t", "url": "u", "thumbnail": 1}, "thumbnail"),
+        ({"title": "t", "url": "u", "pubdate": "昨日"}, "pubdate"),
+        ({"title": "t", "url": "u", "enclosure": "x.mp3"}, "enclosure"),
+        ({"title": "t", "url": "u", "guid": "1"}, "不明な項目"),
+    ],
+)
+def test_feed_item_validates_articles_once(article, message):
+    with pytest.raises(ValueError, match=message):
+        FeedItem.from_article(article)
+
+
+def test_feed_item_accepts_validated_item_assignment():
+    """TypedDict と同じように書き換えられ、書き込んだ値も検証する"""
+    item = FeedItem("第2回", "https://example.com/voice/2")
+
+    item["description"] = "内容"
+    item.update(pubdate=ARTICLE["pubdate"], enclosure=ARTICLE["enclosure"])
+    del item["description"]
+
+    assert item == {
+        "title": "第2回",
+        "url": "https://example.com/voice/2",
+        "thumbnail": None,
+        "pubdate": ARTICLE["pubdate"],
+        "enclosure": ARTICLE["enclosure"],
+    }
+    assert isinstance(item.enclosure, FeedEnclosure)
+    assert item.pop("pubdate") == ARTICLE["pubdate"]
+    assert item.pop("description", None) is None
+    with pytest.raises(ValueError, match="pubdate"):
+        item["pubdate"] = "昨日"
+    with pytest.raises(ValueError, match="不明な項目"):
+        item["guid"] = "1"
+    with pytest.raises(ValueError, match="title"):
+        del item["title"]
+    assert "pubdate" not in item
+
+
+def test_feed_item_keeps_content_hash_and_rendered_rss():
+    """dict と FeedItem で、ハッシュ値も出力も変わらない"""
+    items = [FeedItem.from_article(ARTICLE)]
+
+    assert content_hash(CHANNEL, items) == content_hash(CHANNEL, [ARTICLE])
+    assert render_rss(FeedChannel.from_info(CHANNEL), items) == render_rss(
+        CHANNEL, [ARTICLE]
+    )
+
+
+def test_feed_item_round_trips_through_pickle():
+    item = FeedItem.from_article(ARTICLE)
+
+    restored = pickle.loads(pickle.dumps(item))
+
+    assert restored == item
+    assert isinstance(restored.enclosure, FeedEnclosure)
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+
+from rss_maker import generate_rss
+from rss_maker.model import FeedItem
+from rss_maker.parse_pool import make_feed_parse_pool, make_parse_pool, parse_pages
+from rss_maker.sites import BITFAN_UPDATES, JFN_PODS
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+JFN_URL = "https://jfn-pods.com/program/40889/voice"
+BITFAN_URL = "https://ij-matome.bitfan.id/updates"
+
+
+def _jobs():
+    jfn = (FIXTURES / "jfn_pods_voice_page.html").read_text(encoding="utf-8")
+    bitfan = (FIXTURES / "ij-matome_program_page.html").read_text(encoding="utf-8")
+    return [(JFN_PODS, jfn, JFN_URL), (BITFAN_UPDATES, bitfan, BITFAN_URL)] * 3
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_parse_pages_returns_results_in_input_order(workers):
+    """ワーカーの有無やチャンク分けに関わらず、1件ずつ解析した結果と同じ順序で返す"""
+    jobs = _jobs()
+
+    pages = parse_pages(jobs, workers=workers, chunksize=2)
+
+    assert pages == [
+        generate_rss.extract_page(adapter, html, url) for adapter, html, url in jobs
+    ]
+    assert all(isinstance(item, FeedItem) for item in pages[1]["articles"])
+
+
+def test_parse_pages_splits_jobs_into_chunks_per_worker(mocker):
+    pool = make_parse_pool(0)
+    pool_map = mocker.spy(pool, "map")
+
+    pages = parse_pages(_jobs() * 4, pool=pool, workers=2)
+
+    assert len(pages) == 24
+    # ワーカーあたり4回に分けて送る
+    assert pool_map.call_args.kwargs["chunksize"] == 3
+
+
+def test_parse_pages_raises_page_errors(mocker):
+    mocker.patch(
+        "rss_maker.generate_rss.extract_page", side_effect=ValueError("解析できません")
+    )
+
+    with pytest.raises(ValueError, match="解析できません"):
+        parse_pages(_jobs(), workers=0)
+
+
+def test_make_feed_parse_pool_sizes_workers_by_feed_count(mocker):
+    make_pool = mocker.patch("rss_maker.parse_pool.make_parse_pool")
+    mocker.patch("rss_maker.parse_pool.os.cpu_count", return_value=8)
+
+    make_feed_parse_pool(None, 3, "html.parser")
+    make_feed_parse_pool(2, 3, "html.parser")
+    make_feed_parse_pool(0, 3)
+
+    assert [call.args[0] for call in make_pool.call_args_list] == [3, 2, 0]
@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+from rss_maker.generate_rss import (
+    PARSER_BACKENDS,
+    available_parser_backends,
+    extract_audee_page,
+    extract_bitfan_updates_page,
+    extract_jfn_pods_page,
+    get_parser_backend,
+    parse_articles_from_audee_page,
+    parse_articles_from_bitfan_updates_page,
+    parse_articles_from_jfn_pods_page,
+    parse_channel_info_from_bitfan_updates_page,
+    parse_channel_info_from_jfn_pods_page,
+    set_parser_backend,
+)
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+JFN_URL = "https://jfn-pods.com/program/40889/voice"
+BITFAN_URL = "https://ij-matome.bitfan.id/updates"
+
+
+def _read(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def _parse_all() -> tuple:
+    audee = _read("audee_program_page.html")
+    jfn = _read("jfn_pods_voice_page.html")
+    bitfan = _read("ij-matome_program_page.html")
+    return (
+        parse_articles_from_audee_page(audee),
+        parse_articles_from_jfn_pods_page(jfn, JFN_URL),
+        parse_articles_from_bitfan_updates_page(bitfan, BITFAN_URL),
+        parse_channel_info_from_jfn_pods_page(jfn),
+        parse_channel_info_from_bitfan_updates_page(bitfan),
+    )
+
+
+@pytest.fixture
+def restore_backend():
+    original = get_parser_backend()
+    yield
+    set_parser_backend(original)
+
+
+@pytest.fixture(scope="module")
+def reference_results():
+    original = get_parser_backend()
+    set_parser_backend("html.parser")
+    try:
+        return _parse_all()
+    finally:
+        set_parser_backend(original)
+
+
+@pytest.mark.parametrize("backend", PARSER_BACKENDS)
+def test_every_backend_extracts_identical_results(
+    backend, restore_backend, reference_results
+):
+    """
+    どのパーサーバックエンドでも、フィクスチャから同一の抽出結果が得られることを確認する
+    """
+    if backend not in available_parser_backends():
+        pytest.skip(f"{backend} がインストールされていません")
+
+    set_parser_backend(backend)
+
+    assert _parse_all() == reference_results
+    assert [len(articles) for articles in reference_results[:3]] == [9, 3, 12]
+
+
+@pytest.mark.parametrize("backend", PARSER_BACKENDS)
+def test_partial_extraction_matches_full_parse(backend, restore_backend):
+    if backend not in available_parser_backends():
+        pytest.skip(f"{backend} がインストールされていません")
+    set_parser_backend(backend)
+    audee = _read("audee_program_page.html")
+    jfn = _read("jfn_pods_voice_page.html")
+    bitfan = _read("ij-matome_program_page.html")
+
+    assert extract_audee_page(audee, partial=True) == extract_audee_page(audee)
+    assert extract_jfn_pods_page(jfn, JFN_URL, partial=True) == (
+        extract_jfn_pods_page(jfn, JFN_URL)
+    )
+    assert extract_bitfan_updates_page(bitfan, BITFAN_URL, partial=True) == (
+        extract_bitfan_updates_page(bitfan, BITFAN_URL)
+    )
+
+
+def test_set_parser_backend_rejects_unknown_name(restore_backend):
+    with pytest.raises(ValueError, match="未対応のパーサーバックエンド"):
+        set_parser_backend("selectolax")
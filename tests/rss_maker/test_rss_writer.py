@@ -0,0 +1,151 @@
+import email.utils
+import re
+import xml.dom.minidom
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+from feedgenerator.django.utils.xmlutils import UnserializableContentError
+
+from rss_maker.generate_rss import (
+    extract_audee_page,
+    extract_bitfan_updates_page,
+    extract_jfn_pods_page,
+    generate_rss_feed,
+)
+from rss_maker.rss_writer import render_rss
+
+ROOT = Path(__file__).parent.parent.parent
+FIXTURES = ROOT / "tests" / "fixtures"
+LAST_BUILD_DATE = re.compile(r"<lastBuildDate>[^<]*</lastBuildDate>")
+
+
+def _minidom_pipeline(channel, articles) -> str:
+    """従来の feedgenerator → minidom 整形 → 空白行除去の出力"""
+    dom = xml.dom.minidom.parseString(generate_rss_feed(channel, articles))
+    pretty_xml = dom.toprettyxml(indent="  ")
+    return "\n".join([line for line in pretty_xml.split("\n") if line.strip()])
+
+
+def _without_build_date(rss: str) -> str:
+    return LAST_BUILD_DATE.sub("<lastBuildDate/>", rss)
+
+
+def _fixture_feeds():
+    audee = extract_audee_page(
+        (FIXTURES / "audee_program_page.html").read_text(encoding="utf-8")
+    )
+    jfn_url = "https://jfn-pods.com/program/40889/voice"
+    jfn = extract_jfn_pods_page(
+        (FIXTURES / "jfn_pods_voice_page.html").read_text(encoding="utf-8"), jfn_url
+    )
+    bitfan_url = "https://ij-matome.bitfan.id/updates"
+    bitfan = extract_bitfan_updates_page(
+        (FIXTURES / "ij-matome_program_page.html").read_text(encoding="utf-8"),
+        bitfan_url,
+    )
+    return [
+        ({**audee["channel"], "link": "https://audee.jp/program/show/40889"}, audee["articles"]),
+        ({**jfn["channel"], "link": jfn_url}, jfn["articles"]),
+        ({**bitfan["channel"], "link": bitfan_url}, bitfan["articles"]),
+    ]
+
+
+@pytest.mark.parametrize("index", [0, 1, 2])
+def test_render_rss_matches_minidom_pipeline_on_fixtures(index):
+    channel, articles = _fixture_feeds()[index]
+
+    assert _without_build_date(render_rss(channel, articles)) == _without_build_date(
+        _minidom_pipeline(channel, articles)
+    )
+
+
+def test_render_rss_matches_minidom_pipeline_on_tricky_text():
+    """
+    エスケープ・改行・空白だけの行・日本語URLなどでも従来の出力と一致することを確認する
+    """
+    channel = {
+        "title": "Tom & Jerry <Show> \"quoted\" 'single'",
+        "link": "https://example.com/番組?a=1&b=2",
+        "description": "1行目\r\n\r\n   \n3行目\r末尾 > ",
+    }
+    articles = [
+        {
+            "title": "  ",
+            "url": "https://example.com/記事/1?x=\"y\"",
+            "thumbnail": "https://example.com/thumb 1.png?min=330&t=<1>",
+            "description": "a\n\n\tb",
+        },
+        {"title": "", "url": "https://example.com/2", "thumbnail": None},
+        {"title": "タイトル", "url": "https://example.com/3", "thumbnail": "x.unknown"},
+    ]
+
+    assert _without_build_date(render_rss(channel, articles)) == _without_build_date(
+        _minidom_pipeline(channel, articles)
+    )
+
+
+def test_render_rss_matches_minidom_pipeline_with_pubdate_and_enclosure():
+    """
+    公開日時と音声ファイルのenclosureも従来の出力と一致し、lastBuildDateは最新の公開日時になる
+    """
+    channel = {"title": "番組", "link": "https://example.com", "description": "概要"}
+    articles = [
+        {
+            "title": "第2回",
+            "url": "https://example.com/2",
+            "thumbnail": "https://example.com/2.jpg",
+            "description": "内容",
+            "pubdate": "2024-05-08T06:00:00+09:00",
+            "enclosure": {
+                "url": "https://example.com/2.mp3",
+                "length": "12345",
+                "type": "audio/mpeg",
+            },
+        },
+        {
+            "title": "第1回",
+            "url": "https://example.com/1",
+            "thumbnail": None,
+            "pubdate": "2024-05-01T06:00:00+09:00",
+        },
+    ]
+
+    rendered = render_rss(channel, articles)
+
+    assert rendered == _minidom_pipeline(channel, articles)
+    assert "<lastBuildDate>Wed, 08 May 2024 06:00:00 +0900</lastBuildDate>" in rendered
+
+
+@pytest.mark.parametrize(
+    "name", ["audee_rss.xml", "ij_matome_updates_rss.xml", "jfn_pods_voice_rss.xml"]
+)
+def test_render_rss_reproduces_published_docs_byte_for_byte(name):
+    published = (ROOT / "docs" / name).read_text(encoding="utf-8")
+    channel_el = ET.fromstring(published).find("channel")
+    assert channel_el is not None
+    channel = {
+        key: channel_el.findtext(key) or "" for key in ("title", "link", "description")
+    }
+    build_date = email.utils.parsedate_to_datetime(
+        channel_el.findtext("lastBuildDate") or ""
+    )
+    articles = []
+    for item in channel_el.findall("item"):
+        enclosure = item.find("enclosure")
+        articles.append(
+            {
+                "title": item.findtext("title") or "",
+                "url": item.findtext("link") or "",
+                "thumbnail": enclosure.attrib["url"] if enclosure is not None else None,
+            }
+        )
+
+    assert render_rss(channel, articles, last_build_date=build_date) == published
+
+
+def test_render_rss_rejects_control_characters():
+    channel = {"title": "bad\x01", "link": "https://example.com", "description": ""}
+
+    with pytest.raises(UnserializableContentError):
+        render_rss(channel, [])
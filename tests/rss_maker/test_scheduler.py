@@ -0,0 +1,113 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from rss_maker.build import FeedSpec
+from rss_maker.schedule import ScheduleState, next_interval
+from rss_maker.scheduler import Scheduler
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+JFN_URL = "https://jfn-pods.com/program/40889/voice"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _feed(tmp_path: Path, **kwargs) -> FeedSpec:
+    return {
+        "name": "JFN Pods",
+        "site": "jfn_pods",
+        "url": JFN_URL,
+        "output_path": str(tmp_path / "jfn.xml"),
+        **kwargs,
+    }
+
+
+def test_next_interval_shrinks_after_publish_and_backs_off_otherwise(tmp_path):
+    spec = _feed(tmp_path, interval=3600, min_interval=600, max_interval=7200)
+
+    published = {"name": "x", "ok": True, "new_items": 2}
+    unchanged = {"name": "x", "ok": True, "unchanged": True}
+    not_modified = {"name": "x", "ok": True, "not_modified": True}
+
+    assert next_interval(spec, 3600, published) == 600
+    assert next_interval(spec, 3600, unchanged) == 5400
+    assert next_interval(spec, 5400, not_modified) == 7200
+
+
+def test_next_interval_keeps_interval_while_feed_is_failing(tmp_path):
+    """失敗が続いても取得間隔を伸ばさず、回復を待つことを確認するテスト"""
+    spec = _feed(tmp_path, interval=3600, min_interval=600, max_interval=7200)
+    failed = {"name": "x", "ok": False, "error": "503 Server Error"}
+
+    intervals = [600.0]
+    for _ in range(3):
+        intervals.append(next_interval(spec, intervals[-1], failed))
+
+    assert intervals == [600, 600, 600, 600]
+    assert next_interval(spec, 5400, failed) == 5400
+
+
+def test_scheduler_rejects_inconsistent_intervals(tmp_path):
+    with pytest.raises(ValueError):
+        Scheduler([_feed(tmp_path, interval=60, min_interval=120)])
+
+
+def test_scheduler_runs_due_feeds_and_adapts_interval(mocker, tmp_path):
+    """
+    初回は即座にビルドし、新しい記事があれば最短間隔、変化が無ければ間隔を伸ばすことを確認するテスト
+    """
+    # --- Arrange ---
+    html = (FIXTURES / "jfn_pods_voice_page.html").read_text(encoding="utf-8")
+    get_html = mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: html,
+    )
+    clock = FakeClock()
+    state_path = tmp_path / "schedule.json"
+    reported: list[list[str]] = []
+    scheduler = Scheduler(
+        [_feed(tmp_path, interval=3600, min_interval=600, max_interval=7200)],
+        state=ScheduleState(str(state_path)),
+        parse_workers=0,
+        host_interval=0,
+        incremental=True,
+        fetcher=mocker.Mock(),
+        on_results=lambda results, metrics: reported.append(
+            [record["outcome"] for record in metrics.records()]
+        ),
+        clock=clock,
+    )
+
+    # --- Act / Assert ---
+    with scheduler:
+        first = scheduler.run_due()
+        assert first[0]["new_items"] == 3
+        assert scheduler.seconds_until_next() == 600
+        assert scheduler.run_due() == []
+
+        clock.now += 600
+        second = scheduler.run_due()
+        assert second[0]["unchanged"] is True
+        assert scheduler.seconds_until_next() == 900
+
+    assert get_html.call_count == 2
+    assert reported == [["written"], ["unchanged"]]
+    saved = json.loads(state_path.read_text(encoding="utf-8"))["JFN Pods"]
+    assert saved["interval"] == 900
+    assert saved["last_published"] == clock.now - 600
+    # 保存した状態から再開すると、次回の取得時刻まではビルドしない
+    resumed = Scheduler(
+        [_feed(tmp_path, interval=3600, min_interval=600, max_interval=7200)],
+        state=ScheduleState(str(state_path)),
+        fetcher=mocker.Mock(),
+        clock=clock,
+    )
+    assert resumed.due() == []
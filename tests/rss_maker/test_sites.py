@@ -0,0 +1,105 @@
+import pytest
+
+from rss_maker import sites
+from rss_maker.build import build_feeds
+from rss_maker.generate_rss import prepare_feed
+from rss_maker.sites import get_site_adapter, register_site_adapter
+
+EXAMPLE_URL = "https://example.com/podcast/"
+
+EXAMPLE_HTML = """
+<html><head>
+  <meta property="og:title" content=" サンプル番組 ">
+  <meta name="description" content="サンプルの概要">
+</head><body>
+  <ul class="episodes">
+    <li class="episode"><a href="/ep/2">第2回</a><img data-src="img/2.png"></li>
+    <li class="episode"><a href="/ep/1">第1回</a></li>
+    <li class="episode"><a href="/ep/2">第2回（重複）</a></li>
+  </ul>
+</body></html>
+"""
+
+# 設定ファイルから読み込んだ想定の、関数を含まない定義
+EXAMPLE_SITE = {
+    "name": "example",
+    "label": "Example",
+    "channel_title": ["meta[property='og:title']"],
+    "channel_description": ["meta[name='description']"],
+    "container": "ul.episodes",
+    "item": "li.episode",
+    "link": "a",
+    "title": ["a"],
+    "thumbnail": [{"selector": "img", "attr": "data-src"}],
+    "validate": ["channel_title", "articles"],
+}
+
+
+@pytest.fixture
+def registry(mocker):
+    """テスト中に登録したアダプタが他のテストへ残らないようにする。"""
+    return mocker.patch.dict(sites.SITE_ADAPTERS)
+
+
+def test_site_adapter_from_config_runs_on_shared_pipeline(registry):
+    register_site_adapter(EXAMPLE_SITE)
+
+    content = prepare_feed("example", EXAMPLE_HTML, EXAMPLE_URL)
+
+    assert content["channel"] == {
+        "title": "サンプル番組",
+        "description": "サンプルの概要",
+        "link": EXAMPLE_URL,
+    }
+    assert content["articles"] == [
+        {
+            "title": "第2回",
+            "url": "https://example.com/ep/2",
+            "thumbnail": "https://example.com/podcast/img/2.png",
+        },
+        {"title": "第1回", "url": "https://example.com/ep/1", "thumbnail": None},
+    ]
+
+
+def test_site_adapter_validation_uses_label(registry):
+    register_site_adapter(EXAMPLE_SITE)
+
+    with pytest.raises(ValueError, match="Exampleの記事を抽出できませんでした"):
+        prepare_feed("example", EXAMPLE_HTML.split("<body>")[0], EXAMPLE_URL)
+
+
+def test_register_site_adapter_rejects_incomplete_definition(registry):
+    broken = {
+        key: value
+        for key, value in EXAMPLE_SITE.items()
+        if key not in ("item", "title")
+    }
+
+    with pytest.raises(ValueError, match="item, title"):
+        register_site_adapter(broken)
+    with pytest.raises(ValueError, match="未対応のサイト種別です"):
+        get_site_adapter("example")
+
+
+def test_build_feeds_uses_registered_site_adapter(mocker, registry, tmp_path):
+    register_site_adapter(EXAMPLE_SITE)
+    mocker.patch(
+        "rss_maker.generate_rss.get_html",
+        side_effect=lambda url, fetcher=None, container=None, metrics=None: EXAMPLE_HTML,
+    )
+    output = tmp_path / "example.xml"
+
+    results = build_feeds(
+        [
+            {
+                "name": "Example",
+                "site": "example",
+                "url": EXAMPLE_URL,
+                "output_path": str(output),
+            }
+        ],
+        parse_workers=0,
+    )
+
+    assert results == [{"name": "Example", "ok": True}]
+    assert "<link>https://example.com/ep/1</link>" in output.read_text(encoding="utf-8")
@@ -0,0 +1,87 @@
+from pathlib import Path
+
+from rss_maker.generate_rss import (
+    AUDEE_CONTAINER,
+    BITFAN_UPDATES_CONTAINER,
+    extract_audee_page,
+    extract_bitfan_updates_page,
+    get_html,
+)
+from rss_maker.streaming import ContainerScanner, read_until_container
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+BITFAN_URL = "https://ij-matome.bitfan.id/updates"
+
+
+def _chunks(text: str, size: int = 4096) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_container_scanner_tracks_nested_tags():
+    scanner = ContainerScanner({"tag": "section", "attr": "class", "value": "target"})
+
+    scanner.feed('<section class="x target"><section><br/></section>')
+    assert not scanner.closed
+    scanner.feed("</section><section>")
+    assert scanner.closed
+
+
+def test_read_until_container_stops_after_bitfan_club_section():
+    """
+    記事コンテナが閉じた時点で読み込みを打ち切り、抽出結果が変わらないことを確認する
+    """
+    # --- Arrange ---
+    html = (FIXTURES / "ij-matome_program_page.html").read_text(encoding="utf-8")
+    chunks = _chunks(html)
+
+    # --- Act ---
+    prefix = read_until_container(iter(chunks), BITFAN_UPDATES_CONTAINER)
+
+    # --- Assert ---
+    assert html.startswith(prefix)
+    assert len(prefix) < len(html)
+    assert extract_bitfan_updates_page(prefix, BITFAN_URL, partial=True) == (
+        extract_bitfan_updates_page(html, BITFAN_URL)
+    )
+
+
+def test_read_until_container_reads_everything_without_container():
+    html = "<html><body><p>no container</p></body></html>"
+
+    assert read_until_container(_chunks(html, 8), AUDEE_CONTAINER) == html
+
+
+def test_extract_audee_page_partial_matches_full_parse():
+    html = (FIXTURES / "audee_program_page.html").read_text(encoding="utf-8")
+
+    assert extract_audee_page(html, partial=True) == extract_audee_page(html)
+
+
+def test_get_html_with_container_streams_and_closes_early(mocker):
+    html = (FIXTURES / "audee_program_page.html").read_text(encoding="utf-8")
+    body = [chunk.encode("utf-8") for chunk in _chunks(html)]
+    consumed: list[bytes] = []
+
+    def iter_content(chunk_size):
+        for chunk in body:
+            consumed.append(chunk)
+            yield chunk
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.encoding = "utf-8"
+    mock_response.iter_content.side_effect = iter_content
+    mock_get = mocker.patch(
+        "rss_maker.generate_rss.requests.get", return_value=mock_response
+    )
+
+    prefix = get_html("https://audee.jp/program/show/40889", container=AUDEE_CONTAINER)
+
+    mock_get.assert_called_once_with(
+        "https://audee.jp/program/show/40889", timeout=(5, 20), stream=True
+    )
+    mock_response.close.assert_called_once()
+    assert len(consumed) < len(body)
+    assert extract_audee_page(prefix, partial=True)["articles"] == (
+        extract_audee_page(html)["articles"]
+    )